@@ -0,0 +1,131 @@
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+from image_store import save_array_atomic, copy_file_atomic
+from metrics import measure
+
+# =========================================================================
+# --- PENULISAN ARSIP DI BACKGROUND (WRITE-BEHIND) ---
+# =========================================================================
+# Encode PNG + fsync gambar mentah/ekstraksi resolusi penuh memakan ratusan
+# ms per gambar besar. ArchiveWriter menjalankannya di thread sendiri sehingga
+# hasil ekstraksi langsung bisa ditampilkan dari memori:
+#   - setiap file ditulis ke nama sementara, di-fsync lalu di-rename atomik
+#     (image_store._write_atomic); thumbnail dibuat setelah file utama ada.
+#   - submit() mengembalikan Future. Pemanggil menunggu Future tersebut
+#     SEBELUM meng-commit baris database, sehingga baris history tidak pernah
+#     menunjuk file yang belum ada (crash di tengah hanya meninggalkan file
+#     tanpa baris, bukan sebaliknya).
+#   - queue dibatasi (max_pending): setiap tugas memegang array resolusi penuh,
+#     submit() menunggu jika writer tertinggal (back-pressure).
+# Level kompresi PNG: parameter compression atau image_store.PNG_COMPRESSION.
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+class ArchiveWriter:
+    """
+    writer = ArchiveWriter(compression=6)
+    future = writer.submit(path, array, thumbnail=array)
+    ...
+    future.result()   # path, atau exception penulisan
+
+    Array yang di-submit TIDAK boleh diubah pemanggil sampai Future selesai.
+    """
+
+    def __init__(self, compression=None, max_pending=4, sync=None):
+        self.compression = compression
+        self.sync = sync
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="archive-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, path, array=None, source=None, thumbnail=None, label=None):
+        """
+        Menjadwalkan penulisan path dari array (di-encode PNG) atau salinan file
+        source. thumbnail (opsional): array, atau callable yang menghasilkan array,
+        untuk derivatif thumbnail (lihat thumbnail_cache.save_thumbnail).
+        Mengembalikan concurrent.futures.Future berisi path.
+        """
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((future, path, array, source, thumbnail, label))
+        return future
+
+    def flush(self, timeout=None):
+        """Menunggu semua tugas yang sudah di-submit selesai (tugas diproses berurutan)."""
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((future, None, None, None, None, None))
+        future.result(timeout)
+
+    def pending(self):
+        """Perkiraan jumlah tugas yang belum diproses."""
+        return self._queue.qsize()
+
+    def _run(self):
+        from thumbnail_cache import save_thumbnail
+
+        while True:
+            future, path, array, source, thumbnail, label = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            if path is None:
+                future.set_result(None)
+                continue
+            try:
+                with measure('archive_write', label or path):
+                    if source is not None:
+                        copy_file_atomic(source, path, self.sync)
+                    else:
+                        save_array_atomic(array, path, self.compression, self.sync)
+                if thumbnail is not None:
+                    with measure('thumbnail', label or path):
+                        save_thumbnail(path, thumbnail() if callable(thumbnail) else thumbnail)
+            except Exception as e:
+                print(f"ERROR: Gagal menulis arsip {path}: {e}")
+                future.set_exception(e)
+            else:
+                future.set_result(path)
+            # Lepaskan array resolusi penuh sebelum menunggu tugas berikutnya
+            array = thumbnail = None
+
+
+def wait_for(futures, timeout=None):
+    """Menunggu semua Future; melempar exception penulisan pertama (setelah semuanya selesai)."""
+    error = None
+    for future in futures:
+        try:
+            future.result(timeout)
+        except Exception as e:
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+
+
+def get_writer():
+    """ArchiveWriter bersama untuk proses ini (dibuat saat pertama dipakai)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArchiveWriter()
+            atexit.register(_flush_at_exit)
+        return _writer
+
+
+def _flush_at_exit():
+    """Saat aplikasi ditutup, selesaikan arsip yang masih antre (thread writer berupa daemon)."""
+    try:
+        _writer.flush(timeout=30)
+    except Exception as e:
+        print(f"Peringatan: Arsip yang masih antre tidak selesai ditulis: {e}")
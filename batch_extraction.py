@@ -0,0 +1,126 @@
+import os
+import time
+
+from db_manager import save_history_batch
+from image_store import remove_unreferenced
+from extraction_pipeline import ExtractionPipeline, format_stage_report
+from model_manager import get_extractor
+from extraction_worker import ExtractionCancelled
+
+# =========================================================================
+# --- EKSTRAKSI BATCH (FOLDER / DAFTAR FILE) ---
+# =========================================================================
+
+# Ekstensi gambar yang diterima (sama dengan filter dialog upload)
+IMAGE_EXTENSIONS = ('.bmp', '.jpg', '.jpeg', '.png')
+
+
+def collect_image_files(source, recursive=False):
+    """
+    Mengumpulkan daftar file gambar dari sebuah folder atau list path.
+    Hasil diurutkan agar urutan pemrosesan dapat diulang.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = os.fspath(source)
+        if os.path.isfile(source):
+            return [source]
+
+        files = []
+        if recursive:
+            for root, _dirs, names in os.walk(source):
+                files.extend(os.path.join(root, n) for n in names)
+        else:
+            files = [os.path.join(source, n) for n in os.listdir(source)]
+    else:
+        files = [os.fspath(p) for p in source]
+
+    return sorted(p for p in files if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def run_batch_extraction(source, judul_kasus, nomor_lp, tanggal_kejadian, user_id, progress_callback=None, recursive=False,
+                         stage_callback=None, cancel_event=None):
+    """
+    Mengekstrak minutiae dari banyak gambar sekaligus dengan satu Extractor bersama
+    (decode/inferensi/encode tumpang tindih lewat ExtractionPipeline), lalu
+    menyimpan seluruh baris history dalam satu transaksi.
+
+    progress_callback(selesai, total, path) dipanggil setelah setiap gambar,
+    stage_callback(nama_tahap) dipanggil saat memuat model dan saat pipeline mulai.
+    Jika cancel_event di-set, batch berhenti dan gambar yang SUDAH selesai tetap
+    disimpan (summary['cancelled']).
+
+    Mengembalikan dict ringkasan: history_ids, processed, failed (list path),
+    save_failed (True jika transaksi database gagal; semua gambar masuk failed),
+    elapsed_seconds, images_per_second dan stages (waktu per tahap pipeline).
+    """
+    files = collect_image_files(source, recursive=recursive)
+    total = len(files)
+    summary = {
+        'total': total,
+        'processed': 0,
+        'failed': [],
+        'history_ids': [],
+        'elapsed_seconds': 0.0,
+        'images_per_second': 0.0,
+        'cancelled': False,
+        'save_failed': False,
+    }
+    if total == 0:
+        return summary
+
+    # Pastikan model sudah dimuat sebelum timer throughput dimulai
+    if stage_callback:
+        stage_callback('load')
+    get_extractor()
+
+    # Decode, inferensi dan encode PNG berjalan tumpang tindih (extraction_pipeline.py);
+    # tahap per gambar tidak lagi berurutan, progres dilaporkan per gambar selesai
+    if stage_callback:
+        stage_callback('inference')
+    labels = [f"{judul_kasus} ({os.path.splitext(os.path.basename(path))[0]})" for path in files]
+    pipeline = ExtractionPipeline()
+    records = []
+    sources = [] # Path input per record (untuk summary['failed'] jika penyimpanan gagal)
+    start = time.perf_counter()
+    try:
+        for i, (path, result) in enumerate(pipeline.run(files, labels=labels, cancel_event=cancel_event), start=1):
+            path_mentah, path_ekstraksi, minutiae, image_hash = result
+            if path_mentah and path_ekstraksi:
+                records.append({
+                    'judul_kasus': judul_kasus,
+                    'nomor_lp': nomor_lp,
+                    'tanggal_kejadian': tanggal_kejadian,
+                    'path_mentah': path_mentah,
+                    'path_ekstraksi': path_ekstraksi,
+                    'minutiae': minutiae,
+                    'image_hash': image_hash,
+                })
+                sources.append(path)
+            else:
+                summary['failed'].append(path)
+
+            if progress_callback:
+                progress_callback(i, total, path)
+    except ExtractionCancelled:
+        summary['cancelled'] = True
+
+    # Semua baris history ditulis dalam satu transaksi
+    if records:
+        summary['history_ids'] = save_history_batch(records, user_id)
+        if not summary['history_ids']:
+            print(f"ERROR: Gagal menyimpan {len(records)} kasus batch ke database.")
+            summary['save_failed'] = True
+            summary['failed'].extend(sources)
+            # File hasil ekstraksi tidak dirujuk kasus mana pun (kecuali gambar yang sudah ada)
+            for record in records:
+                remove_unreferenced(record['image_hash'], (record['path_mentah'], record['path_ekstraksi']))
+            records = []
+
+    elapsed = time.perf_counter() - start
+    summary['processed'] = len(records)
+    summary['elapsed_seconds'] = elapsed
+    summary['images_per_second'] = len(records) / elapsed if elapsed > 0 else 0.0
+    summary['stages'] = pipeline.get_stage_report()
+    print(f"DEBUG: Batch selesai: {len(records)}/{total} gambar, {summary['images_per_second']:.2f} gambar/detik.")
+    print(f"DEBUG: Tahap pipeline: {format_stage_report(summary['stages'])}")
+    return summary
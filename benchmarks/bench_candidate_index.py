@@ -0,0 +1,118 @@
+"""
+Benchmark pre-filter index triplet: recall kandidat vs percepatan terhadap brute force.
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_candidate_index --templates 20000 --probes 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import db_manager
+import matcher
+from benchmarks.synthetic import perturb_template, random_template
+
+
+def build_database(db_path, n_templates, rng):
+    """Database sementara berisi n_templates kasus sintetis (beserta template & index triplet)."""
+    db_manager.DB_PATH = db_path
+    db_manager.init_db()
+    db_manager.register_user("bench", "bench")
+
+    templates = []
+    records = []
+    for i in range(n_templates):
+        template = random_template(rng)
+        templates.append(template)
+        records.append({
+            'judul_kasus': f"sintetis {i}",
+            'nomor_lp': None,
+            'tanggal_kejadian': None,
+            'path_mentah': '',
+            'path_ekstraksi': '',
+            'minutiae': template,
+        })
+        if len(records) == 1000:
+            db_manager.save_history_batch(records, 1)
+            records = []
+    if records:
+        db_manager.save_history_batch(records, 1)
+    return templates
+
+
+def run(n_templates, n_probes, candidate_counts, seed=0):
+    rng = np.random.default_rng(seed)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_index_")
+    db_path = os.path.join(tmp_dir, "bench.db")
+
+    start = time.perf_counter()
+    templates = build_database(db_path, n_templates, rng)
+    build_seconds = time.perf_counter() - start
+    gallery = matcher.get_gallery(refresh=True)
+
+    probe_ids = rng.choice(n_templates, size=min(n_probes, n_templates), replace=False)
+    probes = [(int(i) + 1, perturb_template(rng, templates[i])) for i in probe_ids]  # history_id = indeks + 1
+
+    # Brute force: skoring penuh ke seluruh gallery
+    brute_hits = 0
+    start = time.perf_counter()
+    for true_id, probe in probes:
+        result = matcher.match_probe(probe, gallery=gallery, top_k=1)
+        brute_hits += bool(result) and result[0]['history_id'] == true_id
+    brute_seconds = (time.perf_counter() - start) / len(probes)
+
+    results = {
+        'templates': n_templates,
+        'probes': len(probes),
+        'db_build_seconds': build_seconds,
+        'brute_force': {'seconds_per_probe': brute_seconds, 'rank1_accuracy': brute_hits / len(probes)},
+        'prefilter': [],
+    }
+
+    for k in candidate_counts:
+        # Recall: seberapa sering kasus asli masuk shortlist index
+        in_shortlist = 0
+        for true_id, probe in probes:
+            shortlist = db_manager.query_triplet_candidates(matcher.probe_hashes(probe), limit=k)
+            in_shortlist += true_id in {hid for hid, _votes in shortlist}
+
+        # Waktu end-to-end: query index + skoring penuh kandidat
+        hits = 0
+        start = time.perf_counter()
+        for true_id, probe in probes:
+            result = matcher.identify(probe, top_k=1, candidates=k)
+            hits += bool(result) and result[0]['history_id'] == true_id
+        seconds = (time.perf_counter() - start) / len(probes)
+        results['prefilter'].append({
+            'candidates': k,
+            'recall': in_shortlist / len(probes),
+            'rank1_accuracy': hits / len(probes),
+            'seconds_per_probe': seconds,
+            'speedup': brute_seconds / seconds if seconds > 0 else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--templates', type=int, default=20000)
+    parser.add_argument('--probes', type=int, default=100)
+    parser.add_argument('--candidates', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON ke file ini")
+    args = parser.parse_args()
+
+    results = run(args.templates, args.probes, args.candidates, seed=args.seed)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
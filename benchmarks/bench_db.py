@@ -0,0 +1,186 @@
+"""
+Benchmark akses riwayat di database besar: pola lama (koneksi baru per fungsi,
+tanpa index history, journal default) vs db_manager sekarang (koneksi per thread,
+WAL + PRAGMA, prepared statement, index user/timestamp).
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_db --rows 100000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import db_manager
+
+LEGACY_HISTORY_QUERY = '''
+    SELECT
+        h.id, h.judul_kasus, h.nomor_lp, h.tanggal_kejadian,
+        h.timestamp, u.username
+    FROM history h
+    JOIN users u ON h.user_id = u.id
+'''
+
+
+def build_legacy_database(db_path, n_rows, n_users=20, seed=0):
+    """Database dengan skema lama (users + history tanpa index tambahan) berisi n_rows kasus."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL
+        );
+        CREATE TABLE history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            judul_kasus TEXT NOT NULL,
+            nomor_lp TEXT,
+            tanggal_kejadian TEXT,
+            path_mentah TEXT NOT NULL,
+            path_ekstraksi TEXT NOT NULL,
+            user_id INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        );
+    ''')
+    conn.executemany("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                     ((f"user{i}", "x") for i in range(1, n_users + 1)))
+    start = datetime(2020, 1, 1)
+
+    def rows():
+        for i in range(n_rows):
+            ts = start + timedelta(seconds=rng.randint(0, 5 * 365 * 86400))
+            yield (f"Kasus {i}", f"LP/{i}/2024", ts.strftime("%Y-%m-%d"), f"/data/{i}_mentah.png",
+                   f"/data/{i}_ekstraksi.png", rng.randint(1, n_users), ts.strftime("%Y-%m-%d %H:%M:%S"))
+
+    conn.executemany('''
+        INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows())
+    conn.commit()
+    conn.close()
+
+
+# --- Pola lama: koneksi baru setiap panggilan ---
+def _legacy_connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def legacy_history_data(db_path, user_id):
+    conn = _legacy_connect(db_path)
+    rows = conn.execute(LEGACY_HISTORY_QUERY + ' WHERE h.user_id = ? ORDER BY h.timestamp DESC', (user_id,)).fetchall()
+    conn.close()
+    return rows
+
+
+def legacy_history_page(db_path, offset, limit=100):
+    conn = _legacy_connect(db_path)
+    rows = conn.execute(LEGACY_HISTORY_QUERY + ' ORDER BY h.timestamp DESC, h.id DESC LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+    conn.close()
+    return rows
+
+
+def legacy_count(db_path):
+    conn = _legacy_connect(db_path)
+    count = conn.execute('SELECT COUNT(id) FROM history').fetchone()[0]
+    conn.close()
+    return count
+
+
+def legacy_by_id(db_path, history_id):
+    conn = _legacy_connect(db_path)
+    row = conn.execute(LEGACY_HISTORY_QUERY + ' WHERE h.id = ?', (history_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def legacy_insert(db_path, i):
+    conn = _legacy_connect(db_path)
+    conn.execute('''
+        INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (f"Baru {i}", None, None, '', '', 1))
+    conn.commit()
+    conn.close()
+
+
+def _time(func, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat
+
+
+def _measure(history_data, history_page, count, by_id, insert, n_rows, repeat):
+    rng = random.Random(1)
+    ids = [rng.randint(1, n_rows) for _ in range(repeat)]
+    return {
+        'history_data_one_user_ms': _time(lambda i: history_data(1), max(1, repeat // 10)) * 1000,
+        'page_first_ms': _time(lambda i: history_page(0), repeat) * 1000,
+        'page_deep_ms': _time(lambda i: history_page(n_rows // 2), max(1, repeat // 10)) * 1000,
+        'count_ms': _time(lambda i: count(), repeat) * 1000,
+        'fetch_by_id_ms': _time(lambda i: by_id(ids[i]), repeat) * 1000,
+        'insert_ms': _time(insert, repeat) * 1000,
+    }
+
+
+def run(n_rows, repeat=50):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_db_")
+    db_path = os.path.join(tmp_dir, "bench.db")
+    build_legacy_database(db_path, n_rows)
+
+    before = _measure(
+        lambda user_id: legacy_history_data(db_path, user_id),
+        lambda offset: legacy_history_page(db_path, offset),
+        lambda: legacy_count(db_path),
+        lambda hid: legacy_by_id(db_path, hid),
+        lambda i: legacy_insert(db_path, i),
+        n_rows, repeat)
+
+    # Migrasi ke skema sekarang (index, trigger/agregat, WAL) lewat init_db
+    db_manager.DB_PATH = db_path
+    start = time.perf_counter()
+    db_manager.init_db()
+    migrate_seconds = time.perf_counter() - start
+
+    after = _measure(
+        lambda user_id: db_manager.get_history_data(user_id=user_id),
+        lambda offset: db_manager.get_history_page(limit=100, offset=offset),
+        lambda: db_manager.count_history(),
+        db_manager.fetch_history_by_id,
+        lambda i: db_manager.save_history(f"Baru {i}", None, None, '', '', 1),
+        n_rows, repeat)
+
+    return {
+        'rows': n_rows,
+        'init_db_migration_seconds': migrate_seconds,
+        'before': before,
+        'after': after,
+        'speedup': {key: before[key] / after[key] if after[key] > 0 else None for key in before},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON ke file ini")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark memori jalur ekstraksi per gambar: alur lama (decode PIL -> np.array
+-> np.stack 3-channel -> render RGB -> Image.fromarray -> PNG PIL) vs alur
+sekarang di extraction.py (satu decode cv2 grayscale, input broadcast, kanvas
+BGR dipakai ulang, cv2.imencode langsung).
+
+Setiap mode dijalankan di subproses sendiri agar peak RSS (VmHWM) tidak
+tercampur. Dicatat juga peak alokasi Python/NumPy per gambar (tracemalloc)
+dan waktu per gambar. Memakai StubExtractor (iterations=0: tanpa beban model).
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_memory --images 6 --width 2000 --height 2500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+MODES = ('legacy', 'current')
+
+
+def _legacy_extract(path, extractor, out_dir):
+    """Alur ekstraksi sebelum optimasi salinan (direproduksi untuk pembanding)."""
+    import numpy as np
+    from PIL import Image
+    from image_store import image_hash
+    from minutiae_render import render_minutiae
+    from minutiae_store import minutiae_from_dataframe
+    from thumbnail_cache import THUMB_SIZE
+
+    img_pil = Image.open(path).convert("L")
+    gray = np.array(img_pil)
+    hash_hex = image_hash(gray)
+    minutiae = minutiae_from_dataframe(extractor.extract_minutiae(np.stack((gray,) * 3, axis=-1))['minutiae'])
+    overlay = Image.fromarray(render_minutiae(gray, minutiae))
+    img_pil.save(os.path.join(out_dir, f"{hash_hex}_mentah.png"), 'PNG')
+    thumb = img_pil.copy()
+    thumb.thumbnail(THUMB_SIZE)
+    thumb.save(os.path.join(out_dir, f"{hash_hex}_mentah_thumb.png"), 'PNG')
+    overlay.save(os.path.join(out_dir, f"{hash_hex}_ekstraksi.png"), 'PNG')
+    Image.fromarray(render_minutiae(gray, minutiae, max_size=THUMB_SIZE)).save(
+        os.path.join(out_dir, f"{hash_hex}_ekstraksi_thumb.png"), 'PNG')
+
+
+def _peak_rss_mb():
+    """
+    Peak RSS proses ini (MB). VmHWM (Linux) dipakai karena ru_maxrss ikut
+    mewarisi peak proses induk sebelum exec.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _measure(mode, paths, out_dir):
+    """Dijalankan di subproses: ekstraksi semua paths dengan satu mode, kembalikan statistik."""
+    from benchmarks.synthetic import StubExtractor
+    from extraction import run_minutiae_extraction
+    from model_manager import install_extractor
+
+    extractor = StubExtractor(iterations=0)
+    install_extractor(extractor)
+    baseline_rss = _peak_rss_mb()
+
+    peaks, seconds = [], []
+    for path in paths:
+        tracemalloc.start()
+        start = time.perf_counter()
+        if mode == 'legacy':
+            _legacy_extract(path, extractor, out_dir)
+        else:
+            run_minutiae_extraction(path, "bench")
+        seconds.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    # Gambar pertama ikut memuat modul/alokasi awal: rata-rata dari gambar berikutnya
+    steady = slice(1, None) if len(paths) > 1 else slice(None)
+    return {
+        'mode': mode,
+        'images': len(paths),
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_growth_mb': _peak_rss_mb() - baseline_rss,
+        'tracemalloc_peak_mb_per_image': max(peaks[steady]) / 1024.0 / 1024.0,
+        'seconds_per_image': sum(seconds[steady]) / len(seconds[steady]),
+    }
+
+
+def run(n_images, width=2000, height=2500):
+    from benchmarks.bench_pool import _write_images
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_memory_")
+    paths = _write_images(os.path.join(tmp_dir, "input"), n_images, seed=3, width=width, height=height)
+    runs = {}
+    for mode in MODES:
+        # Subproses baru + data terpisah per mode: RSS dan file keluaran tidak bercampur
+        data_dir = os.path.join(tmp_dir, mode)
+        env = dict(os.environ, FIND_MINUTIAE_DB=os.path.join(data_dir, "bench.db"),
+                   FIND_MINUTIAE_DATA_DIR=os.path.join(data_dir, "data"))
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_memory', '--child', mode] + paths,
+                                env=env, check=True, stdout=subprocess.PIPE).stdout
+        runs[mode] = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    legacy, current = runs['legacy'], runs['current']
+    return {
+        'image': [width, height],
+        'runs': runs,
+        'tracemalloc_peak_reduction': 1 - current['tracemalloc_peak_mb_per_image'] / legacy['tracemalloc_peak_mb_per_image'],
+        'peak_rss_growth_reduction_mb': legacy['rss_growth_mb'] - current['rss_growth_mb'],
+        'speedup': legacy['seconds_per_image'] / current['seconds_per_image'],
+    }
+
+
+def _child(mode, paths):
+    from find_minutiae.api import ensure_database
+    ensure_database()
+    out_dir = os.path.join(os.environ['FIND_MINUTIAE_DATA_DIR'], 'legacy')
+    os.makedirs(out_dir, exist_ok=True)
+    result = _measure(mode, paths, out_dir)
+    # Log DEBUG ekstraksi ikut tercetak; baris terakhir stdout = hasil JSON
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=6)
+    parser.add_argument('--width', type=int, default=2000)
+    parser.add_argument('--height', type=int, default=2500)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON ke file ini")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.paths)
+        return
+
+    results = run(args.images, args.width, args.height)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
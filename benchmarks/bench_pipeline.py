@@ -0,0 +1,84 @@
+"""
+Benchmark pipeline bertahap (extraction_pipeline.py) vs run_minutiae_extraction
+berurutan untuk sekumpulan gambar, beserta waktu per tahap (decode, inference,
+encode) dan tahap yang menjadi bottleneck.
+
+Memakai StubExtractor (tanpa TensorFlow): --stub-iterations = beban CPU,
+--stub-sleep-ms = latensi inferensi tanpa CPU (seperti TF di core lain/GPU).
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_pipeline --images 40 --stub-sleep-ms 40
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+
+def run(n_images, width=800, height=1000, stub_iterations=5, stub_sleep_ms=40.0, buffer_size=4, encode_workers=1):
+    from benchmarks.bench_pool import _write_images
+    from benchmarks.synthetic import StubExtractor
+    from extraction import run_minutiae_extraction
+    from extraction_pipeline import ExtractionPipeline
+    from model_manager import install_extractor
+
+    install_extractor(StubExtractor(iterations=stub_iterations, sleep_ms=stub_sleep_ms))
+    tmp_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+
+    # Gambar berbeda untuk setiap mode agar cache hasil ekstraksi tidak ikut terukur
+    paths = _write_images(os.path.join(tmp_dir, "seq"), n_images, seed=1, width=width, height=height)
+    start = time.perf_counter()
+    for path in paths:
+        run_minutiae_extraction(path, "bench")
+    sequential = time.perf_counter() - start
+
+    paths = _write_images(os.path.join(tmp_dir, "pipe"), n_images, seed=2, width=width, height=height)
+    pipeline = ExtractionPipeline(buffer_size=buffer_size, encode_workers=encode_workers)
+    start = time.perf_counter()
+    ok = sum(1 for _path, result in pipeline.run(paths) if result[0])
+    pipelined = time.perf_counter() - start
+
+    return {
+        'images': n_images,
+        'image': [width, height],
+        'extractor': f'stub(iterations={stub_iterations}, sleep_ms={stub_sleep_ms})',
+        'cpu_count': os.cpu_count(),
+        'sequential_images_per_second': n_images / sequential,
+        'pipeline_images_per_second': n_images / pipelined,
+        'speedup': sequential / pipelined,
+        'pipeline_ok': ok,
+        'pipeline_stages': pipeline.get_stage_report(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=40)
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--height', type=int, default=1000)
+    parser.add_argument('--stub-iterations', type=int, default=5)
+    parser.add_argument('--stub-sleep-ms', type=float, default=40.0)
+    parser.add_argument('--buffer-size', type=int, default=4)
+    parser.add_argument('--encode-workers', type=int, default=1)
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON ke file ini")
+    args = parser.parse_args()
+
+    # Database & data benchmark terpisah dari data aplikasi (di-set sebelum db_manager diimpor)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_pipeline_data_")
+    os.environ['FIND_MINUTIAE_DB'] = os.path.join(tmp_dir, "bench.db")
+    os.environ['FIND_MINUTIAE_DATA_DIR'] = os.path.join(tmp_dir, "data")
+    from db_manager import init_db
+    init_db()
+
+    results = run(args.images, args.width, args.height, args.stub_iterations, args.stub_sleep_ms,
+                  args.buffer_size, args.encode_workers)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
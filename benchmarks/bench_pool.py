@@ -0,0 +1,118 @@
+"""
+Benchmark skala worker pool ekstraksi (extraction_pool.py): gambar per detik
+untuk 1, 2, 4 dan N worker. Setiap job menjalankan pipeline penuh
+run_minutiae_extraction (decode, hash, inferensi, render, encode PNG, cache).
+
+Default memakai StubExtractor (beban CPU tiruan, tanpa TensorFlow); --real
+memakai model Fingerflow di folder models. Database & data ditulis ke folder
+sementara (FIND_MINUTIAE_DB / FIND_MINUTIAE_DATA_DIR).
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_pool --images 48 --workers 1,2,4,8
+"""
+import argparse
+import functools
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def _write_images(folder, count, seed, width, height):
+    from PIL import Image
+    from benchmarks.synthetic import ridge_image
+
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"sj_{seed}_{i:04d}.png")
+        Image.fromarray(ridge_image(rng, width, height)).save(path)
+        paths.append(path)
+    return paths
+
+
+def _run_once(workers, paths, extractor_factory):
+    from extraction_pool import ExtractionPool
+    from find_minutiae.api import _extract_one
+
+    pool = ExtractionPool(_extract_one, workers=workers, extractor_factory=extractor_factory)
+    with pool:
+        # Pemanasan: spawn proses + muat Extractor di semua worker (tidak diukur)
+        start = time.perf_counter()
+        list(pool.imap((p, "warmup") for p in paths[:workers]))
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = list(pool.imap((p, "bench") for p in paths[workers:]))
+        elapsed = time.perf_counter() - start
+
+    ok = sum(1 for result, _minutiae in results if result['status'] == 'ok')
+    return {
+        'workers': workers,
+        'intra_op_threads': pool.intra_op_threads,
+        'images': len(results),
+        'ok': ok,
+        'startup_seconds': startup,
+        'elapsed_seconds': elapsed,
+        'images_per_second': len(results) / elapsed if elapsed > 0 else None,
+        'max_in_flight': pool.stats['max_in_flight'],
+    }
+
+
+def run(worker_counts, n_images, width=400, height=500, stub_iterations=20, real=False):
+    from benchmarks.synthetic import StubExtractor
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_pool_")
+    extractor_factory = None if real else functools.partial(StubExtractor, iterations=stub_iterations)
+
+    runs = []
+    for i, workers in enumerate(worker_counts):
+        # Gambar baru per putaran: cache hasil ekstraksi tidak boleh ikut terukur
+        paths = _write_images(os.path.join(tmp_dir, "input"), n_images + workers, seed=i, width=width, height=height)
+        runs.append(_run_once(workers, paths, extractor_factory))
+
+    base = runs[0]['images_per_second']
+    for entry in runs:
+        entry['speedup'] = entry['images_per_second'] / base if base else None
+        entry['efficiency'] = entry['speedup'] / entry['workers'] if entry['speedup'] else None
+    return {
+        'cpu_count': os.cpu_count(),
+        'extractor': 'fingerflow' if real else f'stub(iterations={stub_iterations})',
+        'image': [width, height],
+        'runs': runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=48, help="Gambar yang diukur per jumlah worker")
+    parser.add_argument('--workers', default=None, help="Daftar jumlah worker, misal 1,2,4,8 (default: 1,2,4,N)")
+    parser.add_argument('--width', type=int, default=400)
+    parser.add_argument('--height', type=int, default=500)
+    parser.add_argument('--stub-iterations', type=int, default=20, help="Beban CPU StubExtractor per gambar")
+    parser.add_argument('--real', action='store_true', help="Pakai model Fingerflow, bukan StubExtractor")
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON ke file ini")
+    args = parser.parse_args()
+
+    # Database & data benchmark terpisah dari data aplikasi (di-set sebelum db_manager diimpor)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_pool_data_")
+    os.environ['FIND_MINUTIAE_DB'] = os.path.join(tmp_dir, "bench.db")
+    os.environ['FIND_MINUTIAE_DATA_DIR'] = os.path.join(tmp_dir, "data")
+    from find_minutiae.api import ensure_database
+    ensure_database()
+
+    n = os.cpu_count() or 1
+    worker_counts = [int(w) for w in args.workers.split(',')] if args.workers else sorted({1, 2, 4, n})
+    results = run(worker_counts, args.images, args.width, args.height, args.stub_iterations, args.real)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark visualisasi minutiae: loop iterrows + cv2.circle (cara lama) vs renderer
+vektorisasi (minutiae_render.py), di resolusi penuh dan resolusi thumbnail.
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_render --minutiae 80 --repeat 50
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import random_template
+from minutiae_render import render_minutiae
+from minutiae_store import minutiae_to_dataframe
+
+
+def draw_iterrows(gray, minutiae_df):
+    """Implementasi lama (draw_minutiae_fallback_cv2) sebagai pembanding."""
+    img_canvas = np.stack((gray,) * 3, axis=-1).copy()
+    for _index, minutia in minutiae_df.iterrows():
+        x, y = int(round(minutia["x"])), int(round(minutia["y"]))
+        cv2.circle(img_canvas, (x, y), 5, (255, 0, 0), -1)
+    return img_canvas
+
+
+def _time(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(n_minutiae, repeat, width=800, height=1000, thumb_size=(400, 400), seed=0):
+    rng = np.random.default_rng(seed)
+    gray = rng.integers(0, 256, (height, width), dtype=np.uint8)
+    minutiae = random_template(rng, n=n_minutiae, width=width, height=height, min_spacing=8.0)
+    minutiae_df = minutiae_to_dataframe(minutiae)
+
+    old = _time(lambda: draw_iterrows(gray, minutiae_df), repeat)
+    full = _time(lambda: render_minutiae(gray, minutiae), repeat)
+    thumb = _time(lambda: render_minutiae(gray, minutiae, max_size=thumb_size), repeat)
+    old_thumb = _time(lambda: cv2.resize(draw_iterrows(gray, minutiae_df), thumb_size, interpolation=cv2.INTER_AREA), repeat)
+    return {
+        'image': [width, height],
+        'minutiae': len(minutiae['x']),
+        'iterrows_seconds': old,
+        'vectorized_seconds': full,
+        'speedup_full': old / full if full > 0 else None,
+        'iterrows_then_resize_seconds': old_thumb,
+        'vectorized_thumbnail_seconds': thumb,
+        'speedup_thumbnail': old_thumb / thumb if thumb > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutiae', type=int, default=80)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.minutiae, args.repeat, seed=args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
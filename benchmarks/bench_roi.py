@@ -0,0 +1,145 @@
+"""
+Benchmark pemotongan ROI sebelum inferensi (preprocessing.py): waktu dan
+peak alokasi inferensi, serta jumlah minutiae, untuk frame penuh vs potongan
+foreground pada scan dengan latar kosong yang luas.
+
+Cetakan ridge sintetis ditempel di kanvas besar (latar terang + noise
+sensor). StubExtractor(detector='corners') menghasilkan minutiae dari isi
+lokal gambar sehingga minutiae ROI (setelah dipetakan ke frame asli) bisa
+dibandingkan dengan minutiae frame penuh: 'recall' = bagian minutiae frame
+penuh yang juga ditemukan ROI (dalam --tolerance piksel). --real memakai
+model Fingerflow.
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.bench_roi --images 8 --canvas 1600x2000 --print 500x620
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def _write_scans(folder, count, seed, canvas, print_size):
+    from PIL import Image
+    from benchmarks.synthetic import scan_image
+
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"scan_{seed}_{i:04d}.png")
+        Image.fromarray(scan_image(rng, canvas, print_size)).save(path)
+        paths.append(path)
+    return paths
+
+
+def _infer(path, roi):
+    """(detik, peak tracemalloc, job) untuk satu inferensi dengan ROI aktif/nonaktif."""
+    import extraction
+
+    extraction.PREPROCESS_PARAMS['roi'] = roi
+    job = extraction.prepare_extraction(path)
+    job['minutiae'] = None  # Selalu inferensi (abaikan cache hasil)
+    tracemalloc.start()
+    start = time.perf_counter()
+    extraction.infer_extraction(job)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, job
+
+
+def _recall(reference, candidate, tolerance):
+    """Bagian minutiae reference yang punya pasangan di candidate dalam jarak tolerance."""
+    if len(reference['x']) == 0:
+        return 1.0
+    if len(candidate['x']) == 0:
+        return 0.0
+    dx = reference['x'][:, None] - candidate['x'][None, :]
+    dy = reference['y'][:, None] - candidate['y'][None, :]
+    return float(np.mean(np.hypot(dx, dy).min(axis=1) <= tolerance))
+
+
+def run(n_images, canvas=(1600, 2000), print_size=(500, 620), stub_iterations=10, tolerance=3.0, real=False):
+    from benchmarks.synthetic import StubExtractor
+    from model_manager import install_extractor
+
+    if not real:
+        install_extractor(StubExtractor(iterations=stub_iterations, detector='corners'))
+    tmp_dir = tempfile.mkdtemp(prefix="bench_roi_")
+    paths = _write_scans(os.path.join(tmp_dir, "input"), n_images, seed=4, canvas=canvas, print_size=print_size)
+    _infer(paths[0], True)  # Pemanasan (model/impor)
+
+    images = []
+    for path in paths:
+        full_seconds, full_peak, full = _infer(path, False)
+        roi_seconds, roi_peak, roi = _infer(path, True)
+        x0, y0, x1, y1 = roi['transform']['roi']
+        images.append({
+            'roi': [x0, y0, x1, y1],
+            'roi_area_ratio': (x1 - x0) * (y1 - y0) / float(canvas[0] * canvas[1]),
+            'full_seconds': full_seconds,
+            'roi_seconds': roi_seconds,
+            'full_peak_mb': full_peak / 1024.0 / 1024.0,
+            'roi_peak_mb': roi_peak / 1024.0 / 1024.0,
+            'full_minutiae': len(full['minutiae']['x']),
+            'roi_minutiae': len(roi['minutiae']['x']),
+            'recall': _recall(full['minutiae'], roi['minutiae'], tolerance),
+        })
+
+    def _mean(name):
+        return float(np.mean([entry[name] for entry in images]))
+
+    return {
+        'extractor': 'fingerflow' if real else f'stub(iterations={stub_iterations}, detector=corners)',
+        'canvas': list(canvas),
+        'print': list(print_size),
+        'images': n_images,
+        'mean_roi_area_ratio': _mean('roi_area_ratio'),
+        'inference_speedup': _mean('full_seconds') / _mean('roi_seconds'),
+        'mean_full_peak_mb': _mean('full_peak_mb'),
+        'mean_roi_peak_mb': _mean('roi_peak_mb'),
+        'mean_full_minutiae': _mean('full_minutiae'),
+        'mean_roi_minutiae': _mean('roi_minutiae'),
+        'mean_recall': _mean('recall'),
+        'per_image': images,
+    }
+
+
+def _size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=8)
+    parser.add_argument('--canvas', type=_size, default=(1600, 2000), help="Ukuran scan, LEBARxTINGGI")
+    parser.add_argument('--print', dest='print_size', type=_size, default=(500, 620), help="Ukuran cetakan, LEBARxTINGGI")
+    parser.add_argument('--stub-iterations', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=3.0, help="Jarak piksel minutiae dianggap sama")
+    parser.add_argument('--real', action='store_true', help="Pakai model Fingerflow, bukan StubExtractor")
+    parser.add_argument('--output', help="Simpan hasil sebagai JSON ke file ini")
+    args = parser.parse_args()
+
+    # Database & data benchmark terpisah dari data aplikasi (di-set sebelum db_manager diimpor)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_roi_data_")
+    os.environ['FIND_MINUTIAE_DB'] = os.path.join(tmp_dir, "bench.db")
+    os.environ['FIND_MINUTIAE_DATA_DIR'] = os.path.join(tmp_dir, "data")
+    from find_minutiae.api import ensure_database
+    ensure_database()
+
+    results = run(args.images, args.canvas, args.print_size, args.stub_iterations, args.tolerance, args.real)
+    summary = {k: v for k, v in results.items() if k != 'per_image'}
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# =========================================================================
+# --- KORPUS BENCHMARK (GAMBAR & DATABASE SINTETIS) ---
+# =========================================================================
+# Korpus dibuat deterministik dari seed sehingga dua run (mesin/commit
+# berbeda) mengukur data yang persis sama:
+#   - Gambar: scan ridge sintetis per (ukuran kanvas, DPI). Periode ridge dan
+#     ukuran cetakan mengikuti DPI (jari ~0.8 x 1.0 inci, ridge ~9 px di
+#     500 DPI); DPI ditulis di metadata PNG (pHYs).
+#   - Database: tabel history dengan skema db_manager (trigger statistik,
+#     FTS, image_store) berisi jutaan baris; sebagian baris punya template
+#     minutiae + index triplet untuk benchmark pencocokan.
+# Korpus yang sudah dibuat dipakai ulang (manifest.json berisi parameter).
+
+REFERENCE_DPI = 500
+RIDGE_PERIOD_AT_REFERENCE = 9.0     # Jarak antar ridge (px) di 500 DPI
+FINGER_SIZE_INCH = (0.8, 1.0)       # Lebar x tinggi cetakan jari
+
+# Kosakata judul/nomor LP agar pencarian FTS mengenai data yang realistis
+CASE_TYPES = ("Pencurian", "Perampokan", "Pembunuhan", "Penipuan", "Narkotika", "Penganiayaan",
+              "Pembakaran", "Penggelapan", "Pemalsuan", "Curanmor")
+PLACES = ("Jakarta", "Bandung", "Surabaya", "Medan", "Semarang", "Makassar", "Palembang",
+          "Denpasar", "Yogyakarta", "Balikpapan", "Pontianak", "Manado")
+UNITS = ("SPKT", "Reskrim", "Polsek", "Polres", "Polda")
+
+
+def _load_manifest(folder, params):
+    """Manifest korpus jika sudah ada dengan parameter yang sama, selain itu None."""
+    path = os.path.join(folder, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('params') == params else None
+
+
+def _save_manifest(folder, params, **extra):
+    manifest = dict(extra, params=params, created=time.time())
+    with open(os.path.join(folder, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def image_corpus(folder, sizes=((400, 500), (800, 1000), (1600, 2000)), dpis=(300, 500, 1000),
+                 per_cell=4, seed=0):
+    """
+    Gambar sintetis untuk setiap kombinasi ukuran kanvas x DPI (per_cell gambar
+    per kombinasi). Mengembalikan list dict {path, width, height, dpi}.
+    """
+    from PIL import Image
+    from benchmarks.synthetic import scan_image
+
+    params = {'sizes': [list(s) for s in sizes], 'dpis': list(dpis), 'per_cell': per_cell, 'seed': seed}
+    manifest = _load_manifest(folder, params)
+    if manifest is not None and all(os.path.exists(item['path']) for item in manifest['images']):
+        return manifest['images']
+
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    images = []
+    for width, height in sizes:
+        for dpi in dpis:
+            factor = dpi / float(REFERENCE_DPI)
+            print_size = (int(FINGER_SIZE_INCH[0] * dpi), int(FINGER_SIZE_INCH[1] * dpi))
+            for i in range(per_cell):
+                path = os.path.join(folder, f"sj_{width}x{height}_{dpi}dpi_{i:03d}.png")
+                img = scan_image(rng, (width, height), print_size, period=RIDGE_PERIOD_AT_REFERENCE * factor)
+                Image.fromarray(img).save(path, dpi=(dpi, dpi))
+                images.append({'path': path, 'width': width, 'height': height, 'dpi': dpi})
+    _save_manifest(folder, params, images=images)
+    return images
+
+
+def history_database(db_path, rows, templates=2000, users=20, seed=0, batch_size=50000, progress=None):
+    """
+    Database db_manager berisi rows baris history (templates di antaranya
+    punya template minutiae + index triplet). Baris dimasukkan lewat executemany
+    dalam transaksi besar sehingga trigger (statistik, FTS, image_store) ikut
+    terisi seperti data asli. Mengembalikan dict manifest (termasuk template
+    yang disimpan, untuk membuat probe).
+    """
+    import db_manager
+    from benchmarks.synthetic import random_template
+
+    folder = os.path.dirname(os.path.abspath(db_path))
+    params = {'rows': rows, 'templates': templates, 'users': users, 'seed': seed}
+    manifest = _load_manifest(folder, params)
+    db_manager.DB_PATH = db_path
+    if manifest is not None and os.path.exists(db_path):
+        return manifest
+
+    os.makedirs(folder, exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    start_build = time.perf_counter()
+    db_manager.init_db()
+    for i in range(1, users + 1):
+        db_manager.register_user(f"penyidik{i:02d}", "bench")
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    start = datetime(2015, 1, 1)
+
+    def _case(i):
+        ts = start + timedelta(seconds=rng.randint(0, 10 * 365 * 86400))
+        return (f"{rng.choice(CASE_TYPES)} {rng.choice(PLACES)} {i}",
+                f"LP/B/{i}/{ts.year}/{rng.choice(UNITS)}",
+                ts.strftime("%Y-%m-%d"), '', '', rng.randint(1, users), ts.strftime("%Y-%m-%d %H:%M:%S"))
+
+    # Baris dengan template lewat save_history_batch (template + index triplet)
+    n_templates = min(templates, rows)
+    template_list = []
+    for offset in range(0, n_templates, 1000):
+        records = []
+        for i in range(offset, min(offset + 1000, n_templates)):
+            judul, nomor_lp, tanggal, path_mentah, path_ekstraksi, _user, _ts = _case(i)
+            template = random_template(np_rng)
+            template_list.append(template)
+            records.append({'judul_kasus': judul, 'nomor_lp': nomor_lp, 'tanggal_kejadian': tanggal,
+                            'path_mentah': path_mentah, 'path_ekstraksi': path_ekstraksi, 'minutiae': template})
+        db_manager.save_history_batch(records, 1)
+
+    # Sisanya: executemany per batch_size baris dalam satu transaksi
+    conn = db_manager.get_db_connection()
+    for offset in range(n_templates, rows, batch_size):
+        conn.executemany('''
+            INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (_case(i) for i in range(offset, min(offset + batch_size, rows))))
+        conn.commit()
+        if progress:
+            progress(min(offset + batch_size, rows), rows)
+    conn.execute("ANALYZE")
+    conn.commit()
+
+    templates_path = os.path.join(folder, 'templates.npz')
+    np.savez(templates_path, **{f"{key}_{i}": t[key] for i, t in enumerate(template_list) for key in t})
+    return _save_manifest(folder, params, db_path=db_path, templates_path=templates_path,
+                          build_seconds=time.perf_counter() - start_build)
+
+
+def load_templates(manifest):
+    """Template yang disimpan history_database (urut history_id 1..templates)."""
+    data = np.load(manifest['templates_path'])
+    count = min(manifest['params']['templates'], manifest['params']['rows'])
+    keys = ('x', 'y', 'angle', 'score', 'class')
+    return [{key: data[f"{key}_{i}"] for key in keys} for i in range(count)]
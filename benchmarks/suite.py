@@ -0,0 +1,382 @@
+"""
+Suite benchmark yang bisa diulang: korpus sintetis (benchmarks/corpus.py),
+hasil JSON per run di --output-dir, dan perbandingan dua run.
+
+Yang diukur:
+  extraction_cold   proses baru: impor + muat Extractor + ekstraksi pertama
+  extraction_warm   latensi per gambar (Extractor sudah dimuat) per ukuran x DPI
+  batch             throughput ekstraksi berurutan vs pipeline bertahap
+  history           hitung & halaman riwayat (awal/tengah/akhir) + format baris tabel
+  search            pencarian FTS (kata, prefix, nomor LP, tanpa hasil) + facet tanggal
+  matching          identifikasi 1:N (pre-filter triplet) per probe
+
+Tanpa --real dipakai StubExtractor (tanpa TensorFlow/model .h5). Korpus dan
+database sintetis disimpan di --work-dir dan dipakai ulang antar run.
+
+Jalankan dari folder aplikasi:
+    python -m benchmarks.suite --profile quick
+    python -m benchmarks.suite --rows 10000,100000,1000000 --real
+    python -m benchmarks.suite compare hasil_lama.json hasil_baru.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Ukuran korpus per profil: quick untuk cek cepat, full untuk perbandingan antar mesin
+PROFILES = {
+    'quick': {'sizes': [(400, 500), (800, 1000)], 'dpis': [500], 'per_cell': 3, 'batch_images': 12,
+              'rows': [10000], 'templates': 1000, 'probes': 20, 'repeat': 20},
+    'full': {'sizes': [(400, 500), (800, 1000), (1600, 2000)], 'dpis': [300, 500, 1000], 'per_cell': 4,
+             'batch_images': 48, 'rows': [10000, 100000, 1000000], 'templates': 5000, 'probes': 100, 'repeat': 50},
+}
+
+SEARCH_QUERIES = {
+    'word': "pencurian",
+    'prefix': "sura",
+    'two_words': "narkotika medan",
+    'nomor_lp': "LP/B/1234",
+    'no_results': "zzzz",
+}
+
+
+def _stats_ms(seconds):
+    values = np.asarray(seconds, dtype=np.float64) * 1000
+    return {
+        'n': int(values.size),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'max_ms': float(values.max()),
+    }
+
+
+def _time_calls(func, repeat):
+    seconds = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        seconds.append(time.perf_counter() - start)
+    return _stats_ms(seconds)
+
+
+def _environment(args):
+    import cv2
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'sqlite': __import__('sqlite3').sqlite_version,
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit,
+        'extractor': 'fingerflow' if args.real else f'stub(iterations={args.stub_iterations})',
+    }
+
+
+# --- Ekstraksi ---
+def _install_stub(args):
+    if not args.real:
+        from benchmarks.synthetic import StubExtractor
+        from model_manager import install_extractor
+        install_extractor(StubExtractor(iterations=args.stub_iterations))
+
+
+def _cold_child(real, stub_iterations, path):
+    """Dijalankan di subproses baru: waktu impor, muat Extractor dan ekstraksi pertama."""
+    start = time.perf_counter()
+    import extraction
+    from model_manager import get_extractor, install_extractor
+    imported = time.perf_counter()
+    if real:
+        get_extractor()
+    else:
+        from benchmarks.synthetic import StubExtractor
+        install_extractor(StubExtractor(iterations=stub_iterations))
+    loaded = time.perf_counter()
+    extraction.run_minutiae_extraction(path, "bench-cold")
+    done = time.perf_counter()
+    return {'import_seconds': imported - start, 'load_seconds': loaded - imported,
+            'first_extraction_seconds': done - loaded, 'total_seconds': done - start}
+
+
+def bench_extraction_cold(args, image, data_dir, runs=3):
+    results = []
+    for i in range(runs):
+        # Data/DB baru per run: ekstraksi pertama tidak boleh kena cache hasil
+        run_dir = os.path.join(data_dir, f"cold_{i}")
+        env = dict(os.environ, FIND_MINUTIAE_DB=os.path.join(run_dir, "bench.db"),
+                   FIND_MINUTIAE_DATA_DIR=os.path.join(run_dir, "data"))
+        command = [sys.executable, '-m', 'benchmarks.suite', '--child-cold', image['path'],
+                   '--stub-iterations', str(args.stub_iterations)] + (['--real'] if args.real else [])
+        output = subprocess.run(command, cwd=APP_DIR, env=env, stdout=subprocess.PIPE, check=True).stdout
+        results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+    return {key: float(np.median([r[key] for r in results])) for key in results[0]}
+
+
+def bench_extraction_warm(images):
+    from extraction import run_minutiae_extraction
+
+    cells = {}
+    for image in images:
+        start = time.perf_counter()
+        result = run_minutiae_extraction(image['path'], "bench-warm")
+        cell = cells.setdefault(f"{image['width']}x{image['height']}@{image['dpi']}dpi", {'seconds': [], 'minutiae': []})
+        cell['seconds'].append(time.perf_counter() - start)
+        cell['minutiae'].append(len(result[2]['x']) if result[2] is not None else 0)
+    return {name: dict(_stats_ms(cell['seconds']), mean_minutiae=float(np.mean(cell['minutiae'])))
+            for name, cell in cells.items()}
+
+
+def bench_batch(images_sequential, images_pipeline):
+    from extraction import run_minutiae_extraction
+    from extraction_pipeline import ExtractionPipeline
+
+    start = time.perf_counter()
+    for image in images_sequential:
+        run_minutiae_extraction(image['path'], "bench-batch")
+    sequential = time.perf_counter() - start
+
+    pipeline = ExtractionPipeline()
+    start = time.perf_counter()
+    for _result in pipeline.run([image['path'] for image in images_pipeline]):
+        pass
+    pipelined = time.perf_counter() - start
+    report = pipeline.get_stage_report()
+    return {
+        'images': len(images_pipeline),
+        'sequential_images_per_second': len(images_sequential) / sequential,
+        'pipeline_images_per_second': len(images_pipeline) / pipelined,
+        'pipeline_bottleneck': report['bottleneck'],
+        'pipeline_stage_mean_ms': {name: entry['mean_ms'] for name, entry in report['stages'].items()},
+    }
+
+
+# --- Database ---
+def _format_row(row):
+    """Format sel seperti kolom tabel RiwayatPencarianPage."""
+    return (str(row['id']), row['judul_kasus'], row['nomor_lp'] or "-", row['tanggal_kejadian'] or "-", row['username'])
+
+
+def bench_history(rows, repeat):
+    import db_manager
+
+    def _page(offset):
+        return [_format_row(row) for row in db_manager.get_history_page(limit=100, offset=offset)]
+
+    return {
+        'fetch_history_counts': _time_calls(lambda i: db_manager.fetch_history_counts(user_id=1), repeat),
+        'count_history': _time_calls(lambda i: db_manager.count_history(), repeat),
+        'page_first': _time_calls(lambda i: _page(0), repeat),
+        'page_middle': _time_calls(lambda i: _page(rows // 2), max(3, repeat // 5)),
+        'page_last': _time_calls(lambda i: _page(max(0, rows - 100)), max(3, repeat // 5)),
+        'page_first_user': _time_calls(lambda i: db_manager.get_history_page(user_id=1 + i % 20, limit=100), repeat),
+        'fetch_by_id': _time_calls(lambda i: db_manager.fetch_history_by_id(1 + (i * 7919) % rows), repeat),
+    }
+
+
+def bench_search(repeat):
+    import db_manager
+
+    results = {}
+    for name, query in SEARCH_QUERIES.items():
+        results[name] = {
+            'search': _time_calls(lambda i: db_manager.search_history(query, limit=100), repeat),
+            'count': _time_calls(lambda i: db_manager.count_search_history(query), repeat),
+            'hits': db_manager.count_search_history(query),
+        }
+    results['facets_all'] = _time_calls(lambda i: db_manager.history_date_facets(), max(3, repeat // 5))
+    results['facets_query'] = _time_calls(lambda i: db_manager.history_date_facets("pencurian"), max(3, repeat // 5))
+    return results
+
+
+def bench_matching(manifest, n_probes, seed=0):
+    import matcher
+    from benchmarks.corpus import load_templates
+    from benchmarks.synthetic import perturb_template
+
+    rng = np.random.default_rng(seed)
+    templates = load_templates(manifest)
+    start = time.perf_counter()
+    gallery = matcher.get_gallery(refresh=True)
+    gallery_seconds = time.perf_counter() - start
+
+    ids = rng.choice(len(templates), size=min(n_probes, len(templates)), replace=False)
+    probes = [(int(i) + 1, perturb_template(rng, templates[i])) for i in ids]  # history_id = indeks + 1
+    hits, seconds = 0, []
+    for true_id, probe in probes:
+        start = time.perf_counter()
+        result = matcher.identify(probe, top_k=1)
+        seconds.append(time.perf_counter() - start)
+        hits += bool(result) and result[0]['history_id'] == true_id
+    return dict(_stats_ms(seconds), gallery_size=len(gallery), gallery_load_seconds=gallery_seconds,
+                probes_per_second=len(probes) / sum(seconds), rank1_accuracy=hits / len(probes))
+
+
+# --- Runner ---
+def run(args):
+    from benchmarks import corpus
+
+    profile = dict(PROFILES[args.profile])
+    if args.rows:
+        profile['rows'] = [int(r) for r in args.rows.split(',')]
+    work_dir = args.work_dir or os.path.join(tempfile.gettempdir(), 'find_minutiae_bench')
+    data_dir = tempfile.mkdtemp(prefix="suite_data_", dir=work_dir if os.path.isdir(work_dir) else None)
+
+    # Database & data ekstraksi per run (di-set sebelum db_manager diimpor)
+    os.environ['FIND_MINUTIAE_DB'] = os.path.join(data_dir, "extract.db")
+    os.environ['FIND_MINUTIAE_DATA_DIR'] = os.path.join(data_dir, "data")
+    from find_minutiae.api import ensure_database
+    ensure_database()
+
+    results = {'profile': args.profile, 'started_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+               'environment': _environment(args), 'params': {k: v for k, v in profile.items()}}
+    sections = set(args.only.split(',')) if args.only else None
+
+    def _wanted(name):
+        return sections is None or name in sections
+
+    images = corpus.image_corpus(os.path.join(work_dir, 'images'), profile['sizes'], profile['dpis'],
+                                 profile['per_cell'], seed=args.seed)
+    if _wanted('extraction'):
+        print("Benchmark: ekstraksi (cold)...", file=sys.stderr)
+        results['extraction_cold'] = bench_extraction_cold(args, images[0], data_dir)
+        _install_stub(args)
+        print("Benchmark: ekstraksi (warm)...", file=sys.stderr)
+        results['extraction_warm'] = bench_extraction_warm(images)
+    if _wanted('batch'):
+        _install_stub(args)
+        # Korpus batch terpisah (seed lain) agar tidak kena cache hasil dari tahap warm
+        size = [profile['sizes'][0]]
+        batch = corpus.image_corpus(os.path.join(work_dir, 'batch'), size, [500], profile['batch_images'] * 2,
+                                    seed=args.seed + 1)
+        print("Benchmark: batch...", file=sys.stderr)
+        results['batch'] = bench_batch(batch[:profile['batch_images']], batch[profile['batch_images']:])
+
+    if _wanted('history') or _wanted('search') or _wanted('matching'):
+        import db_manager
+        results['database'] = []
+        for rows in profile['rows']:
+            db_path = os.path.join(work_dir, f"history_{rows}", "history.db")
+            print(f"Benchmark: database {rows} baris (dibuat jika belum ada)...", file=sys.stderr)
+            manifest = corpus.history_database(db_path, rows, templates=profile['templates'], seed=args.seed)
+            entry = {'rows': rows, 'templates': min(rows, profile['templates']),
+                     'build_seconds': manifest.get('build_seconds')}
+            if _wanted('history'):
+                entry['history'] = bench_history(rows, profile['repeat'])
+            if _wanted('search'):
+                entry['search'] = bench_search(profile['repeat'])
+            if _wanted('matching'):
+                entry['matching'] = bench_matching(manifest, profile['probes'], seed=args.seed)
+            results['database'].append(entry)
+            db_manager.close_db_connections()
+    results['finished_at'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+# --- Perbandingan dua run ---
+def _flatten(value, prefix=""):
+    """{'a': {'b': 1}} -> {'a.b': 1}; list database di-key dengan jumlah baris."""
+    flat = {}
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            flat.update(_flatten(inner, f"{prefix}{key}."))
+    elif isinstance(value, list) and value and isinstance(value[0], dict) and 'rows' in value[0]:
+        for inner in value:
+            flat.update(_flatten(inner, f"{prefix}{inner['rows']}."))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix[:-1]] = value
+    return flat
+
+
+def compare(path_a, path_b, threshold=0.10):
+    """
+    Rasio B/A untuk setiap metrik numerik yang ada di kedua file. Metrik waktu
+    (_ms / _seconds) lebih kecil = lebih baik; *_per_second lebih besar = lebih baik.
+    """
+    with open(path_a) as f:
+        a = _flatten(json.load(f))
+    with open(path_b) as f:
+        b = _flatten(json.load(f))
+    rows = []
+    for key in sorted(set(a) & set(b)):
+        if key.startswith(('environment.', 'params.')) or not a[key]:
+            continue
+        ratio = b[key] / a[key]
+        if key.endswith('_per_second'):
+            verdict = 'lebih cepat' if ratio > 1 + threshold else 'lebih lambat' if ratio < 1 - threshold else ''
+        elif key.endswith(('_ms', '_seconds')):
+            verdict = 'lebih cepat' if ratio < 1 - threshold else 'lebih lambat' if ratio > 1 + threshold else ''
+        else:
+            verdict = ''
+        rows.append({'metric': key, 'a': a[key], 'b': b[key], 'ratio': ratio, 'verdict': verdict})
+    return rows
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        parser = argparse.ArgumentParser(prog="python -m benchmarks.suite compare")
+        parser.add_argument('a', help="Hasil run pembanding (JSON)")
+        parser.add_argument('b', help="Hasil run baru (JSON)")
+        parser.add_argument('--threshold', type=float, default=0.10, help="Selisih relatif yang dianggap berubah")
+        parser.add_argument('--all', action='store_true', help="Tampilkan juga metrik yang tidak berubah")
+        args = parser.parse_args(sys.argv[2:])
+        for row in compare(args.a, args.b, args.threshold):
+            if args.all or row['verdict']:
+                print(f"{row['metric']:<70} {row['a']:>12.3f} {row['b']:>12.3f} {row['ratio']:>7.2f}x  {row['verdict']}")
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    parser.add_argument('--rows', help="Ukuran database, misal 10000,100000,1000000 (menimpa profil)")
+    parser.add_argument('--only', help="Bagian yang dijalankan: extraction,batch,history,search,matching")
+    parser.add_argument('--real', action='store_true', help="Pakai model Fingerflow, bukan StubExtractor")
+    parser.add_argument('--stub-iterations', type=int, default=10, help="Beban CPU StubExtractor per gambar")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="Folder korpus/database sintetis (dipakai ulang antar run)")
+    parser.add_argument('--output-dir', default=RESULTS_DIR, help="Folder hasil JSON")
+    parser.add_argument('--output', help="Path file hasil (default: <output-dir>/<profil>_<waktu>_<host>.json)")
+    parser.add_argument('--child-cold', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_cold:
+        from find_minutiae.api import ensure_database
+        ensure_database()
+        print(json.dumps(_cold_child(args.real, args.stub_iterations, args.child_cold)))
+        return
+
+    if args.work_dir:
+        os.makedirs(args.work_dir, exist_ok=True)
+    else:
+        os.makedirs(os.path.join(tempfile.gettempdir(), 'find_minutiae_bench'), exist_ok=True)
+    results = run(args)
+    output = args.output or os.path.join(
+        args.output_dir, f"{args.profile}_{time.strftime('%Y%m%d_%H%M%S')}_{socket.gethostname()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Hasil disimpan ke {output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import numpy as np
+
+# =========================================================================
+# --- DATA SINTETIS UNTUK BENCHMARK ---
+# =========================================================================
+# Template minutiae acak yang menyerupai sidik jari (tersebar di elips dengan
+# jarak minimum antar minutia) dan probe hasil perturbasi template asli
+# (rotasi, translasi, noise posisi/sudut, minutiae hilang dan palsu).
+# Gambar ridge sintetis + StubExtractor untuk benchmark pipeline ekstraksi
+# tanpa TensorFlow/model Fingerflow.
+
+
+def random_template(rng, n=60, width=360, height=480, min_spacing=12.0):
+    """Template acak sebagai dict kolom (x, y, angle, score, class) seperti minutiae_store."""
+    cx, cy = width / 2.0, height / 2.0
+    xs, ys = [], []
+    attempts = 0
+    while len(xs) < n and attempts < n * 50:
+        attempts += 1
+        x = rng.uniform(0, width)
+        y = rng.uniform(0, height)
+        if ((x - cx) / cx) ** 2 + ((y - cy) / cy) ** 2 > 1.0:
+            continue
+        if xs and np.min(np.hypot(np.asarray(xs) - x, np.asarray(ys) - y)) < min_spacing:
+            continue
+        xs.append(x)
+        ys.append(y)
+
+    k = len(xs)
+    return {
+        'x': np.asarray(xs, dtype=np.float32),
+        'y': np.asarray(ys, dtype=np.float32),
+        'angle': rng.uniform(-np.pi, np.pi, k).astype(np.float32),
+        'score': rng.uniform(0.3, 1.0, k).astype(np.float32),
+        'class': rng.integers(0, 2, k).astype(np.int8),
+    }
+
+
+def perturb_template(rng, template, max_rotation=np.deg2rad(30), max_shift=50.0, pos_noise=3.0,
+                     angle_noise=0.1, keep_ratio=0.75, spurious_ratio=0.1):
+    """Probe sintetis dari template asli (simulasi cetakan laten yang sama)."""
+    n = len(template['x'])
+    keep = rng.uniform(0, 1, n) < keep_ratio
+    theta = rng.uniform(-max_rotation, max_rotation)
+    tx, ty = rng.uniform(-max_shift, max_shift, 2)
+    c, s = np.cos(theta), np.sin(theta)
+
+    x = template['x'][keep].astype(np.float64)
+    y = template['y'][keep].astype(np.float64)
+    k = len(x)
+    px = c * x - s * y + tx + rng.normal(0, pos_noise, k)
+    py = s * x + c * y + ty + rng.normal(0, pos_noise, k)
+    pa = template['angle'][keep] + theta + rng.normal(0, angle_noise, k)
+
+    # Minutiae palsu (noise latent)
+    n_fake = int(round(n * spurious_ratio))
+    if n_fake:
+        px = np.concatenate([px, rng.uniform(px.min(), px.max(), n_fake)])
+        py = np.concatenate([py, rng.uniform(py.min(), py.max(), n_fake)])
+        pa = np.concatenate([pa, rng.uniform(-np.pi, np.pi, n_fake)])
+
+    m = len(px)
+    return {
+        'x': px.astype(np.float32),
+        'y': py.astype(np.float32),
+        'angle': ((pa + np.pi) % (2 * np.pi) - np.pi).astype(np.float32),
+        'score': rng.uniform(0.3, 1.0, m).astype(np.float32),
+        'class': np.zeros(m, dtype=np.int8),
+    }
+
+
+def ridge_image(rng, width=400, height=500, period=9.0, noise=12.0):
+    """
+    Gambar grayscale uint8 menyerupai sidik jari: pola ridge sinusoidal dengan
+    medan orientasi yang berubah halus, di dalam elips, plus noise sensor.
+    """
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    cx, cy = width * rng.uniform(0.4, 0.6), height * rng.uniform(0.4, 0.6)
+    theta = np.arctan2(yy - cy, xx - cx) * 0.5 + rng.uniform(0, np.pi)
+    theta += 0.4 * np.sin(xx / width * np.pi * rng.uniform(1, 3)) * np.cos(yy / height * np.pi * rng.uniform(1, 3))
+    phase = (2 * np.pi / period) * (xx * np.cos(theta) + yy * np.sin(theta))
+    ridges = 128 + 100 * np.cos(phase)
+
+    inside = ((xx - width / 2) / (width * 0.45)) ** 2 + ((yy - height / 2) / (height * 0.47)) ** 2 <= 1.0
+    img = np.where(inside, ridges, 235.0) + rng.normal(0, noise, (height, width))
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+
+def scan_image(rng, canvas, print_size, period=9.0, background=235, noise=4.0):
+    """
+    Scan sintetis: kanvas canvas (lebar, tinggi) berlatar terang + noise sensor
+    berisi satu cetakan ridge_image berukuran print_size di posisi acak.
+    """
+    width, height = canvas
+    pw, ph = min(print_size[0], width), min(print_size[1], height)
+    img = background + rng.normal(0, noise, (height, width))
+    x0 = int(rng.integers(0, width - pw + 1))
+    y0 = int(rng.integers(0, height - ph + 1))
+    img[y0:y0 + ph, x0:x0 + pw] = ridge_image(rng, pw, ph, period=period)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+class StubExtractor:
+    """
+    Pengganti fingerflow.extractor.Extractor untuk benchmark: beban CPU yang bisa
+    diatur (filter OpenCV berulang, seperti konvolusi jaringan) lalu minutiae
+    dari gambar. Output sama bentuknya: {'minutiae': DataFrame}.
+
+    detector='random': minutiae acak (seed dari isi gambar). detector='corners':
+    titik fitur (cv2.goodFeaturesToTrack) pada ridge, bergantung isi lokal
+    gambar seperti detektor sungguhan, sehingga hasil potongan ROI dan frame
+    penuh bisa dibandingkan.
+    """
+
+    def __init__(self, iterations=20, n_minutiae=60, sleep_ms=0.0, detector='random'):
+        self.iterations = iterations
+        self.n_minutiae = n_minutiae
+        self.sleep_ms = sleep_ms # Latensi tanpa CPU (meniru inferensi di thread/perangkat lain)
+        self.detector = detector
+
+    def extract_minutiae(self, image):
+        import cv2
+        import pandas as pd
+
+        gray = image[..., 0] if image.ndim == 3 else image
+        work = gray.astype(np.float32)
+        kernel = np.ones((7, 7), np.float32) / 49.0
+        for _ in range(self.iterations):
+            work = cv2.filter2D(work, -1, kernel)
+        if self.sleep_ms:
+            import time
+            time.sleep(self.sleep_ms / 1000.0)
+        if self.detector == 'corners':
+            return {'minutiae': pd.DataFrame(self._corners(np.ascontiguousarray(gray)))}
+        rng = np.random.default_rng(int(work.sum()) % (2 ** 32))
+        h, w = gray.shape
+        template = random_template(rng, n=self.n_minutiae, width=w, height=h, min_spacing=8.0)
+        return {'minutiae': pd.DataFrame({
+            'x': template['x'], 'y': template['y'], 'angle': template['angle'],
+            'score': template['score'], 'class': template['class'],
+        })}
+
+    @staticmethod
+    def _corners(gray):
+        import cv2
+
+        points = cv2.goodFeaturesToTrack(gray, maxCorners=0, qualityLevel=0.2, minDistance=10, blockSize=7)
+        points = np.zeros((0, 2), np.float32) if points is None else points.reshape(-1, 2)
+        x, y = points[:, 0], points[:, 1]
+        gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+        gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+        xi, yi = x.astype(np.int64), y.astype(np.int64)
+        return {
+            'x': x, 'y': y,
+            'angle': np.arctan2(gy[yi, xi], gx[yi, xi]).astype(np.float32),
+            'score': np.ones(len(x), np.float32),
+            'class': np.zeros(len(x), np.int8),
+        }
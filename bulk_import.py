@@ -0,0 +1,226 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from db_manager import (BASE_DIR, DATA_DIR, find_history_by_path, find_history_by_basenames, find_stored_image, get_image_refcount,
+                        fetch_import_sources, count_import_progress, save_import_batch)
+from batch_extraction import collect_image_files
+from extraction_pipeline import ExtractionPipeline, format_stage_report
+from extraction_worker import ExtractionCancelled
+from model_manager import get_extractor
+
+# =========================================================================
+# --- IMPOR MASSAL ARSIP LAMA (uploads/ DAN data_kasus/) ---
+# =========================================================================
+# Versi awal aplikasi menyimpan:
+#   uploads/<judul>_<YYYYMMDD_HHMMSS>/SJ-mentah.jpg      (salinan file upload)
+#   data_kasus/<YYYYMMDD_HHMMSS>_<judul>_mentah.png      (grayscale, nama flat)
+# tanpa template minutiae dan sering tanpa baris history. Impor ini:
+#   1. menelusuri kedua folder (folder upload dibaca paralel), judul dan waktu
+#      kasus diambil dari nama folder/file;
+#   2. mengekstrak minutiae lewat ExtractionPipeline (satu Extractor bersama,
+#      decode/encode paralel) ke penyimpanan content-addressed;
+#   3. menyimpan kasus + template + progres per file setiap commit_every file
+#      dalam SATU transaksi (db_manager.save_import_batch).
+# File yang sudah tercatat di tabel import_progress dilewati, sehingga impor
+# yang dihentikan (atau crash) dilanjutkan dari file berikutnya. Gambar yang
+# isinya sama dengan kasus yang sudah ada dicatat 'duplicate' (tanpa kasus
+# baru). Kasus lama tanpa template dipindah ke penyimpanan content-addressed
+# ('linked'); file lamanya menjadi yatim dan dikarantina store_scanner.py.
+
+UPLOADS_DIR = os.path.join(BASE_DIR, 'uploads')
+COMMIT_EVERY = 500
+WALK_THREADS = 8
+
+_UPLOAD_DIR_RE = re.compile(r'^(?P<judul>.+)_(?P<ts>\d{8}_\d{6})$')
+_LEGACY_FILE_RE = re.compile(r'^(?P<ts>\d{8}_\d{6})_(?P<judul>.+)_mentah\.\w+$', re.IGNORECASE)
+
+
+def _parse_timestamp(text):
+    """'YYYYMMDD_HHMMSS' -> 'YYYY-MM-DD HH:MM:SS' (format kolom history.timestamp), atau None."""
+    try:
+        return datetime.strptime(text, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _mtime_timestamp(path):
+    return datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _title(text):
+    """Judul dari nama file/folder (versi lama mengganti spasi dengan '_')."""
+    return text.replace('_', ' ').strip() or text
+
+
+def _scan_upload_dir(folder):
+    """Item impor untuk satu folder uploads/<judul>_<timestamp>."""
+    name = os.path.basename(folder)
+    match = _UPLOAD_DIR_RE.match(name)
+    items = []
+    for path in collect_image_files(folder):
+        if match:
+            judul, timestamp = _title(match.group('judul')), _parse_timestamp(match.group('ts'))
+        else:
+            judul, timestamp = _title(name), None
+        items.append({'path': path, 'judul': judul, 'timestamp': timestamp or _mtime_timestamp(path), 'source': 'uploads'})
+    return items
+
+
+def discover_sources(uploads_dir=UPLOADS_DIR, legacy_dir=DATA_DIR, threads=WALK_THREADS):
+    """
+    Daftar item impor (dict path, judul, timestamp, source) dari folder upload
+    lama dan file *_mentah.* lepas di legacy_dir, urut waktu kasus. Overlay
+    *_ekstraksi.* lama tidak diimpor (dirender ulang dari hasil ekstraksi).
+    """
+    items = []
+    if uploads_dir and os.path.isdir(uploads_dir):
+        folders = sorted(entry.path for entry in os.scandir(uploads_dir) if entry.is_dir())
+        # Banyak folder kecil: listing paralel (I/O bound, terutama di network share)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for folder_items in executor.map(_scan_upload_dir, folders):
+                items.extend(folder_items)
+
+    if legacy_dir and os.path.isdir(legacy_dir):
+        for entry in os.scandir(legacy_dir):
+            match = _LEGACY_FILE_RE.match(entry.name)
+            if match and entry.is_file():
+                items.append({'path': entry.path, 'judul': _title(match.group('judul')),
+                              'timestamp': _parse_timestamp(match.group('ts')) or _mtime_timestamp(entry.path),
+                              'source': 'data_kasus'})
+
+    items.sort(key=lambda item: (item['timestamp'], item['path']))
+    return items
+
+
+def run_bulk_import(user_id, uploads_dir=UPLOADS_DIR, legacy_dir=DATA_DIR, commit_every=COMMIT_EVERY, workers=2,
+                    retry_failed=False, limit=None, progress_callback=None, stage_callback=None, cancel_event=None):
+    """
+    Mengimpor arsip lama (lihat keterangan modul) sebagai kasus milik user_id.
+
+    workers: thread decode/encode pipeline (inferensi tetap satu Extractor bersama).
+    retry_failed: file yang sebelumnya gagal dicoba lagi. limit: maksimal file
+    baru yang diproses pada pemanggilan ini (sisanya di pemanggilan berikutnya).
+    progress_callback(selesai, total, path) dipanggil per file; cancel_event
+    menghentikan impor setelah batch yang sedang berjalan disimpan.
+
+    Mengembalikan dict ringkasan: total (file ditemukan), pending, processed,
+    counts (jumlah per status pada pemanggilan ini), progress (seluruh
+    import_progress), elapsed_seconds, images_per_second, stages, cancelled.
+    """
+    if stage_callback:
+        stage_callback('decode')
+    items = discover_sources(uploads_dir, legacy_dir)
+    done_sources = fetch_import_sources(include_failed=not retry_failed)
+    todo = [item for item in items if item['path'] not in done_sources]
+    if limit is not None:
+        todo = todo[:limit]
+
+    summary = {'total': len(items), 'pending': len(todo), 'processed': 0, 'counts': {},
+               'elapsed_seconds': 0.0, 'images_per_second': 0.0, 'cancelled': False}
+    batch = []
+    batch_hashes = {} # image_hash -> indeks entry 'imported'/'linked' di batch (belum ter-commit)
+
+    def _flush():
+        if not batch:
+            return
+        ids = save_import_batch(batch, user_id, time.time())
+        if ids is None:
+            raise RuntimeError("Gagal menyimpan batch impor ke database; impor dihentikan (bisa dilanjutkan).")
+        for entry in batch:
+            summary['counts'][entry['status']] = summary['counts'].get(entry['status'], 0) + 1
+        summary['processed'] += len(batch)
+        print(f"DEBUG: Impor: {summary['processed']}/{len(todo)} file disimpan ({summary['counts']}).")
+        batch.clear()
+        batch_hashes.clear()
+
+    # Kasus lama yang sudah punya template tidak perlu diekstrak ulang. File flat
+    # data_kasus dicocokkan berdasarkan nama: baris lama bisa menyimpan path dari
+    # lokasi instalasi lain (mis. C:\...\data_kasus\...).
+    legacy_rows = find_history_by_basenames(os.path.basename(item['path']) for item in todo
+                                            if item['source'] == 'data_kasus')
+    to_extract = []
+    link_targets = {}
+    for item in todo:
+        if item['source'] == 'data_kasus':
+            row = legacy_rows.get(os.path.basename(item['path']))
+        else:
+            row = find_history_by_path(item['path'])
+        if row is not None and row['jumlah_minutiae'] is not None:
+            batch.append({'source_path': item['path'], 'status': 'exists', 'history_id': row['id']})
+        else:
+            if row is not None:
+                link_targets[item['path']] = row['id']
+            to_extract.append(item)
+    _flush()
+
+    if not to_extract:
+        summary['progress'] = count_import_progress()
+        return summary
+
+    if stage_callback:
+        stage_callback('load')
+    get_extractor()
+    if stage_callback:
+        stage_callback('inference')
+
+    pipeline = ExtractionPipeline(decode_workers=workers, encode_workers=workers)
+    start = time.perf_counter()
+    try:
+        results = pipeline.run([item['path'] for item in to_extract],
+                               labels=[item['judul'] for item in to_extract], cancel_event=cancel_event)
+        # Hasil dicocokkan lewat path: item yang dibatalkan tidak menghasilkan apa pun
+        items_by_path = {item['path']: item for item in to_extract}
+        for i, (path, result) in enumerate(results, start=1):
+            batch.append(_import_entry(items_by_path[path], result, link_targets.get(path), batch, batch_hashes))
+            if len(batch) >= commit_every:
+                _flush()
+            if progress_callback:
+                progress_callback(i, len(to_extract), path)
+    except ExtractionCancelled:
+        summary['cancelled'] = True
+    _flush()
+
+    elapsed = time.perf_counter() - start
+    summary['elapsed_seconds'] = elapsed
+    summary['images_per_second'] = len(to_extract) / elapsed if elapsed > 0 and not summary['cancelled'] else 0.0
+    summary['stages'] = pipeline.get_stage_report()
+    summary['progress'] = count_import_progress()
+    print(f"DEBUG: Impor selesai: {summary['processed']}/{len(todo)} file, {summary['images_per_second']:.2f} gambar/detik.")
+    print(f"DEBUG: Tahap pipeline: {format_stage_report(summary['stages'])}")
+    return summary
+
+
+def _import_entry(item, result, link_id, batch, batch_hashes):
+    """Entry save_import_batch untuk satu hasil ekstraksi."""
+    path_mentah, path_ekstraksi, minutiae, image_hash = result
+    entry = {'source_path': item['path'], 'image_hash': image_hash}
+    if not (path_mentah and path_ekstraksi):
+        entry.update(status='failed', error="Ekstraksi gagal (lihat log)")
+        return entry
+    if link_id is not None:
+        # Kasus lama tanpa template: template + gambar content-addressed untuk baris yang sama
+        entry.update(status='linked', history_id=link_id, minutiae=minutiae,
+                     path_mentah=path_mentah, path_ekstraksi=path_ekstraksi)
+        batch_hashes.setdefault(image_hash, len(batch))
+        return entry
+    if image_hash in batch_hashes:
+        entry.update(status='duplicate', duplicate_of=batch_hashes[image_hash])
+        return entry
+    if get_image_refcount(image_hash) > 0:
+        entry.update(status='duplicate', history_id=find_stored_image(image_hash)['id'])
+        return entry
+    batch_hashes[image_hash] = len(batch)
+    entry.update(status='imported', record={
+        'judul_kasus': item['judul'],
+        'nomor_lp': None,
+        'tanggal_kejadian': None,
+        'path_mentah': path_mentah,
+        'path_ekstraksi': path_ekstraksi,
+        'minutiae': minutiae,
+        'image_hash': image_hash,
+        'timestamp': item['timestamp'],
+    })
+    return entry
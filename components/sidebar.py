@@ -17,6 +17,7 @@ class Sidebar(ctk.CTkFrame):
             "Home": ctk.CTkButton(self, text="Home", command=lambda: self.controller.show_frame("Home"), corner_radius=0, fg_color="transparent", hover_color="gray25", anchor="w", font=controller.FONT_UTAMA),
             "Cari Minutiae": ctk.CTkButton(self, text="Cari Minutiae", command=lambda: self.controller.show_frame("CariMinutiae"), corner_radius=0, fg_color="transparent", hover_color="gray25", anchor="w", font=controller.FONT_UTAMA),
             "Riwayat Pencarian": ctk.CTkButton(self, text="Riwayat Pencarian", command=lambda: self.controller.show_frame("RiwayatPencarian"), corner_radius=0, fg_color="transparent", hover_color="gray25", anchor="w", font=controller.FONT_UTAMA),
+            "Diagnostik": ctk.CTkButton(self, text="Diagnostik", command=lambda: self.controller.show_frame("Diagnostik"), corner_radius=0, fg_color="transparent", hover_color="gray25", anchor="w", font=controller.FONT_UTAMA),
         }
         
         row_counter = 2
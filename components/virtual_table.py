@@ -0,0 +1,170 @@
+import customtkinter as ctk
+from collections import OrderedDict
+
+# =========================================================================
+# --- TABEL VIRTUAL (HANYA BARIS YANG TERLIHAT) ---
+# =========================================================================
+# Widget baris dibuat sekali (pool seukuran jumlah baris yang muat di layar)
+# lalu diisi ulang (configure text) saat scroll, bukan dibuat/dihancurkan per
+# baris data. Data diambil per blok (LIMIT/OFFSET) lewat callback dan blok
+# terakhir yang dipakai disimpan di cache kecil.
+
+ROW_HEIGHT = 36         # Tinggi satu baris (piksel), dipakai untuk menghitung ukuran pool
+BLOCK_SIZE = 100        # Jumlah baris per query ke database
+MAX_CACHED_BLOCKS = 8   # Blok data yang disimpan di memori (LRU)
+
+
+class VirtualTable(ctk.CTkFrame):
+    """
+    columns: list of (judul_kolom, fungsi(row) -> teks).
+    fetch_count() -> jumlah total baris.
+    fetch_rows(offset, limit) -> list baris.
+    actions: list of (teks_tombol, fungsi(row)) untuk kolom aksi.
+    """
+
+    def __init__(self, parent, controller, columns, fetch_count, fetch_rows, actions=(), **kwargs):
+        super().__init__(parent, fg_color="gray15", **kwargs)
+        self.controller = controller
+        self.columns = columns
+        self.fetch_count = fetch_count
+        self.fetch_rows = fetch_rows
+        self.actions = actions
+
+        self.total = 0
+        self.first = 0          # Indeks baris data paling atas yang terlihat
+        self.row_widgets = []   # Pool: list of (frame, [label...], [button...])
+        self.blocks = OrderedDict()
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        n_cols = len(columns) + (1 if actions else 0)
+
+        # Header Table
+        header_frame = ctk.CTkFrame(self, fg_color="gray20")
+        header_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
+        header_frame.grid_columnconfigure(tuple(range(n_cols)), weight=1, uniform="kolom")
+        headers = [title for title, _getter in columns] + (["Aksi"] if actions else [])
+        for i, text in enumerate(headers):
+            ctk.CTkLabel(header_frame, text=text, font=controller.FONT_SUBJUDUL, padx=5, pady=10).grid(row=0, column=i, sticky="ew")
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew")
+        self.body.grid_columnconfigure(0, weight=1)
+        self.body.grid_propagate(False)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+
+        self.empty_label = ctk.CTkLabel(self.body, text="Belum ada data.", font=controller.FONT_UTAMA, text_color="gray")
+
+        self.body.bind("<Configure>", self._on_resize)
+        for widget in (self.body, self.scrollbar):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll_rows(-3))  # Linux
+            widget.bind("<Button-5>", lambda e: self.scroll_rows(3))
+
+    # --- Pool widget baris ---
+    def _create_row(self, index):
+        n_cols = len(self.columns) + (1 if self.actions else 0)
+        frame = ctk.CTkFrame(self.body, height=ROW_HEIGHT, fg_color="gray17" if index % 2 == 0 else "gray15")
+        frame.grid(row=index, column=0, sticky="ew", pady=(1, 0))
+        frame.grid_columnconfigure(tuple(range(n_cols)), weight=1, uniform="kolom")
+
+        labels = []
+        for col in range(len(self.columns)):
+            label = ctk.CTkLabel(frame, text="", font=self.controller.FONT_UTAMA)
+            label.grid(row=0, column=col, padx=5, pady=5, sticky="w" if col == 1 else "")
+            labels.append(label)
+
+        buttons = []
+        if self.actions:
+            action_frame = ctk.CTkFrame(frame, fg_color="transparent")
+            action_frame.grid(row=0, column=len(self.columns), padx=5, pady=5)
+            for text, _callback in self.actions:
+                button = ctk.CTkButton(action_frame, text=text, width=60, height=25)
+                button.pack(side="left", padx=2)
+                buttons.append(button)
+
+        for widget in [frame] + labels:
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        return frame, labels, buttons
+
+    def _visible_capacity(self):
+        height = self.body.winfo_height()
+        return max(1, height // (ROW_HEIGHT + 1)) if height > 1 else 15
+
+    def _on_resize(self, _event=None):
+        capacity = self._visible_capacity()
+        while len(self.row_widgets) < capacity:
+            self.row_widgets.append(self._create_row(len(self.row_widgets)))
+        self._render()
+
+    # --- Data ---
+    def _get_row(self, index):
+        block_index = index // BLOCK_SIZE
+        block = self.blocks.get(block_index)
+        if block is None:
+            block = self.fetch_rows(block_index * BLOCK_SIZE, BLOCK_SIZE)
+            self.blocks[block_index] = block
+            while len(self.blocks) > MAX_CACHED_BLOCKS:
+                self.blocks.popitem(last=False)
+        else:
+            self.blocks.move_to_end(block_index)
+        offset = index - block_index * BLOCK_SIZE
+        return block[offset] if offset < len(block) else None
+
+    def reload(self, keep_position=False):
+        """Menghitung ulang jumlah baris dan mengosongkan cache blok (data berubah)."""
+        self.blocks.clear()
+        self.total = self.fetch_count()
+        if not keep_position:
+            self.first = 0
+        self._render()
+
+    # --- Scroll ---
+    def _max_first(self):
+        return max(0, self.total - min(len(self.row_widgets), self._visible_capacity()))
+
+    def scroll_rows(self, delta):
+        self.first = min(max(0, self.first + delta), self._max_first())
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        visible = self._visible_capacity()
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * self.total)
+        elif args[0] == 'scroll':
+            step = visible if args[2] == 'pages' else 1
+            self.first += int(args[1]) * step
+        self.first = min(max(0, self.first), self._max_first())
+        self._render()
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _render(self):
+        visible = min(len(self.row_widgets), self._visible_capacity())
+        self.first = min(self.first, self._max_first())
+
+        if self.total == 0:
+            self.empty_label.place(relx=0.5, rely=0.1, anchor="n")
+        else:
+            self.empty_label.place_forget()
+
+        for i, (frame, labels, buttons) in enumerate(self.row_widgets):
+            row = self._get_row(self.first + i) if i < visible and self.first + i < self.total else None
+            if row is None:
+                frame.grid_remove()
+                continue
+            for label, (_title, getter) in zip(labels, self.columns):
+                label.configure(text=getter(row))
+            for button, (_text, callback) in zip(buttons, self.actions):
+                button.configure(command=lambda r=row, cb=callback: cb(r))
+            frame.grid()
+
+        if self.total > 0:
+            self.scrollbar.set(self.first / self.total, min(1.0, (self.first + visible) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -1,63 +1,16 @@
 import sqlite3
 import os
+import threading
 import hashlib
-from datetime import datetime
-from PIL import Image
-import numpy as np
-import pandas as pd # Tambahkan Pandas untuk menangani DataFrame minutiae
-
-# Impor Pustaka Utama
-import cv2 # Digunakan untuk visualisasi fallback OpenCV
-from fingerflow.extractor import Extractor 
-
-# =========================================================================
-# --- IMPORT VISUALISASI FINGERFLOW (PERBAIKAN TERAKHIR) ---
-# =========================================================================
-
-# Menggunakan satu variabel fungsi tunggal untuk visualisasi
-draw_minutiae_func = None
-
-# --- FUNGSI FALLBACK VISUALISASI MENGGUNAKAN OPENCV (SELALU DEFINISIKAN) ---
-def draw_minutiae_fallback_cv2(img_canvas, minutiae_df):
-    """Visualisasi minutiae manual menggunakan OpenCV."""
-    # Input sekarang adalah minutiae_df (Pandas DataFrame)
-    
-    if minutiae_df is not None and isinstance(minutiae_df, pd.DataFrame) and not minutiae_df.empty:
-        
-        # Iterasi melalui baris DataFrame
-        for index, minutia in minutiae_df.iterrows():
-            # Ambil koordinat X dan Y dari kolom DataFrame
-            try:
-                # Kolom X dan Y dari DataFrame harus diubah ke integer untuk OpenCV
-                x, y = int(round(minutia["x"])), int(round(minutia["y"])) 
-            except (KeyError, ValueError, IndexError):
-                # Abaikan baris data yang rusak atau yang tidak memiliki kolom x/y
-                continue
-            
-            # Gambar lingkaran merah (BGR: Merah = 0, 0, 255)
-            # Gambar, Center (x, y), Radius, Warna (BGR: Merah), Ketebalan (-1 = Fill)
-            cv2.circle(img_canvas, (x, y), 5, (255, 0, 0), -1) 
-            
-    return img_canvas 
-
-
-# --- Mencoba Impor Fungsi Otomatis dari Fingerflow ---
-try:
-    from fingerflow.io import draw_minutiae as draw_minutiae_func
-except ImportError:
-    try:
-        from fingerflow.extractor import draw_minutiae as draw_minutiae_func
-    except ImportError:
-        try:
-            from fingerflow import draw_minutiae as draw_minutiae_func
-        except ImportError:
-            pass # Lanjut ke penugasan fallback
-            
-if draw_minutiae_func is None:
-    print("Peringatan: Gagal mengimpor draw_minutiae. Menggunakan visualisasi manual (OpenCV).")
-    # Tetapkan fungsi fallback manual sebagai visualizer
-    draw_minutiae_func = draw_minutiae_fallback_cv2
+import ntpath
+from model_manager import MODEL_DIR
+from metrics import timed
 
+# CATATAN: modul ini sengaja tidak mengimpor stack ML (NumPy, OpenCV, PIL,
+# TensorFlow) di level modul agar halaman login tampil secepat mungkin.
+# Ekstraksi ada di extraction.py; minutiae_store/triplet_index (NumPy)
+# diimpor di dalam fungsi yang membutuhkannya. Fungsi query/tulis utama
+# dicatat waktunya dengan @timed (metrics.py, hanya pustaka standar).
 
 # =========================================================================
 # --- KONFIGURASI PATHS ---
@@ -66,14 +19,14 @@ if draw_minutiae_func is None:
 # Tentukan direktori aplikasi saat ini
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) 
 DB_NAME = 'minutiae_app.db'
-DB_PATH = os.path.join(BASE_DIR, DB_NAME)
+# Lokasi database & data bisa diganti lewat environment (misal server lab / CLI headless)
+DB_PATH = os.environ.get('FIND_MINUTIAE_DB') or os.path.join(BASE_DIR, DB_NAME)
 
 # Folder untuk menyimpan gambar mentah dan hasil ekstraksi
-DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), 'data_kasus')
+DATA_DIR = os.environ.get('FIND_MINUTIAE_DATA_DIR') or os.path.join(os.path.dirname(BASE_DIR), 'data_kasus')
 os.makedirs(DATA_DIR, exist_ok=True) 
 
-# Folder untuk model Fingerflow (.h5)
-MODEL_DIR = os.path.join(BASE_DIR, 'models') 
+# Folder untuk model Fingerflow (.h5), lihat model_manager.py
 os.makedirs(MODEL_DIR, exist_ok=True) 
 
 
@@ -81,12 +34,45 @@ os.makedirs(MODEL_DIR, exist_ok=True)
 # --- MANAJEMEN DATABASE (SQLite) ---
 # =========================================================================
 
+# Koneksi dipakai ulang per thread (sqlite3.Connection tidak boleh dipakai lintas thread).
+# Key = path database, sehingga DB_PATH yang diganti (misal benchmark) membuka koneksi baru.
+_local = threading.local()
+
+# PRAGMA per koneksi: WAL (pembaca tidak diblokir penulis), fsync lebih jarang
+# tetapi tetap aman untuk WAL, cache halaman ~32 MB dan memory-mapped I/O.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -32000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+STATEMENT_CACHE_SIZE = 256 # Prepared statement yang disimpan per koneksi
+
 def get_db_connection():
-    """Membuat koneksi ke database SQLite."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row # Agar data bisa diakses seperti dictionary
+    """
+    Mengembalikan koneksi SQLite milik thread ini (dibuat sekali, lalu dipakai ulang).
+    Pemanggil TIDAK menutup koneksi; cukup commit/rollback transaksinya.
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(DB_PATH)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row # Agar data bisa diakses seperti dictionary
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        connections[DB_PATH] = conn
     return conn
 
+def close_db_connections():
+    """Menutup semua koneksi milik thread ini (misal sebelum thread worker selesai)."""
+    connections = getattr(_local, 'connections', None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+
 def init_db():
     """Menginisialisasi tabel database (hanya dipanggil sekali)."""
     conn = get_db_connection()
@@ -115,8 +101,228 @@ def init_db():
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
     ''')
+    
+    # Change tracking: versi data riwayat + agregat jumlah kasus, dijaga trigger
+    # sehingga SEMUA penulis tabel history (UI, batch, import) ikut memperbarui.
+    # Halaman membandingkan versi untuk melewati refresh jika tidak ada perubahan.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS history_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            total INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS history_user_counts (
+            user_id INTEGER PRIMARY KEY,
+            jumlah INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO history_stats (id, version, total) SELECT 1, 0, COUNT(*) FROM history")
+    if cursor.rowcount == 1:
+        # Database lama (atau baru): bangun agregat per user dari data yang ada
+        cursor.execute("DELETE FROM history_user_counts")
+        cursor.execute('''
+            INSERT INTO history_user_counts (user_id, jumlah)
+            SELECT user_id, COUNT(*) FROM history WHERE user_id IS NOT NULL GROUP BY user_id
+        ''')
+    cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS trg_history_insert AFTER INSERT ON history BEGIN
+            UPDATE history_stats SET version = version + 1, total = total + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_insert_user AFTER INSERT ON history
+        WHEN NEW.user_id IS NOT NULL BEGIN
+            INSERT OR IGNORE INTO history_user_counts (user_id, jumlah) VALUES (NEW.user_id, 0);
+            UPDATE history_user_counts SET jumlah = jumlah + 1 WHERE user_id = NEW.user_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_update AFTER UPDATE ON history BEGIN
+            UPDATE history_stats SET version = version + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_update_user AFTER UPDATE OF user_id ON history
+        WHEN OLD.user_id IS NOT NEW.user_id BEGIN
+            UPDATE history_user_counts SET jumlah = jumlah - 1 WHERE user_id = OLD.user_id;
+            INSERT OR IGNORE INTO history_user_counts (user_id, jumlah) VALUES (NEW.user_id, 0);
+            UPDATE history_user_counts SET jumlah = jumlah + 1 WHERE user_id = NEW.user_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_delete AFTER DELETE ON history BEGIN
+            UPDATE history_stats SET version = version + 1, total = total - 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_delete_user AFTER DELETE ON history
+        WHEN OLD.user_id IS NOT NULL BEGIN
+            UPDATE history_user_counts SET jumlah = jumlah - 1 WHERE user_id = OLD.user_id;
+        END;
+    ''')
+    
+    # Penyimpanan gambar content-addressed: hash gambar per kasus + jumlah referensi
+    _init_image_store(cursor)
+    
+    # Index pencarian teks (FTS5) atas judul, nomor LP, tanggal kejadian dan username
+    _init_search_index(cursor)
+    
+    # Cache hasil ekstraksi per (hash gambar, versi model, parameter), lihat result_cache.py
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            cache_key TEXT PRIMARY KEY,
+            image_hash TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            jumlah INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            overlay_path TEXT,
+            size_bytes INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used ON extraction_cache (last_used)')
+    
+    # Tabel Template Minutiae (x/y/angle/score/class kolumnar per kasus, lihat minutiae_store.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS minutiae_template (
+            history_id INTEGER PRIMARY KEY,
+            jumlah INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            FOREIGN KEY (history_id) REFERENCES history(id)
+        )
+    ''')
+    
+    # Inverted index hash triplet minutiae untuk pre-filter kandidat (lihat triplet_index.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS minutiae_triplet (
+            hash INTEGER NOT NULL,
+            history_id INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_triplet_hash ON minutiae_triplet (hash, history_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_triplet_history ON minutiae_triplet (history_id)')
+    
+    # Index untuk akses riwayat: filter per user dan urutan timestamp terbaru
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_user_timestamp ON history (user_id, timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp)')
+    
+    # Pemeriksaan integritas penyimpanan (store_scanner.py): lookup file -> baris history
+    # dan checkpoint pemindaian agar bisa dilanjutkan setelah aplikasi ditutup
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_path_mentah ON history (path_mentah)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_path_ekstraksi ON history (path_ekstraksi)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scan_checkpoint (
+            name TEXT PRIMARY KEY,
+            phase TEXT NOT NULL,
+            position TEXT,
+            stats TEXT,
+            updated REAL NOT NULL
+        )
+    ''')
+    
+    # Progres impor massal arsip lama per file sumber (bulk_import.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_progress (
+            source_path TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            history_id INTEGER,
+            image_hash TEXT,
+            error TEXT,
+            updated REAL NOT NULL
+        )
+    ''')
     conn.commit()
-    conn.close()
+    
+    # Database lama: template sudah ada tetapi index triplet belum pernah dibangun
+    cursor.execute("SELECT EXISTS(SELECT 1 FROM minutiae_template), EXISTS(SELECT 1 FROM minutiae_triplet)")
+    has_templates, has_index = cursor.fetchone()
+    if has_templates and not has_index:
+        rebuild_triplet_index()
+
+
+def _init_image_store(cursor):
+    """
+    Kolom history.image_hash (hash konten gambar grayscale, lihat image_store.py)
+    dan tabel image_store berisi jumlah baris history yang memakai setiap gambar.
+    refcount dijaga trigger; baris image_store hilang saat refcount mencapai 0.
+    """
+    cursor.execute("PRAGMA table_info(history)")
+    if 'image_hash' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE history ADD COLUMN image_hash TEXT")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_image_hash ON history (image_hash)')
+
+    cursor.execute("SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'image_store')")
+    is_new = not cursor.fetchone()[0]
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS image_store (
+            hash TEXT PRIMARY KEY,
+            refcount INTEGER NOT NULL
+        )
+    ''')
+    if is_new:
+        cursor.execute('''
+            INSERT INTO image_store (hash, refcount)
+            SELECT image_hash, COUNT(*) FROM history WHERE image_hash IS NOT NULL GROUP BY image_hash
+        ''')
+    cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS trg_history_image_insert AFTER INSERT ON history
+        WHEN NEW.image_hash IS NOT NULL BEGIN
+            INSERT OR IGNORE INTO image_store (hash, refcount) VALUES (NEW.image_hash, 0);
+            UPDATE image_store SET refcount = refcount + 1 WHERE hash = NEW.image_hash;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_image_update AFTER UPDATE OF image_hash ON history
+        WHEN OLD.image_hash IS NOT NEW.image_hash BEGIN
+            UPDATE image_store SET refcount = refcount - 1 WHERE hash = OLD.image_hash;
+            DELETE FROM image_store WHERE hash = OLD.image_hash AND refcount <= 0;
+            INSERT OR IGNORE INTO image_store (hash, refcount) SELECT NEW.image_hash, 0 WHERE NEW.image_hash IS NOT NULL;
+            UPDATE image_store SET refcount = refcount + 1 WHERE hash = NEW.image_hash;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_image_delete AFTER DELETE ON history
+        WHEN OLD.image_hash IS NOT NULL BEGIN
+            UPDATE image_store SET refcount = refcount - 1 WHERE hash = OLD.image_hash;
+            DELETE FROM image_store WHERE hash = OLD.image_hash AND refcount <= 0;
+        END;
+    ''')
+
+def _init_search_index(cursor):
+    """
+    Membuat tabel FTS5 history_fts (rowid = history.id) beserta trigger
+    sinkronisasinya. Jika SQLite tidak mendukung FTS5, pencarian memakai LIKE.
+    """
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+                judul_kasus, nomor_lp, tanggal_kejadian, username,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"Peringatan: FTS5 tidak tersedia, pencarian memakai LIKE. {e}")
+        return
+
+    cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS trg_history_fts_insert AFTER INSERT ON history BEGIN
+            INSERT INTO history_fts (rowid, judul_kasus, nomor_lp, tanggal_kejadian, username)
+            VALUES (NEW.id, NEW.judul_kasus, NEW.nomor_lp, NEW.tanggal_kejadian,
+                    (SELECT username FROM users WHERE id = NEW.user_id));
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_fts_update AFTER UPDATE ON history BEGIN
+            DELETE FROM history_fts WHERE rowid = OLD.id;
+            INSERT INTO history_fts (rowid, judul_kasus, nomor_lp, tanggal_kejadian, username)
+            VALUES (NEW.id, NEW.judul_kasus, NEW.nomor_lp, NEW.tanggal_kejadian,
+                    (SELECT username FROM users WHERE id = NEW.user_id));
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_history_fts_delete AFTER DELETE ON history BEGIN
+            DELETE FROM history_fts WHERE rowid = OLD.id;
+        END;
+    ''')
+
+    # Database lama: isi index dari data yang sudah ada
+    cursor.execute("SELECT (SELECT COUNT(*) FROM history_fts) = (SELECT COUNT(*) FROM history)")
+    if not cursor.fetchone()[0]:
+        cursor.execute("DELETE FROM history_fts")
+        cursor.execute('''
+            INSERT INTO history_fts (rowid, judul_kasus, nomor_lp, tanggal_kejadian, username)
+            SELECT h.id, h.judul_kasus, h.nomor_lp, h.tanggal_kejadian, u.username
+            FROM history h LEFT JOIN users u ON h.user_id = u.id
+        ''')
+
+def _has_search_index(cursor):
+    cursor.execute("SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'history_fts')")
+    return bool(cursor.fetchone()[0])
 
 
 # =========================================================================
@@ -135,11 +341,10 @@ def register_user(username, password):
     try:
         cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password_hashed))
         conn.commit()
-        conn.close()
         return True
     except sqlite3.IntegrityError:
         # Username sudah ada
-        conn.close()
+        conn.rollback()
         return False
 
 def check_user_credentials(username, password):
@@ -150,130 +355,56 @@ def check_user_credentials(username, password):
 
     cursor.execute("SELECT id FROM users WHERE username = ? AND password_hash = ?", (username, password_hashed))
     user = cursor.fetchone()
-    conn.close()
 
     if user:
         return user[0] # Mengembalikan INTEGER user_id
     return None
 
+def get_user_id(username):
+    """user_id untuk username (tanpa cek password, dipakai CLI headless), atau None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+    user = cursor.fetchone()
+    return user[0] if user else None
+
 
 # =========================================================================
-# --- LOGIKA EKSTRAKSI MINUTIAE (CORE LOGIC) ---
+# --- MANAJEMEN RIWAYAT (HISTORY) ---
 # =========================================================================
 
-def run_minutiae_extraction(input_filepath, case_judul):
+def get_history_version():
     """
-    Memproses gambar sidik jari (SJ), mengekstrak minutiae menggunakan Fingerflow,
-    dan menyimpan gambar mentah/hasil ekstraksi ke folder DATA_DIR.
-    
-    Mengembalikan tuple (path_mentah_tersimpan, path_ekstraksi_tersimpan).
+    Versi data riwayat; naik setiap ada INSERT/UPDATE/DELETE pada tabel history
+    (dijaga trigger, lihat init_db). Halaman menyimpan versi terakhir yang
+    ditampilkan dan melewati query ulang jika versinya sama.
     """
-    
-    # Format judul kasus agar aman digunakan sebagai nama file
-    sanitized_judul = "".join(c for c in case_judul if c.isalnum() or c in (' ', '_')).rstrip()[:30].replace(' ', '_')
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_filename = f"{timestamp}_{sanitized_judul}"
-    
-    path_mentah = os.path.join(DATA_DIR, f"{base_filename}_mentah.png")
-    path_ekstraksi = os.path.join(DATA_DIR, f"{base_filename}_ekstraksi.png")
-
-    # 1. Buka Gambar & Konversi ke format yang sesuai
-    try:
-        # Buka gambar dan konversi ke Grayscale (L)
-        img_pil = Image.open(input_filepath).convert("L") 
-        img_pil.save(path_mentah, 'PNG') # Simpan yang grayscale untuk arsip
-        
-        # Konversi ke NumPy Array (1 channel, 0-255)
-        img_raw_single_channel = np.array(img_pil)
-        
-        # PENTING: Membuat gambar 3-Channel (RGB) untuk Fingerflow Extractor dan Visualisasi
-        img_raw_3channel = np.stack((img_raw_single_channel,)*3, axis=-1) 
-        
-    except Exception as e:
-        print(f"ERROR: Gagal memuat atau menyimpan gambar mentah: {e}")
-        return None, None
-    
-    # 2. EKSTRAKSI MINUTIAE (Fingerflow)
-    try:
-        # Tentukan path lengkap ke setiap model menggunakan folder 'models'
-        coarse_path = os.path.join(MODEL_DIR, 'CoarseNet.h5')
-        fine_path = os.path.join(MODEL_DIR, 'FineNet.h5')
-        classify_path = os.path.join(MODEL_DIR, 'ClassifyNet_6_classes.h5')
-        core_path = os.path.join(MODEL_DIR, 'CoreNet.weights')
-        
-        # Pengecekan Eksistensi File Model
-        if not all(os.path.exists(p) for p in [coarse_path, fine_path, classify_path, core_path]):
-             raise FileNotFoundError(f"Satu atau lebih file model Fingerflow (.h5/weights) tidak ditemukan di: {MODEL_DIR}")
-
-        # Inisialisasi Extractor (Model Loading Terjadi di Sini)
-        extractor = Extractor(
-            coarse_net_path=coarse_path,
-            fine_net_path=fine_path,
-            classify_net_path=classify_path,
-            core_net_path=core_path
-        )
-        
-        # Ekstraksi minutiae
-        output_data = extractor.extract_minutiae(img_raw_3channel) # Output adalah Dictionary
-        
-        # AMBIL DATAFRAME MINUTIAE DARI DICTIONARY HASIL EKSTRAKSI
-        minutiae_df = output_data.get("minutiae")
-        
-        # Hitung jumlah minutiae yang terdeteksi
-        num_minutiae = len(minutiae_df) if minutiae_df is not None and not minutiae_df.empty else 0
-        print(f"DEBUG: Jumlah minutiae yang terdeteksi: {num_minutiae}")
-        
-        # 3. Tampilkan Hasil Ekstraksi (Visualisasi)
-        
-        # Cek apakah ada minutiae yang terdeteksi
-        if num_minutiae == 0:
-            print("Peringatan: Tidak ada minutiae yang terdeteksi. Menyimpan gambar mentah 3-channel.")
-            img_hasil_pil = Image.fromarray(img_raw_3channel)
-        else:
-            # Gunakan salinan gambar 3-channel sebagai kanvas
-            img_canvas = img_raw_3channel.copy() 
-            
-            # Panggil draw_minutiae_func (fungsi yang berhasil diimpor atau fallback OpenCV)
-            # Meneruskan DataFrame minutiae_df ke fungsi visualisasi
-            img_with_minutiae_np = draw_minutiae_func(img_canvas, minutiae_df)
-            
-            # Konversi hasil NumPy array ke PIL Image untuk disimpan
-            img_hasil_pil = Image.fromarray(img_with_minutiae_np)
-        
-        # Simpan gambar hasil ekstraksi
-        img_hasil_pil.save(path_ekstraksi, 'PNG') 
-        
-    except FileNotFoundError as fnf_e:
-        print(f"ERROR: Model tidak ditemukan. Pastikan 4 file model ada di folder 'models'. {fnf_e}")
-        return None, None
-    except Exception as e:
-        print(f"ERROR: Gagal ekstraksi minutiae (Fingerflow). Error: {e}")
-        # Hapus file abu-abu jika ada untuk menghindari kebingungan
-        if os.path.exists(path_ekstraksi):
-            os.remove(path_ekstraksi) 
-        return None, None
-
-    # Mengembalikan path tempat file disimpan
-    return path_mentah, path_ekstraksi
-
-
-# =========================================================================
-# --- MANAJEMEN RIWAYAT (HISTORY) ---
-# =========================================================================
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM history_stats WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
 
-def fetch_history_counts():
-    """Mengambil jumlah total kasus (history)."""
+@timed('db.fetch_history_counts')
+def fetch_history_counts(user_id=None):
+    """
+    Mengambil jumlah total kasus (umum) dan jumlah kasus milik user_id (lokal)
+    dari agregat yang dijaga trigger, tanpa COUNT atas seluruh tabel history.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
     # Hitungan total kasus
-    cursor.execute('SELECT COUNT(id) FROM history')
-    count_umum = cursor.fetchone()[0]
+    cursor.execute("SELECT total FROM history_stats WHERE id = 1")
+    row = cursor.fetchone()
+    count_umum = row[0] if row else 0
     
-    # Placeholder untuk 'lokal' (jika tidak ada filter yang digunakan)
-    count_lokal = 0 
-    
-    conn.close()
+    # Hitungan kasus milik user yang sedang login
+    count_lokal = 0
+    if user_id is not None:
+        cursor.execute("SELECT jumlah FROM history_user_counts WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+        count_lokal = row[0] if row else 0
     
     return count_umum, count_lokal
 
@@ -306,29 +437,255 @@ def get_history_data(user_id=None):
     except Exception as e:
         print(f"Error executing get_history_data: {e}")
         return []
-    finally:
-        conn.close()
 
-def save_history(judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id):
-    """Menyimpan riwayat ke database dan mengembalikan ID baris yang baru dibuat."""
+@timed('db.count_history')
+def count_history(user_id=None):
+    """Jumlah baris riwayat (difilter user_id jika diberikan), untuk tabel virtual."""
+    umum, lokal = fetch_history_counts(user_id)
+    return lokal if user_id is not None else umum
+
+@timed('db.get_history_page')
+def get_history_page(user_id=None, limit=100, offset=0):
+    """
+    Satu halaman data riwayat (kolom sama dengan get_history_data) dengan
+    LIMIT/OFFSET, terurut timestamp terbaru. id ikut diurutkan agar urutan
+    stabil untuk timestamp yang sama (tidak ada baris ganda/hilang antar halaman).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    sql_query = '''
+        SELECT 
+            h.id, h.judul_kasus, h.nomor_lp, h.tanggal_kejadian, 
+            h.timestamp, u.username
+        FROM history h
+        JOIN users u ON h.user_id = u.id
+    '''
+    params = []
+    if user_id is not None:
+        sql_query += ' WHERE h.user_id = ?'
+        params.append(user_id)
+    sql_query += ' ORDER BY h.timestamp DESC, h.id DESC LIMIT ? OFFSET ?'
+    params.extend([limit, offset])
+
+    try:
+        cursor.execute(sql_query, params)
+        return cursor.fetchall()
+    except Exception as e:
+        print(f"Error executing get_history_page: {e}")
+        return []
+
+def _fts_query(text):
+    """
+    Mengubah input bebas pengguna menjadi query FTS5 yang aman: setiap kata
+    dikutip (karakter khusus FTS tidak diinterpretasi) dan dicocokkan sebagai
+    prefix, semua kata harus ada (AND). Mengembalikan None jika tidak ada kata.
+    """
+    words = "".join(c if c.isalnum() else " " for c in text).split()
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+# Di atas jumlah kecocokan ini hasil diurutkan dari kasus yang terakhir diinput
+# (rowid), bukan bm25: menghitung skor relevansi / mengurutkan puluhan ribu
+# baris butuh ratusan ms, sedangkan urutan rowid dibaca langsung dari index
+# FTS dan berhenti setelah LIMIT. Untuk query sependek itu (misal 'ka')
+# perbedaan skor relevansi juga tidak bermakna.
+RANKED_SEARCH_LIMIT = 5000
+
+def _search_clause(cursor, query=None, user_id=None, date_from=None, date_to=None, purpose='rows'):
+    """
+    Menyusun FROM/WHERE/ORDER BY pencarian riwayat. Mengembalikan
+    (from_sql, where_sql, order_sql, params). Tanggal (YYYY-MM-DD) memfilter
+    h.timestamp; date_to inklusif.
+    purpose: 'rows' (kolom lengkap + urutan), 'count' atau 'facets' (hanya
+    JOIN yang dibutuhkan, tanpa urutan).
+    """
+    conditions = []
+    params = []
+    order_sql = "h.timestamp DESC, h.id DESC"
+    joins = ["users u ON h.user_id = u.id"] if purpose == 'rows' else []
+
+    fts_query = _fts_query(query) if query else None
+    if fts_query and _has_search_index(cursor):
+        conditions.append("history_fts MATCH ?")
+        params.append(fts_query)
+        filtered = user_id is not None or date_from or date_to
+        if purpose == 'count' and not filtered:
+            # Tanpa filter lain cukup menghitung di index FTS saja
+            from_sql = "history_fts f"
+        else:
+            # CROSS JOIN: FTS selalu loop luar. Tanpa ini planner bisa memilih scan
+            # history (via index user/timestamp) dan menjalankan MATCH per baris (detik).
+            from_sql = " JOIN ".join(["history_fts f CROSS JOIN history h ON h.id = f.rowid"] + joins)
+        if purpose == 'rows':
+            # Urutan relevansi (bm25) lalu terbaru; hasil sangat banyak: urutan input terbaru
+            cursor.execute("SELECT COUNT(*) FROM history_fts WHERE history_fts MATCH ?", (fts_query,))
+            if cursor.fetchone()[0] <= RANKED_SEARCH_LIMIT:
+                order_sql = "f.rank, h.timestamp DESC, h.id DESC"
+            else:
+                order_sql = "f.rowid DESC"
+    else:
+        if query and query.strip():
+            # Fallback tanpa FTS5: LIKE per kata di semua kolom
+            joins = ["users u ON h.user_id = u.id"]
+            for word in query.split():
+                conditions.append("(h.judul_kasus LIKE ? OR h.nomor_lp LIKE ? OR h.tanggal_kejadian LIKE ? OR u.username LIKE ?)")
+                params.extend([f"%{word}%"] * 4)
+        from_sql = " JOIN ".join(["history h"] + joins)
+
+    if user_id is not None:
+        conditions.append("h.user_id = ?")
+        params.append(user_id)
+    if date_from:
+        conditions.append("h.timestamp >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("h.timestamp < date(?, '+1 day')")
+        params.append(date_to)
+
+    where_sql = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+    return from_sql, where_sql, order_sql, params
+
+@timed('db.search_history')
+def search_history(query=None, user_id=None, date_from=None, date_to=None, limit=100, offset=0):
+    """
+    Pencarian riwayat (judul kasus, nomor LP, tanggal kejadian, username) dengan
+    prefix matching, terurut relevansi lalu timestamp, satu halaman LIMIT/OFFSET.
+    Kolom hasil sama dengan get_history_page.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    from_sql, where_sql, order_sql, params = _search_clause(cursor, query, user_id, date_from, date_to)
+    try:
+        cursor.execute(f'''
+            SELECT 
+                h.id, h.judul_kasus, h.nomor_lp, h.tanggal_kejadian, 
+                h.timestamp, u.username
+            FROM {from_sql}{where_sql}
+            ORDER BY {order_sql}
+            LIMIT ? OFFSET ?
+        ''', params + [limit, offset])
+        return cursor.fetchall()
+    except Exception as e:
+        print(f"Error executing search_history: {e}")
+        return []
+
+@timed('db.count_search_history')
+def count_search_history(query=None, user_id=None, date_from=None, date_to=None):
+    """Jumlah total hasil search_history (untuk tabel virtual/paging)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    from_sql, where_sql, _order_sql, params = _search_clause(cursor, query, user_id, date_from, date_to, purpose='count')
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {from_sql}{where_sql}", params)
+        return cursor.fetchone()[0]
+    except Exception as e:
+        print(f"Error executing count_search_history: {e}")
+        return 0
+
+@timed('db.history_date_facets')
+def history_date_facets(query=None, user_id=None, limit=24):
+    """
+    Facet tanggal: list (bulan 'YYYY-MM', jumlah) hasil pencarian per bulan
+    timestamp penyimpanan, bulan terbaru lebih dulu.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    from_sql, where_sql, _order_sql, params = _search_clause(cursor, query, user_id, purpose='facets')
+    try:
+        cursor.execute(f'''
+            SELECT substr(h.timestamp, 1, 7) AS bulan, COUNT(*) AS jumlah
+            FROM {from_sql}{where_sql}
+            GROUP BY bulan
+            ORDER BY bulan DESC
+            LIMIT ?
+        ''', params + [limit])
+        return [(row['bulan'], row['jumlah']) for row in cursor.fetchall() if row['bulan']]
+    except Exception as e:
+        print(f"Error executing history_date_facets: {e}")
+        return []
+
+def _insert_minutiae(cursor, history_id, minutiae):
+    """Menulis template minutiae satu kasus (dalam transaksi milik pemanggil)."""
+    from minutiae_store import pack_minutiae
+    from triplet_index import template_hashes
+    jumlah, blob = pack_minutiae(minutiae)
+    cursor.execute('''
+        INSERT OR REPLACE INTO minutiae_template (history_id, jumlah, data)
+        VALUES (?, ?, ?)
+    ''', (history_id, jumlah, sqlite3.Binary(blob)))
+    
+    # Perbarui inverted index triplet secara inkremental
+    cursor.execute("DELETE FROM minutiae_triplet WHERE history_id = ?", (history_id,))
+    cursor.executemany(
+        "INSERT INTO minutiae_triplet (hash, history_id) VALUES (?, ?)",
+        ((int(h), history_id) for h in template_hashes(minutiae))
+    )
+
+@timed('db.save_history')
+def save_history(judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id, minutiae=None, image_hash=None):
+    """
+    Menyimpan riwayat ke database dan mengembalikan ID baris yang baru dibuat.
+    Jika minutiae (dict kolom dari extraction.run_minutiae_extraction) diberikan, template
+    disimpan dalam transaksi yang sama. image_hash (hash konten gambar) menambah
+    referensi ke gambar tersimpan sehingga tidak terhapus selama masih dipakai.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute('''
-            INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id))
+            INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id, image_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id, image_hash))
         
         last_id = cursor.lastrowid
+        if minutiae is not None:
+            _insert_minutiae(cursor, last_id, minutiae)
         conn.commit()
-        conn.close()
         return last_id
         
     except Exception as e:
         print(f"Error saving history: {e}")
-        conn.close()
+        conn.rollback()
         return None
 
+@timed('db.save_history_batch')
+def save_history_batch(records, user_id):
+    """
+    Menyimpan banyak riwayat sekaligus dalam SATU transaksi (dipakai mode batch).
+    records: list of dict dengan key judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi
+    (dan opsional minutiae, image_hash).
+    Mengembalikan list ID baris baru (urut sesuai records), atau [] jika gagal (rollback).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        new_ids = [_insert_history_record(cursor, rec, user_id) for rec in records]
+        conn.commit()
+        return new_ids
+    except Exception as e:
+        print(f"Error saving history batch: {e}")
+        conn.rollback()
+        return []
+
+def _insert_history_record(cursor, rec, user_id):
+    """
+    Satu baris history (+ template minutiae jika ada) dalam transaksi milik pemanggil.
+    rec['timestamp'] opsional ('YYYY-MM-DD HH:MM:SS', misal waktu kasus lama yang diimpor).
+    Mengembalikan ID baris baru.
+    """
+    cursor.execute('''
+        INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id, image_hash, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    ''', (rec['judul_kasus'], rec.get('nomor_lp'), rec.get('tanggal_kejadian'), rec['path_mentah'], rec['path_ekstraksi'],
+          user_id, rec.get('image_hash'), rec.get('timestamp')))
+    history_id = cursor.lastrowid
+    if rec.get('minutiae') is not None:
+        _insert_minutiae(cursor, history_id, rec['minutiae'])
+    return history_id
+
+@timed('db.fetch_history_by_id')
 def fetch_history_by_id(history_id):
     """Mengambil detail satu entri riwayat berdasarkan ID."""
     conn = get_db_connection()
@@ -342,9 +699,107 @@ def fetch_history_by_id(history_id):
         WHERE h.id = ?
     ''', (history_id,))
     data = cursor.fetchone()
-    conn.close()
     return data
 
+@timed('db.load_minutiae')
+def load_minutiae(history_id):
+    """
+    Mengambil template minutiae tersimpan satu kasus sebagai dict kolom NumPy
+    (x, y, angle, score, class). Mengembalikan None jika kasus belum punya template.
+    """
+    from minutiae_store import unpack_minutiae
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT jumlah, data FROM minutiae_template WHERE history_id = ?", (history_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return unpack_minutiae(row['jumlah'], bytes(row['data']))
+
+def fetch_minutiae_count(history_id):
+    """Jumlah minutiae tersimpan untuk satu kasus (None jika belum ada template)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT jumlah FROM minutiae_template WHERE history_id = ?", (history_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def iter_minutiae_templates(batch_size=1000):
+    """
+    Generator (history_id, minutiae) untuk seluruh template tersimpan, dibaca per
+    batch agar memori tetap kecil (dipakai untuk matching).
+    """
+    from minutiae_store import unpack_minutiae
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT history_id, jumlah, data FROM minutiae_template ORDER BY history_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row['history_id'], unpack_minutiae(row['jumlah'], bytes(row['data']))
+    finally:
+        cursor.close()
+
+@timed('db.query_triplet_candidates')
+def query_triplet_candidates(probe_keys, limit=300):
+    """
+    Pre-filter kandidat: mengembalikan list (history_id, jumlah_triplet_cocok)
+    terurut menurun untuk hash triplet probe (lihat triplet_index.probe_hashes).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Koneksi dipakai bersama oleh thread ini: perubahan tabel sementara dibungkus
+    # SAVEPOINT agar transaksi pemanggil yang sedang terbuka tidak ikut di-commit
+    # (RELEASE hanya meng-commit jika SAVEPOINT ini yang memulai transaksi).
+    cursor.execute("SAVEPOINT probe_keys")
+    try:
+        # Tabel sementara menghindari batas jumlah parameter SQLite pada klausa IN.
+        # CROSS JOIN memaksa probe_keys menjadi loop luar (lookup lewat idx_triplet_hash),
+        # bukan scan seluruh minutiae_triplet.
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS probe_keys (hash INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM probe_keys")
+        cursor.executemany("INSERT OR IGNORE INTO probe_keys (hash) VALUES (?)", ((int(k),) for k in probe_keys))
+        cursor.execute('''
+            SELECT t.history_id, COUNT(*) AS votes
+            FROM probe_keys p
+            CROSS JOIN minutiae_triplet t ON t.hash = p.hash
+            GROUP BY t.history_id
+            ORDER BY votes DESC
+            LIMIT ?
+        ''', (limit,))
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+    except Exception:
+        cursor.execute("ROLLBACK TO probe_keys")
+        raise
+    finally:
+        cursor.execute("RELEASE probe_keys")
+
+def rebuild_triplet_index():
+    """Membangun ulang seluruh index triplet dari template tersimpan (misal untuk database lama)."""
+    from minutiae_store import unpack_minutiae
+    from triplet_index import template_hashes
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM minutiae_triplet")
+        cursor.execute("SELECT history_id, jumlah, data FROM minutiae_template")
+        rows = cursor.fetchall()
+        for row in rows:
+            minutiae = unpack_minutiae(row['jumlah'], bytes(row['data']))
+            cursor.executemany(
+                "INSERT INTO minutiae_triplet (hash, history_id) VALUES (?, ?)",
+                ((int(h), row['history_id']) for h in template_hashes(minutiae))
+            )
+        conn.commit()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+
+@timed('db.update_history_data')
 def update_history_data(history_id, judul, nomor_lp, tanggal):
     """Mengupdate data kasus (judul, LP, tanggal) di database."""
     conn = get_db_connection()
@@ -356,41 +811,368 @@ def update_history_data(history_id, judul, nomor_lp, tanggal):
             WHERE id = ?
         ''', (judul, nomor_lp, tanggal, history_id))
         conn.commit()
-        conn.close()
         return True
     except Exception as e:
         print(f"Error updating history ID {history_id}: {e}")
-        conn.close()
+        conn.rollback()
         return False
 
+@timed('db.delete_history')
 def delete_history(history_id):
     """Menghapus entri riwayat dari database dan file yang terkait."""
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT path_mentah, path_ekstraksi FROM history WHERE id = ?", (history_id,))
+        cursor.execute("SELECT path_mentah, path_ekstraksi, image_hash FROM history WHERE id = ?", (history_id,))
         paths = cursor.fetchone()
 
         if paths:
+            cursor.execute("DELETE FROM minutiae_triplet WHERE history_id = ?", (history_id,))
+            cursor.execute("DELETE FROM minutiae_template WHERE history_id = ?", (history_id,))
             cursor.execute("DELETE FROM history WHERE id = ?", (history_id,))
             conn.commit()
             
-            # Hapus file dari sistem
-            if os.path.exists(paths['path_mentah']):
-                os.remove(paths['path_mentah'])
-            if os.path.exists(paths['path_ekstraksi']):
-                os.remove(paths['path_ekstraksi'])
+            # Hapus file dari sistem (beserta thumbnail-nya). Gambar bersama
+            # (content-addressed) hanya dihapus jika tidak dipakai kasus lain.
+            from thumbnail_cache import remove_thumbnail
+            for path in (paths['path_mentah'], paths['path_ekstraksi']):
+                if paths['image_hash'] is not None:
+                    cursor.execute('''
+                        SELECT EXISTS(SELECT 1 FROM history
+                                      WHERE image_hash = ? AND (path_mentah = ? OR path_ekstraksi = ?))
+                    ''', (paths['image_hash'], path, path))
+                    if cursor.fetchone()[0]:
+                        continue
+                if os.path.exists(path):
+                    os.remove(path)
+                remove_thumbnail(path)
             
-            conn.close()
             return True
         
-        conn.close()
         return False
 
     except Exception as e:
         print(f"Error deleting history ID {history_id}: {e}")
-        conn.close()
+        conn.rollback()
+        return False
+
+
+# =========================================================================
+# --- PENYIMPANAN GAMBAR (CONTENT-ADDRESSED) ---
+# =========================================================================
+
+def get_image_refcount(image_hash):
+    """Jumlah baris history yang memakai gambar dengan hash ini (0 jika tidak ada)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT refcount FROM image_store WHERE hash = ?", (image_hash,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def find_stored_image(image_hash):
+    """
+    Kasus terbaru yang memakai gambar dengan hash ini, sebagai Row (id, path_mentah,
+    path_ekstraksi, jumlah_minutiae), atau None. jumlah_minutiae None berarti
+    kasus tersebut belum punya template (tidak bisa dipakai ulang tanpa inferensi).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT h.id, h.path_mentah, h.path_ekstraksi, m.jumlah AS jumlah_minutiae
+        FROM history h
+        LEFT JOIN minutiae_template m ON m.history_id = h.id
+        WHERE h.image_hash = ?
+        ORDER BY m.jumlah IS NULL, h.id DESC
+        LIMIT 1
+    ''', (image_hash,))
+    return cursor.fetchone()
+
+def fetch_unhashed_history(after_id=0, limit=1000):
+    """
+    Baris history lama (sebelum content-addressed storage) yang belum punya
+    image_hash, dengan id > after_id (untuk dibaca per halaman).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, path_mentah, path_ekstraksi FROM history
+        WHERE image_hash IS NULL AND id > ?
+        ORDER BY id
+        LIMIT ?
+    ''', (after_id, limit))
+    return cursor.fetchall()
+
+def set_history_image(history_id, image_hash, path_mentah, path_ekstraksi):
+    """Mengisi image_hash (dan path gambar bersama) untuk satu baris history."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            UPDATE history SET image_hash = ?, path_mentah = ?, path_ekstraksi = ?
+            WHERE id = ?
+        ''', (image_hash, path_mentah, path_ekstraksi, history_id))
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error setting image hash for history ID {history_id}: {e}")
+        conn.rollback()
+        return False
+
+
+def is_path_referenced(path, image_hash=None):
+    """
+    True jika ada baris history yang memakai file ini (path_mentah/path_ekstraksi).
+    image_hash (opsional, file content-addressed): baris dengan hash yang sama dan
+    nama file yang sama juga dihitung, untuk path yang ditulis dengan DATA_DIR berbeda.
+    File lama (nama flat tanpa hash): lihat find_history_by_basenames.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT EXISTS(SELECT 1 FROM history WHERE path_mentah = ?)
+            OR EXISTS(SELECT 1 FROM history WHERE path_ekstraksi = ?)
+    ''', (path, path))
+    if cursor.fetchone()[0]:
+        return True
+    if image_hash is None:
         return False
+    name = os.path.basename(path)
+    cursor.execute("SELECT path_mentah, path_ekstraksi FROM history WHERE image_hash = ?", (image_hash,))
+    return any(name in (ntpath.basename(row[0] or ''), ntpath.basename(row[1] or '')) for row in cursor.fetchall())
+
+def find_history_by_basenames(names):
+    """
+    Baris history yang path_mentah/path_ekstraksi-nya berakhiran salah satu nama
+    file di names, untuk file lama di folder data yang dirujuk dengan path dari
+    lokasi aplikasi lain (misal 'C:\\...\\data_kasus\\<nama>' di database hasil
+    salinan). Nama file lama unik (timestamp + judul) sehingga nama saja cukup.
+    Mengembalikan dict nama -> Row (id, path_mentah, path_ekstraksi, jumlah_minutiae);
+    jika beberapa baris cocok, dipilih baris dengan id terkecil. Satu kali baca
+    seluruh tabel history (tidak ada index per nama file), jadi panggil per kelompok nama.
+    """
+    names = set(names)
+    found = {}
+    if not names:
+        return found
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT h.id, h.path_mentah, h.path_ekstraksi, m.jumlah AS jumlah_minutiae
+        FROM history h
+        LEFT JOIN minutiae_template m ON m.history_id = h.id
+        ORDER BY h.id
+    ''')
+    for row in cursor:
+        for path in (row['path_mentah'], row['path_ekstraksi']):
+            # ntpath memisahkan backslash maupun '/', path Windows tetap terbaca di Linux
+            name = ntpath.basename(path or '')
+            if name in names and name not in found:
+                found[name] = row
+    return found
+
+def fetch_history_files(after_id=0, limit=500):
+    """Baris history (id, path_mentah, path_ekstraksi, image_hash) dengan id > after_id, per halaman."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, path_mentah, path_ekstraksi, image_hash FROM history
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    ''', (after_id, limit))
+    return cursor.fetchall()
+
+def get_scan_checkpoint(name):
+    """Checkpoint pemindaian (Row: phase, position, stats, updated), atau None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT phase, position, stats, updated FROM scan_checkpoint WHERE name = ?", (name,))
+    return cursor.fetchone()
+
+def save_scan_checkpoint(name, phase, position, stats, updated):
+    """Menyimpan (atau mengganti) checkpoint pemindaian. position/stats berupa teks (JSON)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            INSERT OR REPLACE INTO scan_checkpoint (name, phase, position, stats, updated)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name, phase, position, stats, updated))
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving scan checkpoint '{name}': {e}")
+        conn.rollback()
+        return False
+
+
+# =========================================================================
+# --- IMPOR MASSAL ARSIP LAMA ---
+# =========================================================================
+
+def find_history_by_path(path):
+    """Kasus yang memakai file ini sebagai gambar mentah (Row: id, jumlah_minutiae), atau None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT h.id, m.jumlah AS jumlah_minutiae
+        FROM history h
+        LEFT JOIN minutiae_template m ON m.history_id = h.id
+        WHERE h.path_mentah = ?
+        ORDER BY h.id
+        LIMIT 1
+    ''', (path,))
+    return cursor.fetchone()
+
+def fetch_import_sources(include_failed=True):
+    """Set path sumber yang sudah tercatat di import_progress (include_failed=False: yang gagal diulang)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if include_failed:
+        cursor.execute("SELECT source_path FROM import_progress")
+    else:
+        cursor.execute("SELECT source_path FROM import_progress WHERE status != 'failed'")
+    return {row[0] for row in cursor.fetchall()}
+
+def count_import_progress():
+    """Jumlah file per status di import_progress (dict)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) FROM import_progress GROUP BY status")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+@timed('db.save_import_batch')
+def save_import_batch(entries, user_id, updated):
+    """
+    Menyimpan hasil impor banyak file sumber beserta progresnya dalam SATU transaksi
+    (kasus baru tidak pernah tercatat tanpa progres, atau sebaliknya). entries:
+    list of dict dengan source_path, status dan menurut status:
+        'imported'  : record (dict save_history_batch + timestamp) -> baris baru
+        'linked'    : history_id, minutiae, image_hash, path_mentah, path_ekstraksi
+                      (kasus lama tanpa template dipindah ke penyimpanan content-addressed)
+        'duplicate' : history_id, atau duplicate_of (indeks entry 'imported' di batch ini)
+        'exists'    : history_id
+        'failed'    : error
+    Mengembalikan list history_id per entry, atau None jika gagal (rollback).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        ids = []
+        for entry in entries:
+            status = entry['status']
+            history_id = entry.get('history_id')
+            if status == 'imported':
+                history_id = _insert_history_record(cursor, entry['record'], user_id)
+            elif status == 'linked':
+                cursor.execute('''
+                    UPDATE history SET image_hash = ?, path_mentah = ?, path_ekstraksi = ?
+                    WHERE id = ?
+                ''', (entry['image_hash'], entry['path_mentah'], entry['path_ekstraksi'], history_id))
+                _insert_minutiae(cursor, history_id, entry['minutiae'])
+            elif status == 'duplicate' and history_id is None:
+                history_id = ids[entry['duplicate_of']]
+            ids.append(history_id)
+        cursor.executemany('''
+            INSERT OR REPLACE INTO import_progress (source_path, status, history_id, image_hash, error, updated)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(entry['source_path'], entry['status'], history_id, entry.get('image_hash'), entry.get('error'), updated)
+              for entry, history_id in zip(entries, ids)])
+        conn.commit()
+        return ids
+    except Exception as e:
+        print(f"Error saving import batch: {e}")
+        conn.rollback()
+        return None
+
+
+# =========================================================================
+# --- CACHE HASIL EKSTRAKSI ---
+# =========================================================================
+
+@timed('db.fetch_extraction_cache')
+def fetch_extraction_cache(cache_key, touch_time=None):
+    """
+    Entri cache (Row: jumlah, data, overlay_path) untuk cache_key, atau None.
+    touch_time (epoch) memperbarui last_used untuk urutan eviction LRU.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT jumlah, data, overlay_path FROM extraction_cache WHERE cache_key = ?", (cache_key,))
+    row = cursor.fetchone()
+    if row is not None and touch_time is not None:
+        cursor.execute("UPDATE extraction_cache SET last_used = ? WHERE cache_key = ?", (touch_time, cache_key))
+        conn.commit()
+    return row
+
+@timed('db.save_extraction_cache')
+def save_extraction_cache(cache_key, image_hash, model_version, jumlah, blob, overlay_path, size_bytes, last_used):
+    """Menyimpan (atau mengganti) satu entri cache hasil ekstraksi."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            INSERT OR REPLACE INTO extraction_cache
+                (cache_key, image_hash, model_version, jumlah, data, overlay_path, size_bytes, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (cache_key, image_hash, model_version, jumlah, sqlite3.Binary(blob), overlay_path, size_bytes, last_used))
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error saving extraction cache: {e}")
+        conn.rollback()
+        return False
+
+def get_extraction_cache_size():
+    """(jumlah_entri, total_byte) cache hasil ekstraksi."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM extraction_cache")
+    return tuple(cursor.fetchone())
+
+def evict_extraction_cache(max_bytes):
+    """
+    Menghapus entri yang paling lama tidak dipakai sampai total ukuran <= max_bytes.
+    Mengembalikan list overlay_path entri yang dihapus (file dihapus pemanggil).
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        _count, total = get_extraction_cache_size()
+        removed = []
+        if total > max_bytes:
+            cursor.execute("SELECT cache_key, overlay_path, size_bytes FROM extraction_cache ORDER BY last_used")
+            for row in cursor.fetchall():
+                if total <= max_bytes:
+                    break
+                cursor.execute("DELETE FROM extraction_cache WHERE cache_key = ?", (row['cache_key'],))
+                total -= row['size_bytes']
+                removed.append(row['overlay_path'])
+        conn.commit()
+        return removed
+    except Exception as e:
+        print(f"Error evicting extraction cache: {e}")
+        conn.rollback()
+        return []
+
+def purge_extraction_cache(keep_model_version=None):
+    """
+    Menghapus entri cache dari versi model selain keep_model_version (None = semua).
+    Mengembalikan list overlay_path entri yang dihapus.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        where, params = ("WHERE model_version IS NOT ?", (keep_model_version,)) if keep_model_version else ("", ())
+        cursor.execute(f"SELECT overlay_path FROM extraction_cache {where}", params)
+        removed = [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"DELETE FROM extraction_cache {where}", params)
+        conn.commit()
+        return removed
+    except Exception as e:
+        print(f"Error purging extraction cache: {e}")
+        conn.rollback()
+        return []
 
 
 # Inisialisasi DB saat modul dimuat (opsional, tapi disarankan)
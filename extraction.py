@@ -0,0 +1,360 @@
+import os
+import threading
+from PIL import Image
+import numpy as np
+import cv2
+
+# Impor Pustaka Utama
+from model_manager import get_extractor
+from extraction_worker import ExtractionCancelled, check_cancelled
+from minutiae_store import minutiae_from_dataframe
+from minutiae_render import render_minutiae
+from preprocessing import DEFAULT_PARAMS as ROI_PARAMS, prepare_model_gray, map_to_original, read_dpi
+from thumbnail_cache import THUMB_SIZE, save_thumbnail
+from image_store import image_hash, stored_paths, save_array_atomic, copy_file_atomic, remove_unreferenced
+from archive_writer import wait_for
+import result_cache
+from metrics import measure
+
+# =========================================================================
+# --- LOGIKA EKSTRAKSI MINUTIAE (CORE LOGIC) ---
+# =========================================================================
+
+# Parameter preprocessing sebelum inferensi; ikut menjadi key cache hasil
+# ekstraksi (result_cache.py) sehingga perubahan di sini tidak memakai hasil lama.
+# Parameter ROI/DPI: lihat preprocessing.py ('roi': False = inferensi seluruh frame)
+PREPROCESS_PARAMS = dict({'mode': 'L', 'channels': 3}, **ROI_PARAMS)
+
+# Salinan per gambar dijaga seminimal mungkin: satu decode langsung ke
+# grayscale (cv2.imdecode), input 3-channel model berupa view broadcast dari
+# array grayscale (tanpa alokasi H x W x 3), overlay digambar di kanvas BGR
+# per thread yang dipakai ulang, dan PNG di-encode langsung dari array.
+_broadcast_input_ok = True    # False jika Extractor menolak view broadcast (read-only)
+_canvas = threading.local()   # Kanvas overlay per thread (encode_workers > 1 di pipeline)
+
+def decode_grayscale(input_filepath):
+    """
+    Membaca file gambar langsung sebagai array grayscale uint8 (H, W) dalam satu
+    decode (tanpa PIL Image RGB/L perantara). Format yang tidak didukung OpenCV
+    dibaca lewat PIL.
+    """
+    data = np.fromfile(input_filepath, dtype=np.uint8)
+    gray = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE | cv2.IMREAD_IGNORE_ORIENTATION) if data.size else None
+    if gray is None:
+        with Image.open(input_filepath) as img:
+            gray = np.asarray(img.convert("L"))
+    return gray
+
+def _model_input(gray):
+    """Input 3-channel untuk Fingerflow: view broadcast (tanpa salinan) jika Extractor menerimanya."""
+    if _broadcast_input_ok:
+        return np.broadcast_to(gray[..., None], gray.shape + (3,))
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def _overlay_canvas(shape):
+    """Kanvas (H, W, 3) milik thread ini, dialokasikan ulang hanya jika ukuran gambar berubah."""
+    canvas = getattr(_canvas, 'array', None)
+    if canvas is None or canvas.shape[:2] != shape:
+        canvas = _canvas.array = np.empty(shape + (3,), dtype=np.uint8)
+    return canvas
+
+def prepare_extraction(input_filepath, label=None):
+    """
+    Tahap decode: membuka gambar, konversi grayscale, hash konten, key cache dan
+    lookup cache hasil ekstraksi. Mengembalikan dict job yang diteruskan ke
+    infer_extraction dan finish_extraction (lihat juga extraction_pipeline.py).
+    job['minutiae'] sudah terisi jika hasilnya ada di cache (inferensi dilewati).
+    """
+    # Buka gambar langsung sebagai Grayscale (1 channel, 0-255)
+    with measure('decode', input_filepath):
+        img_raw_single_channel = decode_grayscale(input_filepath)
+    
+    # Key penyimpanan = hash konten grayscale (bukan nama/format file upload)
+    with measure('hash', input_filepath):
+        hash_hex = image_hash(img_raw_single_channel)
+        # Dengan normalisasi DPI, DPI file ikut menentukan hasil (piksel sama, DPI beda)
+        dpi = read_dpi(input_filepath) if PREPROCESS_PARAMS.get('target_dpi') else None
+        params = dict(PREPROCESS_PARAMS, source_dpi=dpi) if dpi else PREPROCESS_PARAMS
+        key = result_cache.cache_key(hash_hex, params)
+    path_mentah, path_ekstraksi = stored_paths(hash_hex, result_tag=key[:12])
+    job = {
+        'path': input_filepath,
+        'label': label or os.path.basename(input_filepath),
+        'gray': img_raw_single_channel,
+        'image_hash': hash_hex,
+        'cache_key': key,
+        'path_mentah': path_mentah,
+        'path_ekstraksi': path_ekstraksi,
+        'dpi': dpi,
+        'transform': None,
+        'minutiae': None,
+        'cached_overlay': None,
+        'from_cache': False,
+        'overlay': None, # Overlay BGR resolusi penuh (hanya jika digambar job ini)
+        'created': [], # File yang ditulis job ini (dihapus jika batal/gagal)
+        'pending': [], # Future penulisan di background (finish_extraction dengan writer)
+    }
+    
+    with measure('cache_lookup', input_filepath):
+        cached = result_cache.lookup(key)
+    if cached is not None:
+        job['minutiae'], job['cached_overlay'] = cached
+        job['from_cache'] = True
+        print(f"DEBUG: Hasil ekstraksi '{job['label']}' diambil dari cache ({hash_hex[:12]}), inferensi dilewati.")
+    return job
+
+def infer_extraction(job):
+    """
+    Tahap inferensi: ekstraksi minutiae Fingerflow (dilewati jika hasil dari cache).
+    Model hanya dimuat jika dibutuhkan (instan jika sudah warm). Inferensi
+    berjalan pada potongan foreground (ROI) dan koordinat minutiae dipetakan
+    kembali ke frame asli (lihat preprocessing.py).
+    """
+    if job['minutiae'] is not None:
+        return job
+    global _broadcast_input_ok
+    extractor = get_extractor()
+    
+    # Potong ke foreground (view) dan, jika diatur, skala ke DPI target
+    with measure('roi', job['path']):
+        gray_model, job['transform'] = prepare_model_gray(job['gray'], PREPROCESS_PARAMS, job['dpi'])
+    if gray_model.shape != job['gray'].shape:
+        print(f"DEBUG: ROI {job['transform']['roi']} (skala {job['transform']['scale']:.2f}) dari frame "
+              f"{job['gray'].shape[1]}x{job['gray'].shape[0]}.")
+    
+    # PENTING: Fingerflow Extractor butuh gambar 3-Channel (view, bukan salinan)
+    # Waktu per jaringan (CoarseNet, FineNet, ...) dicatat terpisah, lihat metrics.instrument_extractor
+    with measure('inference', job['path']):
+        try:
+            output_data = extractor.extract_minutiae(_model_input(gray_model)) # Output adalah Dictionary
+        except (ValueError, TypeError, cv2.error) as e:
+            if not _broadcast_input_ok:
+                raise
+            # Extractor menulis/mengubah bentuk input di tempat: pakai array 3-channel biasa seterusnya
+            print(f"Peringatan: Extractor menolak input broadcast ({e}); memakai salinan 3-channel.")
+            _broadcast_input_ok = False
+            output_data = extractor.extract_minutiae(_model_input(gray_model))
+    
+    # AMBIL DATAFRAME MINUTIAE DARI DICTIONARY HASIL EKSTRAKSI
+    minutiae_df = output_data.get("minutiae")
+    # Simpan dalam bentuk kolom NumPy agar bisa dipersist (tanpa inferensi ulang)
+    job['minutiae'] = map_to_original(minutiae_from_dataframe(minutiae_df), job['transform'])
+    
+    # Hitung jumlah minutiae yang terdeteksi
+    num_minutiae = len(job['minutiae']['x'])
+    print(f"DEBUG: Jumlah minutiae yang terdeteksi: {num_minutiae}")
+    if num_minutiae == 0:
+        print("Peringatan: Tidak ada minutiae yang terdeteksi. Menyimpan gambar mentah 3-channel.")
+    return job
+
+def _touch_existing(path):
+    """
+    Memperbarui mtime file penyimpanan yang dipakai ulang. store_scanner hanya
+    menindak file yatim yang lebih tua dari MIN_AGE_SECONDS; tanpa ini file lama
+    yang dipakai ulang bisa dikarantina sebelum baris history-nya di-commit.
+    Mengembalikan False jika file belum ada.
+    """
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def finish_extraction(job, stage=None, writer=None):
+    """
+    Tahap encode: render overlay, tulis PNG mentah/ekstraksi (jika belum ada di
+    penyimpanan), thumbnail dan cache hasil. stage(nama_tahap) opsional dipanggil
+    di awal tahap 'draw' dan 'save'.
+
+    writer (archive_writer.ArchiveWriter, opsional): encode + tulis file di
+    background. Fungsi kembali segera setelah overlay digambar; file BELUM tentu
+    ada sampai wait_extraction(job) selesai (cache hasil juga disimpan di sana).
+    Mengembalikan tuple (path_mentah, path_ekstraksi, minutiae, image_hash).
+    """
+    gray, minutiae = job['gray'], job['minutiae']
+    path_mentah, path_ekstraksi = job['path_mentah'], job['path_ekstraksi']
+    
+    # Visualisasi: render vektorisasi (penanda, garis arah, warna per kelas) di resolusi penuh
+    if stage:
+        stage('draw')
+    need_mentah = not _touch_existing(path_mentah)
+    need_overlay = not _touch_existing(path_ekstraksi)
+    overlay = None
+    if need_overlay and not job['cached_overlay']:
+        # Digambar di tempat pada kanvas BGR yang dipakai ulang, di-encode tanpa konversi.
+        # Write-behind: array baru milik job (kanvas thread dipakai gambar berikutnya)
+        with measure('draw', job['path']):
+            out = _overlay_canvas(gray.shape) if writer is None else None
+            overlay = job['overlay'] = render_minutiae(gray, minutiae, out=out, bgr=True)
+    
+    if stage:
+        stage('save')
+    if writer is not None:
+        _submit_archive(job, writer, overlay, need_mentah, need_overlay)
+        return path_mentah, path_ekstraksi, minutiae, job['image_hash']
+    if need_mentah:
+        with measure('encode', job['path']):
+            save_array_atomic(gray, path_mentah) # Simpan yang grayscale untuk arsip
+        job['created'].append(path_mentah)
+        with measure('thumbnail', job['path']):
+            save_thumbnail(path_mentah, gray)
+    if need_overlay:
+        with measure('encode', job['path']):
+            if overlay is None:
+                copy_file_atomic(job['cached_overlay'], path_ekstraksi)
+            else:
+                save_array_atomic(overlay, path_ekstraksi)
+        job['created'].append(path_ekstraksi)
+        # Derivatif thumbnail (hasil ekstraksi dirender langsung di resolusi tampilan)
+        with measure('thumbnail', job['path']):
+            save_thumbnail(path_ekstraksi, render_minutiae(gray, minutiae, max_size=THUMB_SIZE, bgr=True))
+    
+    _store_result(job)
+    return path_mentah, path_ekstraksi, minutiae, job['image_hash']
+
+def _submit_archive(job, writer, overlay, need_mentah, need_overlay):
+    """Menjadwalkan PNG mentah/ekstraksi (+ thumbnail) job ke ArchiveWriter."""
+    gray, minutiae = job['gray'], job['minutiae']
+    if need_mentah:
+        job['pending'].append(writer.submit(job['path_mentah'], gray, thumbnail=gray, label=job['path']))
+        job['created'].append(job['path_mentah'])
+    if need_overlay:
+        thumbnail = lambda: render_minutiae(gray, minutiae, max_size=THUMB_SIZE, bgr=True)
+        if overlay is None:
+            future = writer.submit(job['path_ekstraksi'], source=job['cached_overlay'], thumbnail=thumbnail, label=job['path'])
+        else:
+            future = writer.submit(job['path_ekstraksi'], overlay, thumbnail=thumbnail, label=job['path'])
+        job['pending'].append(future)
+        job['created'].append(job['path_ekstraksi'])
+
+def _store_result(job):
+    # Simpan ke cache agar gambar yang sama tidak perlu inferensi ulang
+    if not job['from_cache']:
+        with measure('cache_store', job['path']):
+            result_cache.store(job['cache_key'], job['image_hash'], job['minutiae'], overlay_source=job['path_ekstraksi'])
+
+def wait_extraction(job, timeout=None):
+    """
+    Menunggu file job yang ditulis di background (finish_extraction dengan writer)
+    sampai ter-rename ke lokasi akhirnya, lalu menyimpan cache hasil. Baris
+    database untuk job ini baru boleh di-commit setelah fungsi ini kembali.
+    Melempar exception penulisan (file job perlu dibersihkan dengan discard_extraction).
+    Mengembalikan tuple (path_mentah, path_ekstraksi, minutiae, image_hash).
+    """
+    with measure('archive_wait', job['path']):
+        wait_for(job['pending'], timeout)
+    job['pending'] = []
+    _store_result(job)
+    return job['path_mentah'], job['path_ekstraksi'], job['minutiae'], job['image_hash']
+
+def extraction_preview(job, max_size=THUMB_SIZE):
+    """PIL Image (RGB) overlay berukuran tampilan, dirender dari memori (tanpa menunggu file)."""
+    return Image.fromarray(render_minutiae(job['gray'], job['minutiae'], max_size=max_size))
+
+def discard_extraction(job):
+    """Menghapus file yang ditulis job (jika tidak dipakai kasus mana pun), misal saat batal/gagal."""
+    if job is None:
+        return
+    if job['pending']:
+        # Tunggu penulisan background selesai agar file tidak muncul lagi setelah dihapus
+        try:
+            wait_for(job['pending'])
+        except Exception:
+            pass
+        job['pending'] = []
+    if job['created']:
+        remove_unreferenced(job['image_hash'], job['created'])
+
+def run_minutiae_extraction(input_filepath, case_judul, file_tag=None, stage_callback=None, cancel_event=None,
+                            writer=None, preview_callback=None):
+    """
+    Memproses gambar sidik jari (SJ), mengekstrak minutiae menggunakan Fingerflow,
+    dan menyimpan gambar mentah/hasil ekstraksi ke penyimpanan content-addressed
+    (lihat image_store.py). Tahapannya: prepare_extraction -> infer_extraction ->
+    finish_extraction (berurutan; untuk banyak gambar lihat extraction_pipeline.py
+    yang menjalankan tahapan tersebut tumpang tindih).
+    
+    Jika gambar grayscale yang sama persis sudah pernah diekstrak dengan file model
+    dan PREPROCESS_PARAMS yang sama, minutiae dan overlay diambil dari cache hasil
+    ekstraksi (result_cache.py) TANPA inferensi, dan gambar yang sudah tersimpan
+    dipakai ulang tanpa menulis salinan baru.
+    
+    case_judul dan file_tag hanya dipakai untuk log; nama file ditentukan hash
+    konten sehingga gambar yang diproses bersamaan tidak saling menimpa.
+    
+    stage_callback(nama_tahap) dipanggil di awal setiap tahap (lihat extraction_worker.STAGES).
+    Jika cancel_event di-set, ExtractionCancelled dilempar di batas tahap berikutnya
+    dan file yang baru tertulis (dan belum dipakai kasus lain) dihapus.
+    
+    writer (archive_writer.ArchiveWriter, opsional): PNG di-encode dan di-fsync di
+    background; preview_callback(PIL Image overlay) dipanggil segera setelah overlay
+    digambar, lalu fungsi menunggu file tersimpan sebelum kembali (hasil yang
+    dikembalikan selalu menunjuk file yang sudah ada).
+    
+    Mengembalikan tuple (path_mentah_tersimpan, path_ekstraksi_tersimpan, minutiae, image_hash)
+    dengan minutiae berupa dict kolom NumPy (lihat minutiae_store.py), atau
+    (None, None, None, None) jika gagal.
+    """
+    
+    def _stage(name):
+        check_cancelled(cancel_event)
+        if stage_callback:
+            stage_callback(name)
+    
+    label = case_judul if not file_tag else f"{case_judul} ({file_tag})"
+
+    # 0. Versi model untuk key cache (hash file model dihitung sekali per perubahan)
+    _stage('load')
+    try:
+        result_cache.model_version()
+    except OSError as e:
+        print(f"ERROR: Gagal membaca file model di folder 'models'. {e}")
+        return None, None, None, None
+
+    # 1. Buka Gambar & Konversi ke format yang sesuai
+    _stage('decode')
+    try:
+        job = prepare_extraction(input_filepath, label)
+    except Exception as e:
+        print(f"ERROR: Gagal memuat gambar mentah: {e}")
+        return None, None, None, None
+    
+    try:
+        # 2. EKSTRAKSI MINUTIAE (Fingerflow)
+        if not job['from_cache']:
+            _stage('inference')
+        infer_extraction(job)
+        
+        # 3. Visualisasi & simpan hasil
+        result = finish_extraction(job, stage=_stage, writer=writer)
+        if writer is None:
+            return result
+        # Hasil langsung dari memori; file masih ditulis di background
+        if preview_callback:
+            preview_callback(extraction_preview(job))
+        return wait_extraction(job)
+        
+    except ExtractionCancelled:
+        # Operator membatalkan: jangan tinggalkan file yang tidak dipakai kasus mana pun
+        discard_extraction(job)
+        raise
+    except FileNotFoundError as fnf_e:
+        print(f"ERROR: Model tidak ditemukan. Pastikan 4 file model ada di folder 'models'. {fnf_e}")
+        discard_extraction(job)
+        return None, None, None, None
+    except Exception as e:
+        print(f"ERROR: Gagal ekstraksi minutiae (Fingerflow). Error: {e}")
+        # Hapus file yang baru ditulis untuk menghindari kebingungan
+        discard_extraction(job)
+        return None, None, None, None
+
+def extract_probe_minutiae(input_filepath):
+    """
+    Ekstraksi minutiae untuk probe pencocokan (tanpa menyimpan gambar/kasus).
+    Memakai cache hasil ekstraksi jika gambar yang sama pernah diproses.
+    Mengembalikan tuple (minutiae, image_hash).
+    """
+    job = infer_extraction(prepare_extraction(input_filepath))
+    if not job['from_cache']:
+        result_cache.store(job['cache_key'], job['image_hash'], job['minutiae'])
+    return job['minutiae'], job['image_hash']
@@ -0,0 +1,216 @@
+import queue
+import threading
+import time
+
+from extraction import prepare_extraction, infer_extraction, finish_extraction, discard_extraction
+from extraction_worker import ExtractionCancelled
+from image_store import remove_unreferenced
+
+# =========================================================================
+# --- PIPELINE EKSTRAKSI BERTAHAP (STREAMING) ---
+# =========================================================================
+# run_minutiae_extraction menjalankan decode -> inferensi -> render/encode PNG
+# berurutan, sehingga disk dan encode PNG tidak pernah tumpang tindih dengan
+# inferensi. Untuk banyak gambar, pipeline ini menjalankan setiap tahap di
+# thread sendiri yang dihubungkan queue berukuran terbatas:
+#
+#   decode (gambar N+1)  ->  inference (gambar N)  ->  encode (gambar N-1)
+#
+# Decode OpenCV, inferensi TensorFlow dan kompresi zlib PNG melepas GIL sehingga
+# benar-benar berjalan paralel. Queue terbatas (buffer_size) menahan tahap
+# yang lebih cepat agar memori tidak membengkak (back-pressure). Hasil keluar
+# sesuai urutan input. Waktu kerja dan waktu tunggu per tahap dicatat untuk
+# melihat tahap mana yang membatasi throughput.
+# Jika konsumen berhenti sebelum hasil habis (break, exception), run()
+# menghentikan semua thread dan membuang file gambar yang belum diambil.
+
+STAGE_NAMES = ('decode', 'inference', 'encode')
+_STOP = object()
+
+
+class ExtractionPipeline:
+    """
+    pipeline = ExtractionPipeline(buffer_size=4, encode_workers=2)
+    for path, result in pipeline.run(paths):
+        ...   # result = tuple run_minutiae_extraction, atau (None, None, None, None) jika gagal
+    print(pipeline.get_stage_report())
+
+    labels (opsional) dipakai untuk log. cancel_event: jika di-set, gambar yang
+    belum mulai diproses dilewati dan run() berhenti dengan ExtractionCancelled.
+    """
+
+    def __init__(self, buffer_size=4, decode_workers=1, encode_workers=1):
+        self.buffer_size = buffer_size
+        self.workers = {'decode': decode_workers, 'inference': 1, 'encode': encode_workers}
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.stats = {name: {'items': 0, 'busy_seconds': 0.0, 'wait_seconds': 0.0} for name in STAGE_NAMES}
+        self.stats_lock = threading.Lock()
+        self.elapsed_seconds = 0.0
+
+    def _record(self, stage, busy, wait):
+        with self.stats_lock:
+            entry = self.stats[stage]
+            entry['items'] += 1
+            entry['busy_seconds'] += busy
+            entry['wait_seconds'] += wait
+
+    # --- Tahapan ---
+    @staticmethod
+    def _decode(item):
+        seq, path, label = item
+        return seq, path, prepare_extraction(path, label)
+
+    @staticmethod
+    def _inference(item):
+        seq, path, job = item
+        return seq, path, infer_extraction(job)
+
+    @staticmethod
+    def _encode(item):
+        seq, path, job = item
+        # File yang dibuat ikut diteruskan: dibuang jika hasilnya tidak pernah diambil konsumen
+        return seq, path, (finish_extraction(job), job['created'])
+
+    @staticmethod
+    def _discard_result(payload):
+        """Membuang file hasil encode yang tidak diambil konsumen (jika tidak dirujuk kasus mana pun)."""
+        if isinstance(payload, tuple):
+            result, created = payload
+            if created:
+                remove_unreferenced(result[3], created)
+
+    def _stage_thread(self, stage, func, inbox, outbox, remaining, cancel_event, abort):
+        """Loop satu thread tahap: ambil item, proses, teruskan. Error per item diteruskan sebagai hasil gagal."""
+        from db_manager import close_db_connections
+        try:
+            while True:
+                start = time.perf_counter()
+                item = inbox.get()
+                waited = time.perf_counter() - start
+                if item is _STOP:
+                    break
+                seq, path, payload = item
+                if isinstance(payload, BaseException) or abort.is_set() or (cancel_event is not None and cancel_event.is_set()):
+                    # Item gagal/dibatalkan di tahap sebelumnya: teruskan tanpa diproses
+                    if not isinstance(payload, BaseException):
+                        if isinstance(payload, dict):
+                            discard_extraction(payload)
+                        payload = ExtractionCancelled()
+                    outbox.put((seq, path, payload))
+                    continue
+                start = time.perf_counter()
+                try:
+                    result = func(item)
+                except Exception as e:
+                    if isinstance(payload, dict):
+                        discard_extraction(payload)
+                    print(f"ERROR: Tahap {stage} gagal untuk {path}: {e}")
+                    result = (seq, path, e)
+                self._record(stage, time.perf_counter() - start, waited)
+                outbox.put(result)
+        finally:
+            close_db_connections()
+            # Thread terakhir di tahap ini meneruskan tanda selesai ke tahap berikutnya
+            with remaining['lock']:
+                remaining['count'] -= 1
+                last = remaining['count'] == 0
+            if last:
+                for _ in range(remaining['next_workers']):
+                    outbox.put(_STOP)
+
+    def run(self, paths, labels=None, cancel_event=None):
+        """
+        Generator (path, hasil) sesuai urutan paths. hasil sama dengan return
+        run_minutiae_extraction; (None, None, None, None) jika gambar gagal.
+        Jika generator ditutup sebelum habis, gambar yang belum diambil dibatalkan
+        dan filenya dibuang sebelum close()/exception konsumen diteruskan.
+        """
+        self._reset_stats()
+        paths = list(paths)
+        labels = list(labels) if labels is not None else [None] * len(paths)
+        queues = [queue.Queue(maxsize=self.buffer_size) for _ in range(len(STAGE_NAMES) + 1)]
+        funcs = {'decode': self._decode, 'inference': self._inference, 'encode': self._encode}
+        abort = threading.Event() # Konsumen berhenti lebih awal: sisa item dilewati
+
+        threads = []
+        for i, stage in enumerate(STAGE_NAMES):
+            next_workers = self.workers[STAGE_NAMES[i + 1]] if i + 1 < len(STAGE_NAMES) else 1
+            remaining = {'count': self.workers[stage], 'next_workers': next_workers, 'lock': threading.Lock()}
+            for n in range(self.workers[stage]):
+                thread = threading.Thread(target=self._stage_thread, name=f"pipeline-{stage}-{n}", daemon=True,
+                                          args=(stage, funcs[stage], queues[i], queues[i + 1], remaining, cancel_event, abort))
+                thread.start()
+                threads.append(thread)
+
+        def _feed():
+            # Input dimasukkan dari thread sendiri: put() yang terblokir (buffer penuh) tidak menahan output
+            for seq, (path, label) in enumerate(zip(paths, labels)):
+                if abort.is_set():
+                    break
+                queues[0].put((seq, path, label))
+            for _ in range(self.workers['decode']):
+                queues[0].put(_STOP)
+
+        feeder = threading.Thread(target=_feed, name="pipeline-feed", daemon=True)
+        start = time.perf_counter()
+        feeder.start()
+
+        # Susun ulang hasil (encode_workers > 1 bisa selesai tidak berurutan)
+        done = {}
+        next_seq = 0
+        cancelled = False
+        finished = False
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _STOP:
+                    finished = True
+                    break
+                seq, path, payload = item
+                done[seq] = (path, payload)
+                while next_seq in done:
+                    path, payload = done.pop(next_seq)
+                    next_seq += 1
+                    if isinstance(payload, ExtractionCancelled):
+                        cancelled = True
+                        continue
+                    yield path, (None, None, None, None) if isinstance(payload, BaseException) else payload[0]
+        finally:
+            self.elapsed_seconds = time.perf_counter() - start
+            if not finished:
+                # Konsumen berhenti (break/exception): hentikan tahap-tahap dan kosongkan
+                # queue output agar thread yang terblokir di put() bisa selesai
+                abort.set()
+                for _path, payload in done.values():
+                    self._discard_result(payload)
+                while True:
+                    item = queues[-1].get()
+                    if item is _STOP:
+                        break
+                    self._discard_result(item[2])
+        if cancelled:
+            raise ExtractionCancelled()
+
+    def get_stage_report(self):
+        """
+        Ringkasan per tahap: items, busy_seconds, wait_seconds, mean_ms dan
+        utilization (busy / (wall x jumlah thread)). bottleneck = tahap dengan
+        utilization tertinggi.
+        """
+        with self.stats_lock:
+            stages = {name: dict(entry) for name, entry in self.stats.items()}
+        for name, entry in stages.items():
+            entry['workers'] = self.workers[name]
+            entry['mean_ms'] = entry['busy_seconds'] / entry['items'] * 1000 if entry['items'] else 0.0
+            capacity = self.elapsed_seconds * self.workers[name]
+            entry['utilization'] = entry['busy_seconds'] / capacity if capacity > 0 else 0.0
+        bottleneck = max(stages, key=lambda name: stages[name]['utilization']) if self.elapsed_seconds > 0 else None
+        return {'elapsed_seconds': self.elapsed_seconds, 'stages': stages, 'bottleneck': bottleneck}
+
+
+def format_stage_report(report):
+    """Satu baris ringkasan, misal 'decode 12.1ms (35%) | inference 30.2ms (88%) | encode ...'."""
+    parts = [f"{name} {entry['mean_ms']:.1f}ms ({entry['utilization'] * 100:.0f}%)" for name, entry in report['stages'].items()]
+    return " | ".join(parts) + f" | bottleneck: {report['bottleneck']}"
@@ -0,0 +1,120 @@
+import os
+import time
+from collections import deque
+
+# =========================================================================
+# --- WORKER POOL EKSTRAKSI (MULTI-PROSES) ---
+# =========================================================================
+# Satu sesi TensorFlow tidak memakai semua core: preprocessing, render dan
+# encode PNG berjalan di Python (GIL) di antara inferensi. Pool ini menjalankan
+# beberapa proses, masing-masing dengan Extractor resident sendiri dan jumlah
+# thread TensorFlow yang dibagi rata (intra-op = core / worker), sehingga
+# bagian Python satu worker tumpang tindih dengan inferensi worker lain.
+#
+# Back-pressure: paling banyak max_pending job yang dikirim tetapi belum
+# diambil hasilnya; input (misal generator daftar file) dibaca seperlunya.
+# Hasil dikembalikan sesuai urutan input.
+
+PENDING_PER_WORKER = 2 # Job antre per worker (cukup agar worker tidak menganggur)
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def _init_worker(intra_op, inter_op, extractor_factory, warm):
+    """Initializer proses worker: batasi thread lalu muat Extractor sekali."""
+    from model_manager import set_tensorflow_threads, install_extractor, get_extractor
+    try:
+        import cv2
+        cv2.setNumThreads(intra_op or 1)
+    except ImportError:
+        pass
+    set_tensorflow_threads(intra_op, inter_op)
+    if extractor_factory is not None:
+        install_extractor(extractor_factory())
+    elif warm:
+        try:
+            get_extractor()
+        except Exception as e:
+            print(f"Peringatan: Worker {os.getpid()} gagal memuat model Fingerflow: {e}")
+
+
+class ExtractionPool:
+    """
+    Pool proses untuk fungsi ekstraksi tingkat modul (harus bisa di-pickle),
+    misal find_minutiae.api._extract_one.
+
+        with ExtractionPool(func, workers=4) as pool:
+            for result in pool.imap(args_per_job):
+                ...
+
+    intra_op_threads default: core / workers (minimal 1). extractor_factory
+    (opsional, callable tingkat modul) dipasang sebagai Extractor di tiap worker
+    alih-alih model Fingerflow (benchmark).
+    """
+
+    def __init__(self, func, workers=None, intra_op_threads=None, inter_op_threads=1, max_pending=None,
+                 extractor_factory=None, warm=True):
+        self.func = func
+        self.workers = max(1, workers or default_worker_count())
+        self.intra_op_threads = intra_op_threads or max(1, default_worker_count() // self.workers)
+        self.inter_op_threads = inter_op_threads
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self.extractor_factory = extractor_factory
+        self.warm = warm
+        self.executor = None
+        self.stats = {'submitted': 0, 'completed': 0, 'max_in_flight': 0, 'elapsed_seconds': 0.0}
+
+    def start(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        if self.executor is None:
+            # spawn: aman walau proses induk sudah memuat TensorFlow (fork tidak)
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.intra_op_threads, self.inter_op_threads, self.extractor_factory, self.warm),
+            )
+        return self
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def imap(self, jobs):
+        """
+        Generator hasil func(*args) untuk setiap args di jobs, sesuai urutan input.
+        Job berikutnya baru dikirim setelah hasil paling awal diambil jika sudah
+        ada max_pending job di dalam pool.
+        """
+        self.start()
+        start = time.perf_counter()
+        pending = deque()
+        try:
+            for args in jobs:
+                if len(pending) >= self.max_pending:
+                    yield self._take(pending)
+                pending.append(self.executor.submit(self.func, *args))
+                self.stats['submitted'] += 1
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], len(pending))
+            while pending:
+                yield self._take(pending)
+        finally:
+            for future in pending:
+                future.cancel()
+            self.stats['elapsed_seconds'] += time.perf_counter() - start
+
+    def _take(self, pending):
+        result = pending.popleft().result()
+        self.stats['completed'] += 1
+        return result
@@ -0,0 +1,125 @@
+import queue
+import threading
+
+# =========================================================================
+# --- WORKER EKSTRAKSI (DI LUAR MAIN LOOP TKINTER) ---
+# =========================================================================
+# Tkinter tidak thread-safe: worker TIDAK menyentuh widget sama sekali.
+# Semua status dikirim lewat queue dan dibaca halaman dengan polling after().
+
+# Tahapan ekstraksi beserta label yang ditampilkan di UI (urut)
+STAGES = [
+    ('load', "Memuat model"),
+    ('decode', "Membaca gambar"),
+    ('inference', "Ekstraksi (CoarseNet/FineNet)"),
+    ('draw', "Visualisasi minutiae"),
+    ('save', "Menyimpan hasil"),
+]
+STAGE_LABELS = dict(STAGES)
+STAGE_ORDER = [name for name, _label in STAGES]
+
+# Jumlah job ekstraksi yang sedang berjalan; pekerjaan background lain
+# (misal store_scanner.py) menunggu sampai 0 agar tidak bersaing dengan operator
+_active_jobs = 0
+_active_lock = threading.Lock()
+
+
+def extraction_busy():
+    """True jika ada ExtractionJob (interaktif) yang sedang berjalan."""
+    return _active_jobs > 0
+
+
+class ExtractionCancelled(Exception):
+    """Dilempar di antara tahapan ekstraksi ketika operator menekan Batal."""
+    pass
+
+
+def check_cancelled(cancel_event):
+    """Lempar ExtractionCancelled jika cancel_event sudah di-set."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise ExtractionCancelled()
+
+
+class ExtractionJob:
+    """
+    Menjalankan fungsi ekstraksi (run_minutiae_extraction / run_batch_extraction)
+    di thread terpisah. Target dipanggil dengan tambahan keyword stage_callback dan
+    cancel_event (dan progress_callback jika report_progress=True, preview_callback
+    jika report_preview=True).
+
+    Pesan di queue berupa tuple:
+        ('stage', nama_tahap)
+        ('progress', selesai, total, path)
+        ('preview', gambar)     # PIL Image hasil dari memori, sebelum file tersimpan
+        ('done', hasil)
+        ('cancelled', None)
+        ('error', pesan)
+    """
+
+    def __init__(self, target, *args, report_progress=False, report_preview=False, **kwargs):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs
+        self.report_progress = report_progress
+        self.report_preview = report_preview
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="extraction-job", daemon=True)
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        """Minta pembatalan; berlaku di batas tahapan berikutnya."""
+        self.cancel_event.set()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def report_stage(self, stage):
+        self.queue.put(('stage', stage))
+
+    def report_batch_progress(self, done, total, path):
+        self.queue.put(('progress', done, total, path))
+
+    def report_preview_image(self, image):
+        self.queue.put(('preview', image))
+
+    def poll(self):
+        """Ambil semua pesan yang tersedia tanpa blocking (dipanggil dari main thread)."""
+        messages = []
+        while True:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def _run(self):
+        global _active_jobs
+        with _active_lock:
+            _active_jobs += 1
+        try:
+            self._run_target()
+        finally:
+            with _active_lock:
+                _active_jobs -= 1
+
+    def _run_target(self):
+        kwargs = dict(self.kwargs)
+        kwargs['stage_callback'] = self.report_stage
+        kwargs['cancel_event'] = self.cancel_event
+        if self.report_progress:
+            kwargs['progress_callback'] = self.report_batch_progress
+        if self.report_preview:
+            kwargs['preview_callback'] = self.report_preview_image
+        try:
+            result = self.target(*self.args, **kwargs)
+        except ExtractionCancelled:
+            self.queue.put(('cancelled', None))
+        except Exception as e:
+            print(f"ERROR: Job ekstraksi gagal: {e}")
+            self.queue.put(('error', str(e)))
+        else:
+            self.queue.put(('done', result))
@@ -0,0 +1,17 @@
+"""
+Entry point headless (tanpa GUI) untuk ekstraksi dan pencocokan minutiae.
+
+    python -m find_minutiae extract|batch|match|reindex ...
+
+API Python ada di find_minutiae.api. Paket ini sengaja TIDAK mengimpor
+db_manager saat diimpor, agar FIND_MINUTIAE_DB / FIND_MINUTIAE_DATA_DIR /
+FIND_MINUTIAE_MODEL_DIR (atau opsi --db/--data-dir/--models CLI) sempat
+di-set sebelum lokasi database dan folder data ditentukan.
+"""
+import os
+import sys
+
+# Modul aplikasi (db_manager, extraction, matcher, ...) berada di folder induk paket
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
@@ -0,0 +1,180 @@
+"""
+Find Minutiae tanpa GUI. Setiap hasil ditulis sebagai satu baris JSON ke stdout
+(JSON-lines), log aplikasi ke stderr.
+
+    python -m find_minutiae extract sidik1.png sidik2.jpg --judul "Kasus A" --user admin
+    python -m find_minutiae batch /data/scan --recursive --workers 4 --user admin
+    python -m find_minutiae match probe.png --top 10
+    python -m find_minutiae reindex
+    python -m find_minutiae scan --mode report
+    python -m find_minutiae import --uploads uploads --legacy data_kasus --user admin
+
+Lokasi database/data/model: --db, --data-dir, --models atau environment
+FIND_MINUTIAE_DB, FIND_MINUTIAE_DATA_DIR, FIND_MINUTIAE_MODEL_DIR. Level kompresi
+PNG arsip: --png-compression atau FIND_MINUTIAE_PNG_COMPRESSION.
+"""
+import argparse
+import json
+import os
+import sys
+
+
+_output = sys.stdout # Diganti main() dengan salinan stdout asli
+
+
+def _emit(record):
+    _output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    _output.flush()
+
+
+def _reserve_stdout():
+    """
+    Menyimpan stdout asli khusus untuk JSON-lines, lalu mengarahkan fd 1 ke stderr
+    sehingga print() aplikasi, TensorFlow dan proses worker tidak mencampuri output.
+    """
+    global _output
+    sys.stdout.flush()
+    _output = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    os.dup2(2, 1)
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(prog="python -m find_minutiae", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help="Path database SQLite (FIND_MINUTIAE_DB)")
+    parser.add_argument('--data-dir', help="Folder data kasus (FIND_MINUTIAE_DATA_DIR)")
+    parser.add_argument('--models', help="Folder model Fingerflow (FIND_MINUTIAE_MODEL_DIR)")
+    parser.add_argument('--png-compression', type=int, choices=range(10), metavar='0-9',
+                        help="Level kompresi PNG arsip (FIND_MINUTIAE_PNG_COMPRESSION, default 1)")
+    parser.add_argument('--metrics', help="Ekspor metrik per tahap ke file .json/.csv saat selesai "
+                                          "(hanya proses utama; --workers > 1 mengekstrak di proses worker)")
+    sub = parser.add_subparsers(dest='command')
+    sub.required = True
+
+    def _case_options(p):
+        p.add_argument('--judul', help="Judul kasus (default: nama file)")
+        p.add_argument('--nomor-lp')
+        p.add_argument('--tanggal', help="Tanggal kejadian")
+        p.add_argument('--user', default='admin', help="Username pemilik kasus (default: admin)")
+        p.add_argument('--no-save', action='store_true', help="Hanya ekstraksi, tidak menyimpan ke history")
+        p.add_argument('--workers', type=int, default=1, help="Jumlah proses ekstraksi paralel")
+        p.add_argument('--intra-op', type=int, help="Thread TensorFlow intra-op per worker (default: core / worker)")
+        p.add_argument('--inter-op', type=int, help="Thread TensorFlow inter-op per worker (default: 1)")
+        p.add_argument('--commit-every', type=int, default=100, help="Jumlah kasus per transaksi database")
+
+    p = sub.add_parser('extract', help="Ekstraksi satu atau beberapa file gambar")
+    p.add_argument('files', nargs='+')
+    _case_options(p)
+
+    p = sub.add_parser('batch', help="Ekstraksi seluruh gambar di folder")
+    p.add_argument('source')
+    p.add_argument('--recursive', action='store_true')
+    _case_options(p)
+
+    p = sub.add_parser('match', help="Identifikasi 1:N gambar probe terhadap database")
+    p.add_argument('files', nargs='+')
+    p.add_argument('--top', type=int, default=10)
+    p.add_argument('--candidates', type=int, help="Jumlah kandidat pre-filter (0 = brute force)")
+
+    p = sub.add_parser('reindex', help="Bangun ulang index triplet dan hash gambar kasus lama")
+    p.add_argument('--no-images', action='store_true', help="Lewati hash/deduplikasi gambar")
+    p.add_argument('--keep-duplicates', action='store_true', help="Jangan hapus file gambar duplikat")
+
+    p = sub.add_parser('import', help="Impor massal arsip lama uploads/<judul>_<timestamp>/ dan data_kasus/*_mentah.*")
+    p.add_argument('--uploads', help="Folder upload lama (default: uploads/ di folder aplikasi)")
+    p.add_argument('--legacy', help="Folder file *_mentah.* lepas (default: folder data)")
+    p.add_argument('--user', default='admin', help="Username pemilik kasus hasil impor (default: admin)")
+    p.add_argument('--workers', type=int, default=2, help="Thread decode/encode (model tetap satu)")
+    p.add_argument('--commit-every', type=int, default=500, help="Jumlah file per transaksi database")
+    p.add_argument('--limit', type=int, help="Maksimal file baru yang diproses pada run ini")
+    p.add_argument('--retry-failed', action='store_true', help="Coba lagi file yang sebelumnya gagal")
+
+    p = sub.add_parser('scan', help="Periksa integritas folder data vs history (file yatim, overlay/thumbnail hilang)")
+    p.add_argument('--mode', choices=('report', 'quarantine', 'delete'), default='report',
+                   help="Perlakuan file yatim (default: hanya dilaporkan; quarantine = pindahkan ke folder quarantine)")
+    p.add_argument('--min-age', type=float, help="Umur minimal file yatim dalam jam (default: 6)")
+    p.add_argument('--restart', action='store_true', help="Mulai dari awal, abaikan checkpoint")
+    return parser
+
+
+def _run_extract(api, args, files):
+    user_id = None if args.no_save else api.resolve_user(args.user)
+    summary = {'total': len(files), 'ok': 0, 'failed': 0}
+    for result in api.extract_files(files, judul=args.judul, nomor_lp=args.nomor_lp, tanggal_kejadian=args.tanggal,
+                                    user_id=user_id, save=not args.no_save, workers=args.workers,
+                                    commit_every=args.commit_every, intra_op_threads=args.intra_op,
+                                    inter_op_threads=args.inter_op):
+        summary[result['status']] += 1
+        _emit(result)
+    _emit({'summary': summary})
+    return 0 if summary['failed'] == 0 else 1
+
+
+def main(argv=None):
+    args = _build_parser().parse_args(argv)
+
+    # Environment di-set SEBELUM db_manager diimpor (lokasi ditentukan saat impor)
+    for option, env_name in ((args.db, 'FIND_MINUTIAE_DB'), (args.data_dir, 'FIND_MINUTIAE_DATA_DIR'),
+                             (args.models, 'FIND_MINUTIAE_MODEL_DIR')):
+        if option:
+            os.environ[env_name] = os.path.abspath(option)
+    if args.png_compression is not None:
+        os.environ['FIND_MINUTIAE_PNG_COMPRESSION'] = str(args.png_compression)
+
+    _reserve_stdout()
+    from find_minutiae import api
+    from batch_extraction import collect_image_files
+
+    try:
+        return _run_command(api, args, collect_image_files)
+    finally:
+        if args.metrics:
+            import metrics
+            count = metrics.export(args.metrics)
+            print(f"Metrik: {count} sampel ditulis ke {args.metrics}", file=sys.stderr)
+
+
+def _run_command(api, args, collect_image_files):
+    try:
+        if args.command == 'extract':
+            return _run_extract(api, args, args.files)
+
+        if args.command == 'batch':
+            if not args.judul:
+                args.judul = os.path.basename(os.path.normpath(args.source))
+            return _run_extract(api, args, collect_image_files(args.source, recursive=args.recursive))
+
+        if args.command == 'match':
+            status = 0
+            for path in args.files:
+                try:
+                    _emit(api.match_file(path, top_k=args.top, candidates=args.candidates))
+                except OSError as e:
+                    _emit({'path': path, 'error': str(e)})
+                    status = 1
+            return status
+
+        if args.command == 'reindex':
+            summary = api.reindex(images=not args.no_images, remove_duplicates=not args.keep_duplicates)
+            _emit({'summary': summary})
+            return 0
+
+        if args.command == 'import':
+            summary = api.import_archives(api.resolve_user(args.user), uploads_dir=args.uploads, legacy_dir=args.legacy,
+                                          workers=args.workers, commit_every=args.commit_every,
+                                          retry_failed=args.retry_failed, limit=args.limit)
+            _emit({'summary': summary})
+            return 0 if not summary['counts'].get('failed') else 1
+
+        if args.command == 'scan':
+            min_age = None if args.min_age is None else args.min_age * 3600
+            summary = api.scan_store(mode=args.mode, min_age=min_age, restart=args.restart)
+            _emit({'summary': summary})
+            return 0
+    except ValueError as e:
+        _emit({'error': str(e)})
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import os
+import time
+
+import find_minutiae  # noqa: F401  (menambahkan folder aplikasi ke sys.path)
+from db_manager import init_db, get_user_id, save_history_batch, fetch_history_by_id, rebuild_triplet_index
+
+# =========================================================================
+# --- API HEADLESS: EKSTRAKSI, BATCH, PENCOCOKAN, REINDEX ---
+# =========================================================================
+# Memakai penyimpanan dan database yang sama dengan GUI (db_manager,
+# image_store, result_cache). Hasil per gambar berupa dict yang bisa langsung
+# ditulis sebagai JSON (lihat __main__.py untuk output JSON-lines).
+
+_db_ready = False
+
+
+def ensure_database():
+    """Menjalankan init_db sekali per proses (membuat tabel/index/migrasi jika perlu)."""
+    global _db_ready
+    if not _db_ready:
+        init_db()
+        _db_ready = True
+
+
+def resolve_user(username):
+    """user_id untuk username; ValueError jika user tidak ada."""
+    ensure_database()
+    user_id = get_user_id(username)
+    if user_id is None:
+        raise ValueError(f"User '{username}' tidak ditemukan di database.")
+    return user_id
+
+
+def _result_record(path, judul, result, seconds):
+    path_mentah, path_ekstraksi, minutiae, image_hash = result
+    return {
+        'path': path,
+        'judul_kasus': judul,
+        'status': 'ok' if path_mentah and path_ekstraksi else 'failed',
+        'path_mentah': path_mentah,
+        'path_ekstraksi': path_ekstraksi,
+        'image_hash': image_hash,
+        'minutiae': len(minutiae['x']) if minutiae is not None else 0,
+        'seconds': round(seconds, 4),
+    }, minutiae
+
+
+def _extract_one(path, judul):
+    """Ekstraksi satu file (dipanggil di proses worker pool)."""
+    from extraction import run_minutiae_extraction
+
+    start = time.perf_counter()
+    result = run_minutiae_extraction(path, judul)
+    return _result_record(path, judul, result, time.perf_counter() - start)
+
+
+def _iter_extracted(paths, juduls, workers, intra_op_threads=None, inter_op_threads=None):
+    """
+    (result, minutiae) per file, urut sesuai input. workers <= 1: satu proses
+    dengan pipeline bertahap (extraction_pipeline.py); workers > 1: worker pool
+    multi-proses (extraction_pool.py), satu Extractor per proses.
+    """
+    if workers <= 1:
+        from extraction_pipeline import ExtractionPipeline
+        pipeline = ExtractionPipeline()
+        last = time.perf_counter()
+        for (path, result), judul in zip(pipeline.run(paths, labels=juduls), juduls):
+            # Tahapan tumpang tindih: 'seconds' = jeda sejak hasil sebelumnya keluar
+            now = time.perf_counter()
+            yield _result_record(path, judul, result, now - last)
+            last = now
+        return
+
+    from extraction_pool import ExtractionPool
+    with ExtractionPool(_extract_one, workers=workers, intra_op_threads=intra_op_threads,
+                        inter_op_threads=inter_op_threads or 1) as pool:
+        yield from pool.imap(zip(paths, juduls))
+
+
+def extract_files(paths, judul=None, nomor_lp=None, tanggal_kejadian=None, user_id=None, save=True,
+                  workers=1, commit_every=100, intra_op_threads=None, inter_op_threads=None):
+    """
+    Generator hasil ekstraksi per file (dict, urut sesuai paths).
+
+    judul None -> nama file (tanpa ekstensi) dipakai sebagai judul kasus.
+    save=True menyimpan kasus ke history (user_id wajib) per commit_every gambar
+    dalam satu transaksi; hasil dikeluarkan setelah batch-nya tersimpan sehingga
+    history_id sudah terisi. intra_op_threads/inter_op_threads: thread TensorFlow
+    per worker (default: core dibagi rata antar worker).
+    """
+    ensure_database()
+    if save and user_id is None:
+        raise ValueError("user_id wajib diisi untuk menyimpan hasil ke history.")
+
+    paths = [os.fspath(p) for p in paths]
+    juduls = [judul or os.path.splitext(os.path.basename(p))[0] for p in paths]
+    pending = []
+
+    def _flush():
+        records = [(result, minutiae) for result, minutiae in pending if result['status'] == 'ok']
+        if save and records:
+            ids = save_history_batch([{
+                'judul_kasus': result['judul_kasus'],
+                'nomor_lp': nomor_lp,
+                'tanggal_kejadian': tanggal_kejadian,
+                'path_mentah': result['path_mentah'],
+                'path_ekstraksi': result['path_ekstraksi'],
+                'minutiae': minutiae,
+                'image_hash': result['image_hash'],
+            } for result, minutiae in records], user_id)
+            if not ids:
+                for result, _minutiae in records:
+                    result['status'] = 'failed'
+                    result['error'] = "Gagal menyimpan ke database"
+            for (result, _minutiae), history_id in zip(records, ids):
+                result['history_id'] = history_id
+        flushed = [result for result, _minutiae in pending]
+        pending.clear()
+        return flushed
+
+    for item in _iter_extracted(paths, juduls, workers, intra_op_threads, inter_op_threads):
+        pending.append(item)
+        if len(pending) >= commit_every:
+            yield from _flush()
+    yield from _flush()
+
+
+def match_file(path, top_k=10, candidates=None):
+    """
+    Identifikasi 1:N untuk gambar probe (tanpa menyimpan kasus baru).
+    candidates None -> default pre-filter matcher; 0 -> brute force seluruh gallery.
+    """
+    import matcher
+    from extraction import extract_probe_minutiae
+
+    ensure_database()
+    start = time.perf_counter()
+    minutiae, image_hash = extract_probe_minutiae(path)
+    kwargs = {} if candidates is None else {'candidates': candidates or None}
+    matches = matcher.identify(minutiae, top_k=top_k, **kwargs)
+    for match in matches:
+        row = fetch_history_by_id(match['history_id'])
+        match['judul_kasus'] = row['judul_kasus'] if row else None
+        match['nomor_lp'] = row['nomor_lp'] if row else None
+    return {
+        'path': path,
+        'image_hash': image_hash,
+        'minutiae': len(minutiae['x']),
+        'matches': matches,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+
+
+def reindex(images=True, remove_duplicates=True, progress_callback=None):
+    """
+    Membangun ulang index turunan: index triplet minutiae dan (jika images)
+    image_hash kasus lama beserta deduplikasi file (lihat image_store).
+    """
+    from image_store import backfill_image_hashes
+
+    ensure_database()
+    summary = {}
+    start = time.perf_counter()
+    summary['triplet_templates'] = rebuild_triplet_index()
+    if images:
+        summary['images'] = backfill_image_hashes(remove_duplicates=remove_duplicates,
+                                                  progress_callback=progress_callback)
+    summary['seconds'] = round(time.perf_counter() - start, 4)
+    return summary
+
+
+def import_archives(user_id, uploads_dir=None, legacy_dir=None, workers=2, commit_every=None, retry_failed=False,
+                    limit=None, progress_callback=None):
+    """
+    Impor massal arsip lama uploads/<judul>_<timestamp>/ dan file *_mentah.* lepas
+    di folder data (lihat bulk_import.py). Dapat dihentikan dan dilanjutkan: file
+    yang sudah tercatat di import_progress dilewati.
+    """
+    import bulk_import
+
+    ensure_database()
+    return bulk_import.run_bulk_import(
+        user_id,
+        uploads_dir=bulk_import.UPLOADS_DIR if uploads_dir is None else uploads_dir,
+        legacy_dir=bulk_import.DATA_DIR if legacy_dir is None else legacy_dir,
+        commit_every=commit_every or bulk_import.COMMIT_EVERY,
+        workers=workers, retry_failed=retry_failed, limit=limit, progress_callback=progress_callback)
+
+
+def scan_store(mode='report', min_age=None, restart=False, progress_callback=None):
+    """
+    Pemeriksaan integritas folder data vs history (lihat store_scanner.py), tanpa
+    throttle: file yatim dikarantina/dihapus/dilaporkan sesuai mode, overlay dan
+    thumbnail yang hilang dibuat ulang. Dilanjutkan dari checkpoint kecuali restart.
+    """
+    from store_scanner import StoreScanner, MIN_AGE_SECONDS
+
+    ensure_database()
+    start = time.perf_counter()
+    scanner = StoreScanner(mode=mode, min_age=MIN_AGE_SECONDS if min_age is None else min_age, busy=None,
+                           progress_callback=progress_callback)
+    summary = scanner.run(restart=restart)
+    summary['seconds'] = round(time.perf_counter() - start, 4)
+    return summary
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import threading
+
+from db_manager import (DATA_DIR, find_stored_image, fetch_unhashed_history, set_history_image, get_image_refcount,
+                        is_path_referenced)
+
+# =========================================================================
+# --- PENYIMPANAN GAMBAR CONTENT-ADDRESSED ---
+# =========================================================================
+# Gambar mentah disimpan berdasarkan hash KONTEN gambar grayscale hasil decode
+# (bukan byte file), sehingga upload ulang sidik jari yang sama (dengan nama,
+# format atau metadata berbeda) menghasilkan key yang sama:
+#   DATA_DIR/store/<2 karakter awal>/<hash>_mentah.png
+#   DATA_DIR/store/<2 karakter awal>/<hash>_<tag hasil>_ekstraksi.png
+# Baris history menyimpan image_hash; tabel image_store (db_manager) menghitung
+# referensinya. File hanya dihapus saat referensi terakhir dihapus.
+
+STORE_DIR = os.path.join(DATA_DIR, 'store')
+
+# Level kompresi zlib PNG (0-9). Level 1: encode ~4x lebih cepat dari default
+# PIL (level 6) dengan file hanya sedikit lebih besar untuk scan sidik jari.
+# FIND_MINUTIAE_PNG_COMPRESSION mengubahnya (misal 6-9 untuk arsip yang lebih kecil).
+PNG_COMPRESSION = int(os.environ.get('FIND_MINUTIAE_PNG_COMPRESSION', '1'))
+
+# fsync file (dan folder) sebelum/sesudah rename sehingga arsip yang sudah
+# dirujuk database tetap utuh setelah listrik padam. FIND_MINUTIAE_FSYNC=0
+# mematikannya (misal untuk benchmark di tmpfs).
+FSYNC = os.environ.get('FIND_MINUTIAE_FSYNC', '1') != '0'
+
+
+def image_hash(gray):
+    """SHA-256 (hex) dari gambar grayscale (array uint8 2D), termasuk ukurannya."""
+    digest = hashlib.sha256(f"{gray.shape[0]}x{gray.shape[1]}:".encode('ascii'))
+    digest.update(gray.tobytes())
+    return digest.hexdigest()
+
+
+def stored_paths(hash_hex, result_tag=None):
+    """
+    (path_mentah, path_ekstraksi) untuk gambar dengan hash ini di STORE_DIR.
+    result_tag membedakan overlay ekstraksi dari versi model/parameter berbeda
+    untuk gambar yang sama (gambar mentahnya tetap satu file).
+    """
+    folder = os.path.join(STORE_DIR, hash_hex[:2])
+    suffix = f"_{result_tag}" if result_tag else ""
+    return (os.path.join(folder, f"{hash_hex}_mentah.png"),
+            os.path.join(folder, f"{hash_hex}{suffix}_ekstraksi.png"))
+
+
+def _fsync_dir(folder):
+    """fsync entri folder (rename baru tahan crash setelah ini). Tidak didukung di Windows: dilewati."""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(data, path, sync=None):
+    """
+    Menulis bytes lewat file sementara + os.replace, sehingga pembaca (atau
+    ekstraksi paralel dengan gambar yang sama) tidak pernah melihat file
+    setengah tertulis. sync (default FSYNC): isi file di-fsync sebelum rename
+    dan folder sesudahnya.
+    """
+    if sync is None:
+        sync = FSYNC
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if sync:
+            _fsync_dir(folder)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def encode_png(array, compression=None):
+    """
+    PNG (bytes-like) dari array uint8 grayscale (H, W) atau BGR (H, W, 3), langsung
+    lewat cv2.imencode. compression None = PNG_COMPRESSION.
+    """
+    import cv2
+    if compression is None:
+        compression = PNG_COMPRESSION
+    ok, buffer = cv2.imencode('.png', array, [cv2.IMWRITE_PNG_COMPRESSION, int(compression)])
+    if not ok:
+        raise ValueError("Encode PNG gagal")
+    return buffer
+
+
+def save_array_atomic(array, path, compression=None, sync=None):
+    """Menyimpan array grayscale/BGR sebagai PNG secara atomik (tanpa salinan PIL)."""
+    _write_atomic(encode_png(array, compression), path, sync)
+
+
+def copy_file_atomic(source, path, sync=None):
+    """Menyalin file (misal overlay dari cache hasil) secara atomik ke path."""
+    with open(source, 'rb') as f:
+        data = f.read()
+    _write_atomic(data, path, sync)
+
+
+def remove_unreferenced(hash_hex, paths):
+    """Menghapus file (dan thumbnail-nya) jika tidak ada baris history yang memakai hash ini."""
+    from thumbnail_cache import remove_thumbnail
+
+    if get_image_refcount(hash_hex) > 0:
+        return False
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+        remove_thumbnail(path)
+    return True
+
+
+def backfill_image_hashes(remove_duplicates=True, progress_callback=None):
+    """
+    Mengisi image_hash untuk baris history lama. Baris pertama untuk setiap hash
+    menjadi gambar kanonik (file tetap di tempatnya); baris berikutnya dengan
+    gambar identik diarahkan ke file kanonik dan, jika remove_duplicates, file
+    duplikatnya dihapus bila tidak lagi dirujuk baris mana pun.
+
+    progress_callback(selesai, history_id) dipanggil per baris.
+    Mengembalikan dict ringkasan: hashed, duplicates, removed_files, missing.
+    """
+    import numpy as np
+    from PIL import Image
+    from thumbnail_cache import remove_thumbnail
+
+    summary = {'hashed': 0, 'duplicates': 0, 'removed_files': 0, 'missing': []}
+    done = 0
+    after_id = 0
+    while True:
+        rows = fetch_unhashed_history(after_id=after_id)
+        if not rows:
+            break
+        for row in rows:
+            after_id = row['id']
+            done += 1
+            try:
+                with Image.open(row['path_mentah']) as img:
+                    hash_hex = image_hash(np.asarray(img.convert("L")))
+            except (OSError, ValueError) as e:
+                print(f"Peringatan: Gambar kasus ID {row['id']} tidak bisa dibaca: {e}")
+                summary['missing'].append(row['id'])
+                continue
+
+            path_mentah, path_ekstraksi = row['path_mentah'], row['path_ekstraksi']
+            canonical = find_stored_image(hash_hex)
+            if canonical is not None:
+                path_mentah, path_ekstraksi = canonical['path_mentah'], canonical['path_ekstraksi']
+                summary['duplicates'] += 1
+
+            if set_history_image(row['id'], hash_hex, path_mentah, path_ekstraksi):
+                summary['hashed'] += 1
+                if canonical is not None and remove_duplicates:
+                    for old_path, new_path in ((row['path_mentah'], path_mentah), (row['path_ekstraksi'], path_ekstraksi)):
+                        # File lama bisa masih dirujuk baris lain yang belum di-backfill
+                        if old_path != new_path and os.path.exists(old_path) and not is_path_referenced(old_path):
+                            os.remove(old_path)
+                            remove_thumbnail(old_path)
+                            summary['removed_files'] += 1
+
+            if progress_callback:
+                progress_callback(done, row['id'])
+
+    print(f"DEBUG: Backfill image_hash: {summary['hashed']} baris, {summary['duplicates']} duplikat, "
+          f"{summary['removed_files']} file dihapus.")
+    return summary
@@ -1,14 +1,19 @@
+# Dicatat paling awal: dasar pengukuran waktu startup (lihat startup_timing.py)
+from startup_timing import mark, prewarm_async, format_startup_report
 import customtkinter as ctk
 import os
 from tkinter import messagebox
 
 # Import modul yang sudah dipisahkan
 from db_manager import init_db
+from metrics import measure
+from model_manager import warm_up_async
 from components.sidebar import Sidebar
 from pages.login_page import LoginPage
 from pages.home_page import HomePage
 from pages.cari_minutiae import CariMinutiaePage, HasilEkstraksiPage
 from pages.riwayat_page import RiwayatPencarianPage, DetailPage, EditPage
+from pages.diagnostik_page import DiagnostikPage
 
 # --- KONFIGURASI APLIKASI ---
 ctk.set_appearance_mode("Dark")
@@ -20,6 +25,7 @@ WIDTH = 1280
 HEIGHT = 720
 ICON_PATH = "assets/icon.png"
 DUMMY_IMAGE_PATH = "assets/fingerprint_dummy.jpg"
+SCAN_START_DELAY_MS = 60 * 1000 # Jeda setelah login sebelum pemeriksaan integritas mulai
 
 # Pastikan folder assets dan images ada
 os.makedirs("images", exist_ok=True)
@@ -64,8 +70,21 @@ class App(ctk.CTk):
         self.container.grid_columnconfigure(0, weight=1)
         
         self.show_frame("Login")
+        # Stack ML (NumPy/OpenCV/TensorFlow) baru dimuat setelah jendela tampil
+        self.after_idle(self._on_first_frame)
+
+    def _on_first_frame(self):
+        """Dipanggil setelah halaman login pertama kali digambar."""
+        mark('first_frame')
+        print(f"STARTUP: {format_startup_report()}")
+        prewarm_async()
 
     def show_frame(self, page_name, data=None):
+        # Waktu membuat/memuat halaman dicatat per halaman (lihat halaman Diagnostik)
+        with measure(f"page.{page_name}"):
+            self._show_frame(page_name, data)
+
+    def _show_frame(self, page_name, data=None):
         
         if page_name not in self.frames:
             # Peta Halaman: Membuat instance frame jika belum ada
@@ -83,6 +102,8 @@ class App(ctk.CTk):
                 frame = DetailPage(parent=self.container, controller=self)
             elif page_name == "EditPage":
                 frame = EditPage(parent=self.container, controller=self)
+            elif page_name == "Diagnostik":
+                frame = DiagnostikPage(parent=self.container, controller=self)
             else:
                 return 
             
@@ -126,8 +147,16 @@ class App(ctk.CTk):
     def login_success(self, user_id):
         """Dipanggil setelah login berhasil."""
         self.logged_in_user_id = user_id
+        # Muat model Fingerflow di background agar ekstraksi pertama tidak menunggu
+        warm_up_async()
+        # Pemeriksaan integritas folder data (throttled, berhenti selama ekstraksi), lihat store_scanner.py
+        self.after(SCAN_START_DELAY_MS, self._start_integrity_scan)
         self.show_frame("Home")
         
+    def _start_integrity_scan(self):
+        from store_scanner import start_background_scan
+        start_background_scan()
+
     def logout(self):
         """Log out user dan kembali ke halaman login."""
         # Pindah ke Login dan hapus sidebar
@@ -0,0 +1,283 @@
+import threading
+
+import numpy as np
+
+from db_manager import get_db_connection, iter_minutiae_templates, load_minutiae, query_triplet_candidates
+from triplet_index import probe_hashes
+
+# =========================================================================
+# --- PENCOCOKAN MINUTIAE 1:N ---
+# =========================================================================
+# Skor dihitung dengan alignment berbasis pasangan minutiae (Hough):
+#   1. Voting rotasi dari selisih sudut semua pasangan (probe, template).
+#   2. Voting translasi dari pasangan yang konsisten dengan rotasi terbaik,
+#      lalu rotasi & translasi diperhalus dari pasangan inlier.
+#   3. Hitung pasangan yang cocok setelah transformasi (toleransi jarak & sudut).
+# Semua langkah divektorisasi NumPy untuk satu blok template sekaligus
+# (array B x P x M), sehingga tidak ada loop Python per template.
+# Skor akhir = pasangan_cocok^2 / (jumlah_probe * jumlah_template).
+
+# Jumlah minutiae maksimum per template/probe (diambil yang skornya tertinggi)
+MAX_MINUTIAE = 80
+
+# Toleransi pencocokan
+DISTANCE_TOLERANCE = 15.0           # piksel
+ANGLE_TOLERANCE = np.deg2rad(20.0)  # radian
+
+# Resolusi voting alignment
+ROTATION_BINS = 36                  # 10 derajat per bin
+TRANSLATION_CELL = 24.0             # piksel per sel voting translasi (kasar, diperhalus lewat inlier)
+
+# Jumlah template yang diproses per blok (membatasi memori array B x P x M)
+BLOCK_SIZE = 256
+
+# Jumlah kandidat dari index triplet yang diteruskan ke skoring penuh
+PREFILTER_CANDIDATES = 300
+
+
+def _select_top(minutiae, limit=MAX_MINUTIAE):
+    """Ambil maksimal `limit` minutiae dengan skor tertinggi sebagai (x, y, angle) float32."""
+    x = np.asarray(minutiae['x'], dtype=np.float32)
+    y = np.asarray(minutiae['y'], dtype=np.float32)
+    a = np.asarray(minutiae['angle'], dtype=np.float32)
+    if len(x) > limit:
+        order = np.argsort(-np.asarray(minutiae['score']), kind='stable')[:limit]
+        x, y, a = x[order], y[order], a[order]
+    return x, y, a
+
+
+class TemplateGallery:
+    """
+    Seluruh template tersimpan dalam array padat (N x MAX_MINUTIAE) + mask,
+    siap untuk pencocokan tervektorisasi.
+    """
+
+    def __init__(self, ids, xs, ys, angles, counts, signature=None):
+        self.ids = ids              # (N,) int64 history_id
+        self.xs = xs                # (N, M) float32
+        self.ys = ys
+        self.angles = angles
+        self.counts = counts        # (N,) int32 jumlah minutiae valid
+        self.mask = np.arange(xs.shape[1])[None, :] < counts[:, None]
+        self.angle_bins = _angle_bins(angles)
+        # Jangkauan koordinat (untuk membatasi grid voting translasi)
+        self.extent = float(max(np.abs(xs).max(initial=0.0), np.abs(ys).max(initial=0.0)))
+        self.signature = signature
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_templates(cls, templates, signature=None, limit=MAX_MINUTIAE):
+        """templates: iterable (history_id, minutiae dict)."""
+        ids, rows = [], []
+        for history_id, minutiae in templates:
+            ids.append(history_id)
+            rows.append(_select_top(minutiae, limit))
+
+        n = len(ids)
+        xs = np.zeros((n, limit), dtype=np.float32)
+        ys = np.zeros((n, limit), dtype=np.float32)
+        angles = np.zeros((n, limit), dtype=np.float32)
+        counts = np.zeros(n, dtype=np.int32)
+        for i, (x, y, a) in enumerate(rows):
+            k = len(x)
+            xs[i, :k], ys[i, :k], angles[i, :k] = x, y, a
+            counts[i] = k
+        return cls(np.asarray(ids, dtype=np.int64), xs, ys, angles, counts, signature)
+
+    def subset(self, history_ids):
+        """Gallery baru yang hanya berisi history_id tertentu (urutan mengikuti gallery)."""
+        keep = np.isin(self.ids, np.asarray(list(history_ids), dtype=np.int64))
+        return TemplateGallery(self.ids[keep], self.xs[keep], self.ys[keep], self.angles[keep], self.counts[keep])
+
+
+# --- Cache gallery per proses (dimuat ulang jika isi minutiae_template berubah) ---
+_gallery = None
+_gallery_lock = threading.Lock()
+
+
+def _templates_signature():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*), MAX(history_id), SUM(history_id) FROM minutiae_template")
+    signature = tuple(cursor.fetchone())
+    return signature
+
+
+def get_gallery(refresh=False):
+    """Mengembalikan TemplateGallery seluruh kasus; hanya dibangun ulang jika data berubah."""
+    global _gallery
+    signature = _templates_signature()
+    with _gallery_lock:
+        if refresh or _gallery is None or _gallery.signature != signature:
+            _gallery = TemplateGallery.from_templates(iter_minutiae_templates(), signature=signature)
+        return _gallery
+
+
+def _angle_bins(angles):
+    """Kuantisasi sudut (radian) ke indeks bin rotasi 0..ROTATION_BINS-1 (int16)."""
+    a = np.asarray(angles, dtype=np.float32)
+    return (np.floor((a + np.pi) * (ROTATION_BINS / (2 * np.pi))).astype(np.int16)) % ROTATION_BINS
+
+
+def _best_translation_cells(keys, cells, B):
+    """
+    Voting translasi: keys = (b * cells + qx) * cells + qy untuk setiap pasangan.
+    Grid vote per template dihaluskan 3x3 (toleransi +/- 1 sel) secara separabel,
+    lalu dipilih sel terbaik per template. Mengembalikan (qx, qy) terbaik (B,).
+    """
+    votes = np.bincount(keys, minlength=B * cells * cells).astype(np.int16).reshape(B, cells, cells)
+    rows = votes.copy()
+    rows[:, 1:, :] += votes[:, :-1, :]
+    rows[:, :-1, :] += votes[:, 1:, :]
+    smooth = rows.copy()
+    smooth[:, :, 1:] += rows[:, :, :-1]
+    smooth[:, :, :-1] += rows[:, :, 1:]
+    best = np.argmax(smooth.reshape(B, -1), axis=1)
+    return best // cells, best % cells
+
+
+def _pair_offsets(px, py, tx, ty, rot, b_idx, p_idx, m_idx):
+    """Translasi (dx, dy) yang dibutuhkan tiap pasangan setelah probe diputar `rot` (per template)."""
+    cos_r, sin_r = np.cos(rot)[:, None], np.sin(rot)[:, None]
+    rx = (cos_r * px[None, :] - sin_r * py[None, :]).astype(np.float32)  # (B, P)
+    ry = (sin_r * px[None, :] + cos_r * py[None, :]).astype(np.float32)
+    return tx[b_idx, m_idx] - rx[b_idx, p_idx], ty[b_idx, m_idx] - ry[b_idx, p_idx]
+
+
+def _score_block(px, py, pa, pbins, tx, ty, ta, tbins, tmask, t_min, cells):
+    """
+    Skor satu blok template. Probe: (P,), template: (B, M).
+    Sudut sudah dikuantisasi ke bin rotasi sehingga voting rotasi cukup
+    memakai aritmetika integer. Hanya pasangan yang konsisten sudutnya yang
+    diproses pada tahap translasi dan verifikasi.
+    Mengembalikan (skor (B,), jumlah pasangan cocok (B,)).
+    """
+    B, M = tx.shape
+    P = len(px)
+
+    # 1. Voting rotasi: selisih bin sudut semua pasangan (B, P, M).
+    # rot_bin disimpan "tanpa modulo" di rentang [0, 2*ROTATION_BINS) agar tetap int16;
+    # bin sebenarnya = rot_bin % ROTATION_BINS (dilipat setelah bincount).
+    rot_bin = tbins[:, None, :] + (ROTATION_BINS - pbins)[None, :, None]
+    pair_mask = np.broadcast_to(tmask[:, None, :], rot_bin.shape)
+    flat = (np.arange(B, dtype=np.int32)[:, None, None] * (2 * ROTATION_BINS) + rot_bin)[pair_mask]
+    votes = np.bincount(flat, minlength=B * 2 * ROTATION_BINS).reshape(B, 2, ROTATION_BINS).sum(axis=1)
+    # Smoothing sirkular (toleransi rotasi +/- 1 bin)
+    votes = votes + np.roll(votes, 1, axis=1) + np.roll(votes, -1, axis=1)
+    best_bin = np.argmax(votes, axis=1)                               # (B,)
+
+    # Pasangan yang sudutnya konsisten dengan rotasi terbaik (+/- 1 bin), lewat tabel lookup
+    consistent = np.zeros((B, 2 * ROTATION_BINS), dtype=bool)
+    for offset in (-1, 0, 1):
+        target = (best_bin + offset) % ROTATION_BINS
+        consistent[np.arange(B), target] = True
+        consistent[np.arange(B), target + ROTATION_BINS] = True
+    ang_ok = np.take_along_axis(consistent, rot_bin.reshape(B, -1).astype(np.intp), axis=1).reshape(rot_bin.shape)
+    ang_ok &= pair_mask
+    b_idx, p_idx, m_idx = np.nonzero(ang_ok)
+    if len(b_idx) == 0:
+        return np.zeros(B, dtype=np.float32), np.zeros(B, dtype=np.int64)
+
+    dtheta = ta[b_idx, m_idx] - pa[p_idx]
+    coarse_rot = best_bin * (2 * np.pi / ROTATION_BINS)
+
+    # 2. Rotasi probe (sudah dipusatkan di centroid) sesuai hipotesis kasar, lalu voting translasi
+    dx, dy = _pair_offsets(px, py, tx, ty, coarse_rot, b_idx, p_idx, m_idx)
+    qx = np.clip(((dx - t_min) / TRANSLATION_CELL).astype(np.int64), 0, cells - 1)
+    qy = np.clip(((dy - t_min) / TRANSLATION_CELL).astype(np.int64), 0, cells - 1)
+    best_qx, best_qy = _best_translation_cells((b_idx * cells + qx) * cells + qy, cells, B)
+
+    # Inlier = pasangan yang memilih sel terbaik (+/- 1 sel). Dari inlier ini rotasi
+    # diperhalus (rata-rata sirkular selisih sudut) lalu translasi dihitung ulang.
+    inlier = (np.abs(qx - best_qx[b_idx]) <= 1) & (np.abs(qy - best_qy[b_idx]) <= 1)
+    ib = b_idx[inlier]
+    n_in = np.bincount(ib, minlength=B)
+    sin_sum = np.bincount(ib, weights=np.sin(dtheta[inlier]), minlength=B)
+    cos_sum = np.bincount(ib, weights=np.cos(dtheta[inlier]), minlength=B)
+    best_rot = np.where(n_in > 0, np.arctan2(sin_sum, cos_sum), coarse_rot)
+
+    dx, dy = _pair_offsets(px, py, tx, ty, best_rot, b_idx, p_idx, m_idx)
+    denom_in = np.maximum(n_in, 1)
+    best_tx = (np.bincount(ib, weights=dx[inlier], minlength=B) / denom_in).astype(np.float32)
+    best_ty = (np.bincount(ib, weights=dy[inlier], minlength=B) / denom_in).astype(np.float32)
+
+    # 3. Terapkan transformasi, hitung pasangan dalam toleransi jarak & sudut
+    # (selisih sudut terhadap rotasi hasil penghalusan, dinormalisasi ke [-pi, pi))
+    ex = dx - best_tx[b_idx]
+    ey = dy - best_ty[b_idx]
+    eang = (dtheta - best_rot[b_idx] + np.pi) % (2 * np.pi) - np.pi
+    hit = ((ex * ex + ey * ey) < DISTANCE_TOLERANCE ** 2) & (np.abs(eang) <= ANGLE_TOLERANCE)
+    hit_t = np.zeros((B, M), dtype=bool)
+    hit_t[b_idx[hit], m_idx[hit]] = True
+    hit_p = np.zeros((B, P), dtype=bool)
+    hit_p[b_idx[hit], p_idx[hit]] = True
+    matched = np.minimum(hit_t.sum(axis=1), hit_p.sum(axis=1))
+
+    n_t = tmask.sum(axis=1)
+    denom = np.maximum(P * n_t, 1)
+    scores = (matched.astype(np.float32) ** 2) / denom
+    return scores, matched
+
+
+def match_probe(probe_minutiae, gallery=None, top_k=20, exclude_ids=()):
+    """
+    Membandingkan minutiae probe dengan seluruh template di gallery.
+    Mengembalikan list kandidat terurut [{'history_id', 'score', 'matched'}, ...]
+    sepanjang maksimal top_k (skor 0 diabaikan).
+    """
+    if gallery is None:
+        gallery = get_gallery()
+    px, py, pa = _select_top(probe_minutiae)
+    if len(px) == 0 or len(gallery) == 0:
+        return []
+
+    pbins = _angle_bins(pa)
+    # Rotasi dilakukan terhadap centroid probe agar galat rotasi kecil tidak
+    # menggeser minutiae yang jauh dari titik asal
+    px = px - px.mean()
+    py = py - py.mean()
+    # Rentang translasi yang mungkin: [-radius probe, jangkauan template + radius probe]
+    radius = float(np.sqrt(px ** 2 + py ** 2).max())
+    t_min = -radius - TRANSLATION_CELL
+    cells = int(np.ceil((gallery.extent + 2 * radius + 2 * TRANSLATION_CELL) / TRANSLATION_CELL)) + 1
+
+    scores = np.zeros(len(gallery), dtype=np.float32)
+    matched = np.zeros(len(gallery), dtype=np.int64)
+    for start in range(0, len(gallery), BLOCK_SIZE):
+        sl = slice(start, start + BLOCK_SIZE)
+        scores[sl], matched[sl] = _score_block(px, py, pa, pbins, gallery.xs[sl], gallery.ys[sl], gallery.angles[sl],
+                                               gallery.angle_bins[sl], gallery.mask[sl], t_min, cells)
+
+    if exclude_ids:
+        scores[np.isin(gallery.ids, np.asarray(list(exclude_ids), dtype=np.int64))] = 0
+
+    top_k = min(top_k, len(gallery))
+    order = np.argpartition(-scores, top_k - 1)[:top_k]
+    order = order[np.argsort(-scores[order], kind='stable')]
+    return [
+        {'history_id': int(gallery.ids[i]), 'score': float(scores[i]), 'matched': int(matched[i])}
+        for i in order if scores[i] > 0
+    ]
+
+
+def identify(probe_minutiae, top_k=20, candidates=PREFILTER_CANDIDATES, exclude_ids=()):
+    """
+    Identifikasi 1:N dengan pre-filter: index triplet memilih `candidates` kasus
+    teratas, lalu hanya kasus itu yang diskor penuh oleh match_probe.
+    candidates=None -> skoring penuh ke seluruh gallery (brute force).
+    """
+    gallery = get_gallery()
+    if candidates is not None and len(gallery) > candidates:
+        shortlist = [hid for hid, _votes in query_triplet_candidates(probe_hashes(probe_minutiae), limit=candidates + len(exclude_ids))]
+        gallery = gallery.subset(shortlist)
+    return match_probe(probe_minutiae, gallery=gallery, top_k=top_k, exclude_ids=exclude_ids)
+
+
+def match_history(history_id, top_k=20):
+    """Mencari kasus lain yang paling mirip dengan template kasus history_id."""
+    probe = load_minutiae(history_id)
+    if probe is None:
+        return []
+    return identify(probe, top_k=top_k, exclude_ids=(history_id,))
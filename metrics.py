@@ -0,0 +1,187 @@
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from model_manager import get_rss_bytes
+
+# =========================================================================
+# --- METRIK PER TAHAP (PROFILING RINGAN) ---
+# =========================================================================
+# Waktu (wall clock) dan perubahan memori proses (RSS) per tahap: loading
+# model, decode, ROI, inferensi per jaringan Fingerflow, render overlay,
+# encode PNG, thumbnail, cache hasil, fungsi database dan loading halaman.
+# Sampel disimpan di memori proses dalam buffer bergulir (MAX_SAMPLES
+# terakhir), ditampilkan di halaman Diagnostik dan bisa diekspor JSON/CSV.
+# Biaya per sampel: dua pembacaan RSS (/proc) + perf_counter (puluhan us).
+# FIND_MINUTIAE_METRICS=0 mematikan pencatatan.
+
+MAX_SAMPLES = 5000
+ENABLED = os.environ.get('FIND_MINUTIAE_METRICS', '1') != '0'
+
+# Kolom sampel (urutan juga dipakai untuk ekspor CSV)
+FIELDS = ('timestamp', 'stage', 'seconds', 'rss_delta_bytes', 'rss_bytes', 'label', 'thread')
+
+_samples = deque(maxlen=MAX_SAMPLES)
+_lock = threading.Lock()
+
+
+def record(stage, seconds, rss_before=None, label=None):
+    """Mencatat satu sampel. rss_before (byte) opsional: selisih dengan RSS sekarang ikut dicatat."""
+    if not ENABLED:
+        return
+    rss = get_rss_bytes()
+    delta = rss - rss_before if rss is not None and rss_before is not None else None
+    sample = (time.time(), stage, seconds, delta, rss, label, threading.current_thread().name)
+    with _lock:
+        _samples.append(sample)
+
+
+@contextmanager
+def measure(stage, label=None):
+    """
+    with measure('decode', label=path):
+        ...
+    Dicatat juga jika blok melempar exception (waktu sampai gagal).
+    """
+    if not ENABLED:
+        yield
+        return
+    rss_before = get_rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, rss_before, label)
+
+
+def timed(stage):
+    """Decorator: setiap panggilan fungsi dicatat sebagai satu sampel stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_extractor(extractor):
+    """
+    Membungkus predict() setiap jaringan di dalam Extractor Fingerflow (atribut
+    yang punya predict, sampai dua tingkat) sehingga waktu per jaringan tercatat
+    sebagai 'inference.<nama atribut>'. Mengembalikan daftar stage yang dipasang.
+    """
+    installed = []
+
+    def _wrap(owner, name):
+        predict = getattr(owner, 'predict', None)
+        if not callable(predict) or getattr(predict, '_metrics_stage', None):
+            return False
+        stage = "inference." + name.rsplit('__', 1)[-1].strip('_')
+
+        @functools.wraps(predict)
+        def _timed_predict(*args, **kwargs):
+            with measure(stage):
+                return predict(*args, **kwargs)
+        _timed_predict._metrics_stage = stage
+        try:
+            setattr(owner, 'predict', _timed_predict)
+        except (AttributeError, TypeError):
+            return False
+        installed.append(stage)
+        return True
+
+    for name, value in list(vars(extractor).items()):
+        if _wrap(value, name):
+            continue
+        # Pembungkus (misal kelas CoarseNet) yang menyimpan model Keras di atributnya
+        for inner in list(getattr(value, '__dict__', {}).values()):
+            if _wrap(inner, name):
+                break
+    return installed
+
+
+def clear():
+    """Menghapus semua sampel."""
+    with _lock:
+        _samples.clear()
+
+
+def get_samples(stage=None):
+    """List sampel (dict dengan kolom FIELDS), terlama dulu. stage: filter prefix (misal 'db.')."""
+    with _lock:
+        samples = list(_samples)
+    rows = [dict(zip(FIELDS, sample)) for sample in samples]
+    if stage:
+        rows = [row for row in rows if row['stage'].startswith(stage)]
+    return rows
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_summary():
+    """
+    Ringkasan per stage (urut total waktu terbesar): count, total_seconds,
+    mean_ms, p50_ms, p95_ms, max_ms dan mean_rss_delta_mb.
+    """
+    groups = {}
+    for row in get_samples():
+        groups.setdefault(row['stage'], []).append(row)
+
+    summary = []
+    for stage, rows in groups.items():
+        seconds = sorted(row['seconds'] for row in rows)
+        deltas = [row['rss_delta_bytes'] for row in rows if row['rss_delta_bytes'] is not None]
+        summary.append({
+            'stage': stage,
+            'count': len(rows),
+            'total_seconds': sum(seconds),
+            'mean_ms': sum(seconds) / len(seconds) * 1000,
+            'p50_ms': _percentile(seconds, 0.5) * 1000,
+            'p95_ms': _percentile(seconds, 0.95) * 1000,
+            'max_ms': seconds[-1] * 1000,
+            'mean_rss_delta_mb': sum(deltas) / len(deltas) / (1024 * 1024) if deltas else None,
+        })
+    summary.sort(key=lambda entry: entry['total_seconds'], reverse=True)
+    return summary
+
+
+def export_json(path):
+    """Menulis ringkasan + seluruh sampel ke file JSON. Mengembalikan jumlah sampel."""
+    samples = get_samples()
+    report = {
+        'exported_at': time.time(),
+        'pid': os.getpid(),
+        'summary': get_summary(),
+        'samples': samples,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return len(samples)
+
+
+def export_csv(path):
+    """Menulis seluruh sampel ke file CSV (satu baris per sampel). Mengembalikan jumlah sampel."""
+    samples = get_samples()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(samples)
+    return len(samples)
+
+
+def export(path):
+    """Ekspor berdasarkan ekstensi file: .csv -> CSV, selain itu JSON."""
+    if path.lower().endswith('.csv'):
+        return export_csv(path)
+    return export_json(path)
@@ -0,0 +1,120 @@
+import numpy as np
+import cv2
+
+from minutiae_store import MINUTIAE_CLASSES
+
+# =========================================================================
+# --- VISUALISASI MINUTIAE (VEKTORISASI) ---
+# =========================================================================
+# Seluruh minutiae digambar sekaligus dengan operasi NumPy: koordinat piksel
+# setiap penanda (lingkaran) dan garis arah dihitung sebagai array lalu
+# diwarnai dengan satu assignment fancy-indexing, tanpa loop per baris.
+# Gambar bisa dirender di resolusi penuh (arsip) maupun langsung di resolusi
+# tampilan (thumbnail halaman) tanpa merender penuh lalu mengecilkan.
+
+# Warna per kelas (RGB), indeks = kode kelas di minutiae_store.MINUTIAE_CLASSES
+CLASS_COLORS = {
+    'ending': (255, 0, 0),          # Merah
+    'bifurcation': (0, 120, 255),   # Biru
+    'fragment': (255, 200, 0),      # Kuning
+    'enclosure': (0, 200, 0),       # Hijau
+    'crossbar': (255, 0, 255),      # Magenta
+    'other': (0, 220, 220),         # Cyan
+}
+UNKNOWN_COLOR = (255, 128, 0)       # Kelas tidak diketahui (-1)
+
+MARKER_RADIUS = 5       # Radius lingkaran penanda di resolusi penuh (piksel)
+TICK_LENGTH = 15        # Panjang garis arah di resolusi penuh (piksel)
+MIN_MARKER_RADIUS = 2   # Batas bawah saat dirender kecil (thumbnail) agar tetap terlihat
+MIN_TICK_LENGTH = 5
+
+_PALETTE = np.array([CLASS_COLORS[name] for name in MINUTIAE_CLASSES] + [UNKNOWN_COLOR], dtype=np.uint8)
+_PALETTE_BGR = np.ascontiguousarray(_PALETTE[:, ::-1]) # Untuk kanvas yang langsung di-encode cv2
+
+
+def _ring_offsets(radius):
+    """Offset (dy, dx) piksel cincin lingkaran tebal ~1.5 px di sekitar titik pusat."""
+    r = int(np.ceil(radius))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    dist = np.hypot(dx, dy)
+    ring = (dist <= radius + 0.5) & (dist >= radius - 1.0)
+    return dy[ring], dx[ring]
+
+
+def _tick_offsets(angle, length):
+    """Titik-titik garis arah (N, L) dari pusat minutia searah angle (radian)."""
+    steps = np.arange(1, int(round(length)) + 1, dtype=np.float32)
+    return np.cos(angle)[:, None] * steps[None, :], np.sin(angle)[:, None] * steps[None, :]
+
+
+def _paint(canvas, ys, xs, colors):
+    """Mewarnai piksel (ys, xs) yang berada di dalam kanvas. colors: (N, 3) per piksel."""
+    h, w = canvas.shape[:2]
+    inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+    canvas[ys[inside], xs[inside]] = colors[inside]
+
+
+def render_minutiae(gray, minutiae, max_size=None, out=None, source_scale=1.0, bgr=False):
+    """
+    Menggambar minutiae (dict kolom, lihat minutiae_store.py) di atas gambar
+    grayscale 2D (uint8). Mengembalikan array RGB (H, W, 3) uint8, atau BGR
+    jika bgr=True (urutan channel cv2.imencode, tanpa konversi saat disimpan).
+
+    max_size (lebar, tinggi) opsional: gambar diperkecil dulu (INTER_AREA) dan
+    koordinat minutiae diskalakan, sehingga penanda dirender tajam di resolusi
+    tampilan. Tanpa max_size dirender di resolusi penuh untuk arsip.
+
+    out (opsional): array (H, W, 3) uint8 yang sudah dialokasikan untuk kanvas
+    (dipakai ulang antar gambar berukuran sama; digambar di tempat).
+    source_scale: rasio ukuran gray terhadap gambar asal koordinat minutiae
+    (< 1 jika gray sudah diperkecil saat decode).
+    """
+    gray = np.asarray(gray)
+    if gray.ndim == 3:
+        gray = gray[..., 0]
+
+    scale = source_scale
+    if max_size is not None:
+        h, w = gray.shape
+        resize = min(1.0, max_size[0] / float(w), max_size[1] / float(h))
+        if resize < 1.0:
+            size = (max(1, int(round(w * resize))), max(1, int(round(h * resize))))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+            scale *= resize
+
+    # GRAY2RGB jauh lebih cepat daripada broadcast NumPy ke 3 channel
+    gray = np.ascontiguousarray(gray, dtype=np.uint8)
+    if out is not None and out.shape != gray.shape + (3,):
+        out = None
+    out = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR if bgr else cv2.COLOR_GRAY2RGB, dst=out)
+
+    count = 0 if minutiae is None else len(minutiae['x'])
+    if count == 0:
+        return out
+
+    x = np.asarray(minutiae['x'], dtype=np.float32) * scale
+    y = np.asarray(minutiae['y'], dtype=np.float32) * scale
+    angle = np.asarray(minutiae['angle'], dtype=np.float32)
+    codes = np.asarray(minutiae['class'], dtype=np.int64)
+    codes = np.where((codes >= 0) & (codes < len(MINUTIAE_CLASSES)), codes, len(MINUTIAE_CLASSES))
+    colors = (_PALETTE_BGR if bgr else _PALETTE)[codes]            # (N, 3)
+
+    radius = max(MARKER_RADIUS * scale, MIN_MARKER_RADIUS)
+    length = max(TICK_LENGTH * scale, MIN_TICK_LENGTH)
+    cx = np.rint(x).astype(np.int64)
+    cy = np.rint(y).astype(np.int64)
+
+    # Garis arah dimulai dari tepi lingkaran agar titik pusat tetap terlihat
+    tdx, tdy = _tick_offsets(angle, length + radius)
+    start = int(round(radius))
+    tx = np.rint(x[:, None] + tdx[:, start:]).astype(np.int64)
+    ty = np.rint(y[:, None] + tdy[:, start:]).astype(np.int64)
+    _paint(out, ty.ravel(), tx.ravel(), np.repeat(colors, tx.shape[1], axis=0))
+
+    # Lingkaran penanda: offset cincin dibroadcast ke seluruh pusat sekaligus
+    ry, rx = _ring_offsets(radius)
+    py = (cy[:, None] + ry[None, :]).ravel()
+    px = (cx[:, None] + rx[None, :]).ravel()
+    _paint(out, py, px, np.repeat(colors, len(ry), axis=0))
+    return out
+
@@ -0,0 +1,86 @@
+import numpy as np
+
+# =========================================================================
+# --- FORMAT PENYIMPANAN MINUTIAE (KOLUMNAR) ---
+# =========================================================================
+# Minutiae hasil Fingerflow disimpan per kasus sebagai satu BLOB kolumnar:
+# seluruh x, lalu seluruh y, angle, score (float32) dan class (int8).
+# 17 byte per minutia, dibaca kembali tanpa parsing (np.frombuffer).
+
+# Urutan dan tipe kolom di dalam BLOB (JANGAN diubah tanpa migrasi data)
+TEMPLATE_COLUMNS = (
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('angle', '<f4'),
+    ('score', '<f4'),
+    ('class', 'i1'),
+)
+
+# Label kelas ClassifyNet (6 kelas); kode = indeks di tuple ini, -1 = tidak diketahui
+MINUTIAE_CLASSES = ('ending', 'bifurcation', 'fragment', 'enclosure', 'crossbar', 'other')
+
+
+def empty_minutiae():
+    """Template kosong (0 minutiae) dengan kolom lengkap."""
+    return {name: np.zeros(0, dtype=dtype) for name, dtype in TEMPLATE_COLUMNS}
+
+
+def _class_codes(values):
+    """Mengubah kolom class (string label atau angka) menjadi kode int8."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        return np.nan_to_num(values.astype(np.float64), nan=-1).astype(np.int8)
+
+    lookup = {label: code for code, label in enumerate(MINUTIAE_CLASSES)}
+    codes = np.full(len(values), -1, dtype=np.int8)
+    for i, value in enumerate(values):
+        codes[i] = lookup.get(str(value).strip().lower(), -1)
+    return codes
+
+
+def minutiae_from_dataframe(minutiae_df):
+    """
+    Mengubah DataFrame minutiae Fingerflow menjadi dict kolom NumPy
+    (x, y, angle, score, class). Kolom yang tidak ada diisi 0 (class: -1).
+    """
+    if minutiae_df is None or len(minutiae_df) == 0:
+        return empty_minutiae()
+
+    n = len(minutiae_df)
+    result = {}
+    for name, dtype in TEMPLATE_COLUMNS:
+        if name == 'class':
+            result[name] = _class_codes(minutiae_df[name].values) if name in minutiae_df else np.full(n, -1, dtype=dtype)
+        elif name in minutiae_df:
+            result[name] = minutiae_df[name].values.astype(dtype)
+        else:
+            result[name] = np.zeros(n, dtype=dtype)
+    return result
+
+
+def minutiae_to_dataframe(minutiae):
+    """Mengubah dict kolom kembali menjadi DataFrame (untuk visualisasi/analisis)."""
+    import pandas as pd
+    return pd.DataFrame({name: minutiae[name] for name, _dtype in TEMPLATE_COLUMNS})
+
+
+def minutiae_count(minutiae):
+    return 0 if minutiae is None else len(minutiae['x'])
+
+
+def pack_minutiae(minutiae):
+    """Serialisasi dict kolom menjadi BLOB kolumnar. Mengembalikan (jumlah, bytes)."""
+    count = minutiae_count(minutiae)
+    blob = b''.join(np.ascontiguousarray(minutiae[name], dtype=dtype).tobytes() for name, dtype in TEMPLATE_COLUMNS)
+    return count, blob
+
+
+def unpack_minutiae(count, blob):
+    """Kebalikan pack_minutiae: BLOB -> dict kolom NumPy (read-only view, tanpa salinan)."""
+    result = {}
+    offset = 0
+    for name, dtype in TEMPLATE_COLUMNS:
+        dt = np.dtype(dtype)
+        result[name] = np.frombuffer(blob, dtype=dt, count=count, offset=offset)
+        offset += dt.itemsize * count
+    return result
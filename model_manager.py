@@ -0,0 +1,211 @@
+import os
+import sys
+import threading
+import time
+
+# =========================================================================
+# --- PENGELOLA MODEL FINGERFLOW (RESIDENT EXTRACTOR) ---
+# =========================================================================
+# Extractor Fingerflow memuat empat model (CoarseNet, FineNet, ClassifyNet,
+# CoreNet) yang butuh beberapa detik. Modul ini menyimpan SATU instance per
+# proses sehingga biaya loading hanya dibayar sekali.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Folder untuk model Fingerflow (.h5), bisa diganti lewat environment
+MODEL_DIR = os.environ.get('FIND_MINUTIAE_MODEL_DIR') or os.path.join(BASE_DIR, 'models')
+
+MODEL_FILES = {
+    'coarse_net_path': 'CoarseNet.h5',
+    'fine_net_path': 'FineNet.h5',
+    'classify_net_path': 'ClassifyNet_6_classes.h5',
+    'core_net_path': 'CoreNet.weights',
+}
+
+_extractor = None
+_lock = threading.Lock()
+_warmup_thread = None
+
+# Jumlah thread TensorFlow (None = default TF: semua core). Diterapkan sekali,
+# sebelum model dimuat; dipakai worker pool (extraction_pool.py) agar beberapa
+# proses tidak saling berebut core. Bisa juga di-set lewat environment.
+_thread_config = {
+    'intra_op': int(os.environ['FIND_MINUTIAE_TF_INTRA_OP']) if os.environ.get('FIND_MINUTIAE_TF_INTRA_OP') else None,
+    'inter_op': int(os.environ['FIND_MINUTIAE_TF_INTER_OP']) if os.environ.get('FIND_MINUTIAE_TF_INTER_OP') else None,
+}
+
+# Statistik loading model (dibaca lewat get_model_stats)
+_stats = {
+    'state': 'cold',        # cold | loading | warm | error
+    'load_seconds': None,   # Lama loading model (detik)
+    'loaded_at': None,      # Waktu (epoch) model selesai dimuat
+    'rss_before': None,     # Memori proses sebelum loading (byte)
+    'rss_after': None,      # Memori proses sesudah loading (byte)
+    'load_count': 0,        # Berapa kali model dimuat di proses ini (harusnya 1)
+    'error': None,
+}
+
+
+def get_model_paths():
+    """Mengembalikan dict argumen Extractor -> path lengkap file model."""
+    return {arg: os.path.join(MODEL_DIR, name) for arg, name in MODEL_FILES.items()}
+
+
+def get_rss_bytes():
+    """Memori resident proses saat ini (byte), atau None jika tidak bisa dibaca."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+
+    # Linux: baca langsung dari /proc tanpa dependensi tambahan
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+
+    # Fallback: puncak RSS (ru_maxrss dalam KB di Linux, byte di macOS)
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+
+def set_tensorflow_threads(intra_op=None, inter_op=None):
+    """
+    Mengatur jumlah thread intra-op/inter-op TensorFlow untuk proses ini.
+    Harus dipanggil sebelum model dimuat (TensorFlow mengunci konfigurasi thread
+    saat runtime pertama kali dipakai).
+    """
+    _thread_config['intra_op'] = intra_op
+    _thread_config['inter_op'] = inter_op
+
+
+def _apply_tensorflow_threads():
+    """Menerapkan _thread_config ke TensorFlow (dipanggil tepat sebelum Extractor dibuat)."""
+    if _thread_config['intra_op'] is None and _thread_config['inter_op'] is None:
+        return
+    import tensorflow as tf
+    try:
+        if _thread_config['intra_op'] is not None:
+            tf.config.threading.set_intra_op_parallelism_threads(_thread_config['intra_op'])
+        if _thread_config['inter_op'] is not None:
+            tf.config.threading.set_inter_op_parallelism_threads(_thread_config['inter_op'])
+    except RuntimeError as e:
+        # Runtime TF sudah berjalan di proses ini: konfigurasi tidak bisa diubah lagi
+        print(f"Peringatan: Konfigurasi thread TensorFlow tidak diterapkan: {e}")
+
+
+def install_extractor(extractor):
+    """
+    Memasang objek extractor siap pakai (punya extract_minutiae) sebagai Extractor
+    resident proses ini, misal extractor tiruan untuk benchmark tanpa TensorFlow.
+    """
+    global _extractor
+    with _lock:
+        _extractor = extractor
+        _stats['state'] = 'warm'
+
+
+def _load_extractor():
+    """Memuat Extractor dari disk. Hanya dipanggil saat memegang _lock."""
+    model_paths = get_model_paths()
+
+    # Pengecekan Eksistensi File Model
+    if not all(os.path.exists(p) for p in model_paths.values()):
+        raise FileNotFoundError(f"Satu atau lebih file model Fingerflow (.h5/weights) tidak ditemukan di: {MODEL_DIR}")
+
+    _stats['state'] = 'loading'
+    _stats['error'] = None
+    _stats['rss_before'] = get_rss_bytes()
+    start = time.perf_counter()
+
+    # Impor TensorFlow/Fingerflow ditunda sampai model benar-benar dibutuhkan
+    _apply_tensorflow_threads()
+    from fingerflow.extractor import Extractor
+    extractor = Extractor(**model_paths)
+
+    _stats['load_seconds'] = time.perf_counter() - start
+    _stats['rss_after'] = get_rss_bytes()
+    _stats['loaded_at'] = time.time()
+    _stats['load_count'] += 1
+    _stats['state'] = 'warm'
+    print(f"DEBUG: Model Fingerflow dimuat dalam {_stats['load_seconds']:.2f} detik.")
+
+    # Metrik: lama loading + waktu per jaringan saat inferensi (halaman Diagnostik)
+    import metrics
+    metrics.record('model_load', _stats['load_seconds'], _stats['rss_before'])
+    networks = metrics.instrument_extractor(extractor)
+    if networks:
+        print(f"DEBUG: Metrik per jaringan aktif: {', '.join(networks)}")
+    return extractor
+
+
+def get_extractor():
+    """
+    Mengembalikan Extractor Fingerflow yang sudah dimuat (dimuat saat pertama kali dipanggil).
+    Aman dipanggil dari beberapa thread; loading hanya terjadi sekali per proses.
+    """
+    global _extractor
+    if _extractor is not None:
+        return _extractor
+
+    with _lock:
+        if _extractor is None:
+            try:
+                _extractor = _load_extractor()
+            except Exception as e:
+                _stats['state'] = 'error'
+                _stats['error'] = str(e)
+                raise
+    return _extractor
+
+
+def warm_up_async():
+    """
+    Memuat Extractor di background thread (misal setelah login) agar ekstraksi
+    pertama tidak menunggu loading model. Mengembalikan thread yang berjalan.
+    """
+    global _warmup_thread
+    if _extractor is not None:
+        return None
+    if _warmup_thread is not None and _warmup_thread.is_alive():
+        return _warmup_thread
+
+    def _worker():
+        try:
+            get_extractor()
+        except Exception as e:
+            print(f"Peringatan: Warm-up model Fingerflow gagal: {e}")
+
+    _stats['state'] = 'loading'
+    _warmup_thread = threading.Thread(target=_worker, name="fingerflow-warmup", daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+
+def get_model_stats():
+    """
+    Mengembalikan ringkasan status model: state (cold/loading/warm/error),
+    lama loading, jumlah loading, ukuran file model dan selisih memori proses.
+    """
+    stats = dict(_stats)
+    stats['warm'] = _extractor is not None
+
+    model_bytes = 0
+    for path in get_model_paths().values():
+        if os.path.exists(path):
+            model_bytes += os.path.getsize(path)
+    stats['model_file_bytes'] = model_bytes
+
+    if stats['rss_before'] is not None and stats['rss_after'] is not None:
+        stats['memory_delta_bytes'] = stats['rss_after'] - stats['rss_before']
+    else:
+        stats['memory_delta_bytes'] = None
+    stats['rss_now'] = get_rss_bytes()
+    return stats
@@ -1,18 +1,24 @@
 import customtkinter as ctk
 import os
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk 
-from db_manager import get_db_connection, run_minutiae_extraction 
+from db_manager import save_history
+from thumbnail_cache import get_ctk_image
+# Modul ekstraksi/visualisasi (NumPy, OpenCV, Fingerflow) diimpor saat dibutuhkan
+# agar tidak memperlambat startup aplikasi (lihat startup_timing.py)
+from extraction_worker import ExtractionJob, STAGE_LABELS, STAGE_ORDER
+
+# Interval polling queue worker (ms)
+POLL_INTERVAL_MS = 100
 
 # --- FUNGSI HELPER DISPLAY GAMBAR ---
-def _display_image(label_widget, path, max_size=(250, 180)):
-    """Helper function untuk memuat dan menampilkan gambar di CTkLabel"""
+def _display_image(label_widget, path, max_size=(250, 180), persist=True):
+    """
+    Helper function untuk memuat dan menampilkan gambar di CTkLabel.
+    Gambar diambil dari cache thumbnail (lihat thumbnail_cache.py); persist=False
+    untuk file di luar folder data (misal file yang baru dipilih untuk diupload).
+    """
     try:
-        original_image = Image.open(path)
-        original_image.thumbnail(max_size)
-        
-        # CTkImage dari PIL Image
-        ctk_image = ctk.CTkImage(light_image=original_image, dark_image=original_image, size=original_image.size)
+        ctk_image = get_ctk_image(path, max_size, persist=persist)
         
         label_widget.configure(text="", image=ctk_image)
         # Penting: Simpan referensi objek gambar agar tidak hilang (Garbage Collection)
@@ -29,6 +35,9 @@ class CariMinutiaePage(ctk.CTkFrame):
         super().__init__(parent, fg_color="gray17")
         self.controller = controller
         self.filepath = None # Menyimpan path gambar yang diupload
+        self.job = None # Job ekstraksi yang sedang berjalan (ExtractionJob)
+        self.job_kind = None # 'single' atau 'batch'
+        self.job_data = None # Data form saat job dimulai
         
         # --- Konfigurasi Grid Utama untuk Sidebar dan Main Content ---
         self.grid_columnconfigure(0, weight=0) # Sidebar column
@@ -106,8 +115,23 @@ class CariMinutiaePage(ctk.CTkFrame):
         
         # Tombol Lanjut
         # PERBAIKAN FONT 9/13
-        lanjut_button = ctk.CTkButton(self.input_frame, text="LANJUT & PROSES", command=self.process_and_save, height=40, font=self.controller.FONT_SUBJUDUL, fg_color="#1f6aa5", hover_color="#18537a")
-        lanjut_button.grid(row=5, column=0, pady=30, sticky="s")
+        self.lanjut_button = ctk.CTkButton(self.input_frame, text="LANJUT & PROSES", command=self.process_and_save, height=40, font=self.controller.FONT_SUBJUDUL, fg_color="#1f6aa5", hover_color="#18537a")
+        self.lanjut_button.grid(row=5, column=0, pady=(30, 10), sticky="s")
+
+        # Tombol Batch: proses satu folder berisi banyak sidik jari dengan data kasus yang sama
+        self.batch_button = ctk.CTkButton(self.input_frame, text="PROSES FOLDER (BATCH)", command=self.process_folder, height=32, font=self.controller.FONT_UTAMA, fg_color="gray40", hover_color="gray25")
+        self.batch_button.grid(row=6, column=0, pady=(0, 10), sticky="s")
+
+        # Indikator Progres (tahap ekstraksi) dan Tombol Batal, tampil hanya saat job berjalan
+        self.progress_frame = ctk.CTkFrame(self.input_frame, fg_color="transparent")
+        self.progress_frame.grid_columnconfigure(0, weight=1)
+        self.stage_label = ctk.CTkLabel(self.progress_frame, text="", font=self.controller.FONT_UTAMA, anchor="w", text_color="orange")
+        self.stage_label.grid(row=0, column=0, columnspan=2, sticky="ew")
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
+        self.progress_bar.grid(row=1, column=0, sticky="ew", padx=(0, 10), pady=5)
+        self.progress_bar.set(0)
+        self.cancel_button = ctk.CTkButton(self.progress_frame, text="Batal", command=self.cancel_job, width=80, fg_color="#cc3300", hover_color="#992600", font=self.controller.FONT_UTAMA)
+        self.cancel_button.grid(row=1, column=1, sticky="e")
 
 
     def _setup_form_display(self):
@@ -139,7 +163,7 @@ class CariMinutiaePage(ctk.CTkFrame):
             self.upload_label.configure(text=os.path.basename(self.filepath), text_color="green")
             
             # **Tampilkan Gambar Mentah**
-            _display_image(self.raw_image_holder, self.filepath)
+            _display_image(self.raw_image_holder, self.filepath, persist=False)
             
             # Kosongkan hasil ekstraksi sebelumnya
             self.extracted_image_holder.configure(text="[Hasil Ekstraksi]", image=None)
@@ -157,59 +181,193 @@ class CariMinutiaePage(ctk.CTkFrame):
         if not judul or not self.filepath:
             messagebox.showerror("Validasi", "Judul Kasus dan File Sidik Jari harus diisi!")
             return
+        if self.job is not None:
+            messagebox.showwarning("Proses Berjalan", "Masih ada ekstraksi yang berjalan. Tunggu atau batalkan terlebih dahulu.")
+            return
         
         self.upload_label.configure(text="Memproses...", text_color="orange")
-        self.update_idletasks()
 
-        # 1. Jalankan Model Ekstraksi & Simpan File ke Disk
-        try:
-            path_mentah, path_ekstraksi = run_minutiae_extraction(self.filepath, judul)
-        except Exception as e:
-            messagebox.showerror("Error Ekstraksi", f"Gagal Ekstraksi! Cek konsol. Error: {e}")
-            self.upload_label.configure(text="Ekstraksi Gagal!", text_color="red")
-            return
+        # 1. Jalankan Model Ekstraksi di worker thread (UI tetap responsif)
+        self.job_data = {'judul': judul, 'nomor_lp': nomor_lp, 'tanggal': tanggal, 'filepath': self.filepath}
+        # PNG arsip di-encode/fsync di background (archive_writer.py): overlay tampil dari
+        # memori, 'done' (dan penyimpanan ke database) baru datang setelah file tersimpan
+        from extraction import run_minutiae_extraction
+        from archive_writer import get_writer
+        self._start_job('single', ExtractionJob(run_minutiae_extraction, self.filepath, judul,
+                                                writer=get_writer(), report_preview=True))
+
+    def _finish_single(self, result):
+        path_mentah, path_ekstraksi, minutiae, image_hash = result if result else (None, None, None, None)
+        judul = self.job_data['judul']
+        nomor_lp = self.job_data['nomor_lp']
+        tanggal = self.job_data['tanggal']
 
         if path_mentah and path_ekstraksi:
             # **Tampilkan Gambar Hasil Ekstraksi**
             _display_image(self.extracted_image_holder, path_ekstraksi)
             
-            # 2. Simpan Data Kasus ke Database
+            # 2. Simpan Data Kasus + Template Minutiae ke Database
             user_id = self.controller.logged_in_user_id if hasattr(self.controller, 'logged_in_user_id') else 1 
             
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO history (judul_kasus, nomor_lp, tanggal_kejadian, path_mentah, path_ekstraksi, user_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (judul, nomor_lp, tanggal, path_mentah, path_ekstraksi, user_id)) 
-            
-            last_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            last_id = save_history(judul, nomor_lp, tanggal, path_mentah, path_ekstraksi, user_id, minutiae=minutiae, image_hash=image_hash)
+            if last_id is None:
+                messagebox.showerror("Error", "Ekstraksi berhasil, tetapi data kasus gagal disimpan ke database.")
+                self.upload_label.configure(text="Penyimpanan Gagal!", text_color="red")
+                return
 
-            messagebox.showinfo("Sukses", "Ekstraksi Minutiae berhasil dan data telah disimpan!")
-            self.upload_label.configure(text=os.path.basename(self.filepath), text_color="green")
+            self.upload_label.configure(text=os.path.basename(self.job_data['filepath']), text_color="green")
             
-            # 3. Pindah ke Halaman Hasil Ekstraksi
             data = {
                 'id': last_id,
                 'judul': judul, 
                 'nomor_lp': nomor_lp, 
                 'tanggal': tanggal, 
-                'path_ekstraksi': path_ekstraksi
+                'path_ekstraksi': path_ekstraksi,
+                'jumlah_minutiae': len(minutiae['x']) if minutiae is not None else 0
             }
             
-            # Bersihkan form
-            self.entry_judul.delete(0, ctk.END)
-            self.entry_lp.delete(0, ctk.END)
-            self.entry_tanggal.delete(0, ctk.END)
-            self.filepath = None
+            # Bersihkan form (hanya jika operator belum mulai mengisi kasus baru)
+            if self.filepath == self.job_data['filepath']:
+                self.entry_judul.delete(0, ctk.END)
+                self.entry_lp.delete(0, ctk.END)
+                self.entry_tanggal.delete(0, ctk.END)
+                self.filepath = None
             
-            self.controller.show_frame("HasilEkstraksiPage", data=data) 
+            # 3. Pindah ke Halaman Hasil Ekstraksi, kecuali operator sedang membuka halaman lain
+            if self.controller.current_frame is self:
+                messagebox.showinfo("Sukses", "Ekstraksi Minutiae berhasil dan data telah disimpan!")
+                self.controller.show_frame("HasilEkstraksiPage", data=data) 
+            else:
+                messagebox.showinfo("Sukses", f"Ekstraksi kasus '{judul}' selesai dan data telah disimpan (ID {last_id}).")
         else:
             messagebox.showerror("Error", "Gagal menyimpan file hasil ekstraksi.")
             self.upload_label.configure(text="Ekstraksi Gagal!", text_color="red")
 
+    def process_folder(self):
+        judul = self.entry_judul.get()
+        nomor_lp = self.entry_lp.get()
+        tanggal = self.entry_tanggal.get()
+
+        if not judul:
+            messagebox.showerror("Validasi", "Judul Kasus harus diisi sebelum memproses folder!")
+            return
+        if self.job is not None:
+            messagebox.showwarning("Proses Berjalan", "Masih ada ekstraksi yang berjalan. Tunggu atau batalkan terlebih dahulu.")
+            return
+
+        folder = filedialog.askdirectory(title="Pilih Folder Sidik Jari")
+        if not folder:
+            return
+
+        from batch_extraction import collect_image_files, run_batch_extraction
+        files = collect_image_files(folder)
+        if not files:
+            messagebox.showerror("Validasi", "Folder tidak berisi file gambar (*.bmp, *.jpg, *.jpeg, *.png).")
+            return
+
+        user_id = self.controller.logged_in_user_id if hasattr(self.controller, 'logged_in_user_id') else 1
+        self.job_data = {'judul': judul, 'total': len(files), 'done': 0}
+        self._start_job('batch', ExtractionJob(run_batch_extraction, files, judul, nomor_lp, tanggal, user_id, report_progress=True))
+
+    def _finish_batch(self, summary):
+        if summary['save_failed']:
+            messagebox.showerror("Error", f"Ekstraksi batch selesai, tetapi {len(summary['failed'])} kasus gagal disimpan ke database. Cek konsol.")
+            self.upload_label.configure(text="Penyimpanan Gagal!", text_color="red")
+            return
+        self.upload_label.configure(text=f"Batch selesai: {summary['processed']}/{summary['total']} gambar", text_color="green")
+        pesan = (f"{summary['processed']} dari {summary['total']} gambar berhasil diproses "
+                 f"dalam {summary['elapsed_seconds']:.1f} detik ({summary['images_per_second']:.2f} gambar/detik).")
+        if summary['cancelled']:
+            pesan += "\n\nBatch dibatalkan; gambar yang sudah selesai tetap disimpan."
+        if summary['failed']:
+            pesan += f"\n\n{len(summary['failed'])} gambar gagal, cek konsol."
+        messagebox.showinfo("Batch Selesai", pesan)
+
+        if summary['history_ids'] and self.controller.current_frame is self:
+            self.controller.show_frame("RiwayatPencarian")
+
+    # --- Pengelolaan Job di Background ---
+
+    def _start_job(self, kind, job):
+        self.job = job
+        self.job_kind = kind
+        self.lanjut_button.configure(state="disabled")
+        self.batch_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.progress_bar.set(0)
+        self.stage_label.configure(text="Menunggu worker...")
+        self.progress_frame.grid(row=7, column=0, pady=(0, 20), sticky="ew")
+        job.start()
+        self.after(POLL_INTERVAL_MS, self._poll_job)
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.cancel_button.configure(state="disabled")
+            self.stage_label.configure(text="Membatalkan setelah tahap saat ini selesai...")
+
+    def _poll_job(self):
+        """Membaca pesan dari worker (dipanggil berkala lewat after() di main thread)."""
+        if self.job is None:
+            return
+
+        for message in self.job.poll():
+            kind = message[0]
+            if kind == 'stage':
+                self._show_stage(message[1])
+            elif kind == 'preview':
+                self._show_preview(message[1])
+            elif kind == 'progress':
+                _kind, done, total, path = message
+                self.job_data['done'] = done
+                self.upload_label.configure(text=f"Memproses {done}/{total}: {os.path.basename(path)}", text_color="orange")
+                self.progress_bar.set(done / total)
+            elif kind == 'done':
+                job_kind = self.job_kind
+                self._end_job()
+                if job_kind == 'single':
+                    self._finish_single(message[1])
+                else:
+                    self._finish_batch(message[1])
+                return
+            elif kind == 'cancelled':
+                self._end_job()
+                self.upload_label.configure(text="Ekstraksi dibatalkan.", text_color="orange")
+                return
+            elif kind == 'error':
+                self._end_job()
+                messagebox.showerror("Error Ekstraksi", f"Gagal Ekstraksi! Cek konsol. Error: {message[1]}")
+                self.upload_label.configure(text="Ekstraksi Gagal!", text_color="red")
+                return
+
+        self.after(POLL_INTERVAL_MS, self._poll_job)
+
+    def _show_stage(self, stage):
+        label = STAGE_LABELS.get(stage, stage)
+        step = STAGE_ORDER.index(stage) + 1 if stage in STAGE_ORDER else 0
+        if self.job_kind == 'batch':
+            # Progres batch ditentukan oleh jumlah gambar; tahap hanya sebagai keterangan
+            done, total = self.job_data['done'], self.job_data['total']
+            self.stage_label.configure(text=f"Gambar {done + 1}/{total} - {label}...")
+        else:
+            self.stage_label.configure(text=f"Tahap {step}/{len(STAGE_ORDER)}: {label}...")
+            self.progress_bar.set((step - 1) / len(STAGE_ORDER))
+
+    def _show_preview(self, image):
+        """Overlay hasil ekstraksi langsung dari memori, selagi arsip PNG masih ditulis."""
+        image.thumbnail((250, 180)) # Ukuran sama dengan _display_image
+        ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+        self.extracted_image_holder.configure(text="", image=ctk_image)
+        self.extracted_image_holder.image = ctk_image
+        self.stage_label.configure(text="Menyimpan arsip gambar...")
+
+    def _end_job(self):
+        self.job = None
+        self.job_kind = None
+        self.progress_frame.grid_forget()
+        self.lanjut_button.configure(state="normal")
+        self.batch_button.configure(state="normal")
+
 
 # =========================================================================
 # --- HALAMAN 3B: HASIL EKSTRAKSI ---
@@ -252,7 +410,12 @@ class HasilEkstraksiPage(ctk.CTkFrame):
         # Tanggal Kejadian
         ctk.CTkLabel(info_frame, text="Tanggal Kejadian:", font=self.controller.FONT_UTAMA, anchor="w").pack(fill="x", pady=(5, 0))
         self.label_tanggal = ctk.CTkLabel(info_frame, text="", font=self.controller.FONT_UTAMA, anchor="w")
-        self.label_tanggal.pack(fill="x", pady=(0, 20))
+        self.label_tanggal.pack(fill="x", pady=(0, 10))
+        
+        # Jumlah Minutiae
+        ctk.CTkLabel(info_frame, text="Jumlah Minutiae:", font=self.controller.FONT_UTAMA, anchor="w").pack(fill="x", pady=(5, 0))
+        self.label_jumlah = ctk.CTkLabel(info_frame, text="", font=self.controller.FONT_UTAMA, anchor="w")
+        self.label_jumlah.pack(fill="x", pady=(0, 20))
         
         # Frame Hasil Gambar (Kanan)
         image_frame = ctk.CTkFrame(self.result_card, fg_color="transparent")
@@ -271,15 +434,13 @@ class HasilEkstraksiPage(ctk.CTkFrame):
         self.label_judul.configure(text=data['judul'])
         self.label_lp.configure(text=data['nomor_lp'] if data['nomor_lp'] else "-")
         self.label_tanggal.configure(text=data['tanggal'] if data['tanggal'] else "-")
+        jumlah = data.get('jumlah_minutiae')
+        self.label_jumlah.configure(text=str(jumlah) if jumlah is not None else "-")
         
         # Tampilkan Gambar
         try:
-            img_path = data['path_ekstraksi']
-            original_image = Image.open(img_path)
-            # Resize gambar agar sesuai (maks 400x400)
-            original_image.thumbnail((400, 400))
-            
-            ctk_image = ctk.CTkImage(light_image=original_image, dark_image=original_image, size=original_image.size)
+            # Resize gambar agar sesuai (maks 400x400), dari cache thumbnail
+            ctk_image = get_ctk_image(data['path_ekstraksi'], (400, 400))
             
             self.image_holder.configure(text="", image=ctk_image)
             self.image_holder.image = ctk_image # Agar gambar tidak hilang
@@ -0,0 +1,118 @@
+import customtkinter as ctk
+import time
+from tkinter import filedialog, messagebox
+import metrics
+from model_manager import get_model_stats
+from startup_timing import format_startup_report
+from store_scanner import get_scan_status
+
+# Kolom tabel ringkasan metrik: (judul, lebar, formatter)
+SUMMARY_COLUMNS = (
+    ("Tahap", 34, lambda e: e['stage']),
+    ("Jumlah", 7, lambda e: str(e['count'])),
+    ("Total (s)", 10, lambda e: f"{e['total_seconds']:.2f}"),
+    ("Rata2 (ms)", 11, lambda e: f"{e['mean_ms']:.1f}"),
+    ("p50 (ms)", 10, lambda e: f"{e['p50_ms']:.1f}"),
+    ("p95 (ms)", 10, lambda e: f"{e['p95_ms']:.1f}"),
+    ("Maks (ms)", 10, lambda e: f"{e['max_ms']:.1f}"),
+    ("RSS (MB)", 9, lambda e: "-" if e['mean_rss_delta_mb'] is None else f"{e['mean_rss_delta_mb']:+.1f}"),
+)
+
+# --- HALAMAN 5: DIAGNOSTIK (Metrik Per Tahap) ---
+class DiagnostikPage(ctk.CTkFrame):
+    def __init__(self, parent, controller):
+        super().__init__(parent, fg_color="gray17")
+        self.controller = controller
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(2, weight=1) # Row 0: Judul + Tombol, Row 1: Status, Row 2: Tabel metrik
+
+        header_frame = ctk.CTkFrame(self, fg_color="transparent")
+        header_frame.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="ew")
+        header_frame.grid_columnconfigure(0, weight=1)
+
+        ctk.CTkLabel(header_frame, text="Diagnostik Kinerja", font=controller.FONT_JUDUL).grid(row=0, column=0, sticky="w")
+
+        button_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        button_frame.grid(row=0, column=1, sticky="e")
+        ctk.CTkButton(button_frame, text="Refresh", command=self.refresh_data, width=90, font=controller.FONT_UTAMA).pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Ekspor JSON", command=lambda: self.export_metrics('.json'), width=110, font=controller.FONT_UTAMA).pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Ekspor CSV", command=lambda: self.export_metrics('.csv'), width=110, font=controller.FONT_UTAMA).pack(side="left", padx=5)
+        ctk.CTkButton(button_frame, text="Reset", command=self.reset_metrics, width=80, fg_color="#cc3300", hover_color="#992600", font=controller.FONT_UTAMA).pack(side="left", padx=5)
+
+        # Status startup, model dan jumlah sampel
+        self.status_label = ctk.CTkLabel(self, text="", font=controller.FONT_UTAMA, text_color="gray", justify="left", anchor="w")
+        self.status_label.grid(row=1, column=0, padx=20, pady=(0, 5), sticky="ew")
+
+        # Tabel ringkasan (teks monospace, read-only)
+        self.summary_box = ctk.CTkTextbox(self, font=ctk.CTkFont(family="Courier", size=13), wrap="none")
+        self.summary_box.grid(row=2, column=0, padx=20, pady=(5, 20), sticky="nsew")
+        self.summary_box.configure(state="disabled")
+
+    def refresh_data(self):
+        """Memuat ulang ringkasan metrik (dipanggil saat halaman dibuka dan tombol Refresh)."""
+        summary = metrics.get_summary()
+        samples = sum(entry['count'] for entry in summary)
+
+        stats = get_model_stats()
+        model_text = f"Model: {stats['state']}"
+        if stats['load_seconds'] is not None:
+            model_text += f" (dimuat {stats['load_seconds']:.1f} detik)"
+        if stats['rss_now'] is not None:
+            model_text += f" | Memori proses: {stats['rss_now'] / (1024 * 1024):.0f} MB"
+        lines = [
+            f"Startup: {format_startup_report() or '-'}",
+            model_text,
+            self._scan_text(),
+            f"Sampel: {samples} dari maks {metrics.MAX_SAMPLES} terakhir" + ("" if metrics.ENABLED else " (pencatatan nonaktif: FIND_MINUTIAE_METRICS=0)"),
+        ]
+        self.status_label.configure(text="\n".join(lines))
+
+        self.summary_box.configure(state="normal")
+        self.summary_box.delete("1.0", "end")
+        self.summary_box.insert("end", self._format_summary(summary))
+        self.summary_box.configure(state="disabled")
+
+    @staticmethod
+    def _scan_text():
+        status = get_scan_status()
+        if status is None or not status['stats']:
+            return "Integritas data: belum diperiksa"
+        stats = status['stats']
+        fase = "selesai" if status['phase'] == 'done' else f"berjalan (tahap {status['phase']})"
+        return (f"Integritas data: {fase}, {time.strftime('%Y-%m-%d %H:%M', time.localtime(status['updated']))} | "
+                f"{stats['files_checked']} file, {stats['orphans']} yatim, {stats['rows_checked']} kasus, "
+                f"{stats['overlays_rebuilt'] + stats['thumbnails_rebuilt']} derivatif dibuat ulang, "
+                f"{stats.get('overlays_missing', 0)} overlay hilang, {stats['missing_rows']} gambar hilang")
+
+    @staticmethod
+    def _format_summary(summary):
+        if not summary:
+            return "Belum ada metrik. Jalankan ekstraksi atau buka halaman lain terlebih dahulu."
+        header = "".join(title.ljust(width) if i == 0 else title.rjust(width) for i, (title, width, _fmt) in enumerate(SUMMARY_COLUMNS))
+        lines = [header, "-" * len(header)]
+        for entry in summary:
+            lines.append("".join(fmt(entry)[:width].ljust(width) if i == 0 else fmt(entry).rjust(width)
+                                 for i, (_title, width, fmt) in enumerate(SUMMARY_COLUMNS)))
+        return "\n".join(lines)
+
+    def export_metrics(self, extension):
+        """Menyimpan seluruh sampel metrik ke file JSON/CSV pilihan pengguna."""
+        default_name = time.strftime("metrik_%Y%m%d_%H%M%S") + extension
+        path = filedialog.asksaveasfilename(
+            title="Ekspor Metrik",
+            defaultextension=extension,
+            initialfile=default_name,
+            filetypes=[("JSON", "*.json")] if extension == '.json' else [("CSV", "*.csv")],
+        )
+        if not path:
+            return
+        try:
+            count = metrics.export(path)
+            messagebox.showinfo("Sukses", f"{count} sampel metrik diekspor ke:\n{path}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Gagal mengekspor metrik: {e}")
+
+    def reset_metrics(self):
+        if messagebox.askyesno("Reset Metrik", "Hapus semua sampel metrik yang tercatat?"):
+            metrics.clear()
+            self.refresh_data()
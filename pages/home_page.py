@@ -1,10 +1,13 @@
 import customtkinter as ctk
-from db_manager import fetch_history_counts
+from db_manager import fetch_history_counts, get_history_version
+from model_manager import get_model_stats
 
 class HomePage(ctk.CTkFrame):
     def __init__(self, parent, controller):
         super().__init__(parent, fg_color="gray17")
         self.controller = controller
+        self.shown_state = None # (versi riwayat, user_id) yang terakhir ditampilkan
+        self.model_status_after_id = None # Timer refresh status model (maksimal satu)
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(2, weight=1)
         
@@ -43,8 +46,39 @@ class HomePage(ctk.CTkFrame):
 
         ctk.CTkLabel(self, text="Selamat Datang di Aplikasi Find Minutiae", font=self.controller.FONT_SUBJUDUL).grid(row=2, column=0, sticky="n", pady=50)
 
+        # Status model Fingerflow (cold/warm, lama loading, memori)
+        self.model_status_label = ctk.CTkLabel(self, text="", font=self.controller.FONT_UTAMA, text_color="gray")
+        self.model_status_label.grid(row=3, column=0, sticky="w", padx=20, pady=(0, 10))
+
     def refresh_data(self):
-        """Ambil data dari DB dan update label dashboard."""
-        umum, lokal = fetch_history_counts()
+        """Ambil data dari DB dan update label dashboard (hanya jika data riwayat berubah)."""
+        self.refresh_model_status()
+        state = (get_history_version(), self.controller.logged_in_user_id)
+        if state == self.shown_state:
+            return
+        umum, lokal = fetch_history_counts(user_id=self.controller.logged_in_user_id)
         self.umum_label.configure(text=str(umum))
-        self.lokal_label.configure(text=str(lokal))
\ No newline at end of file
+        self.lokal_label.configure(text=str(lokal))
+        self.shown_state = state
+
+    def refresh_model_status(self):
+        """Menampilkan status model Fingerflow; diperbarui berkala selama model dimuat."""
+        stats = get_model_stats()
+        if stats['state'] == 'warm':
+            text = f"Model: siap (dimuat {stats['load_seconds']:.1f} detik"
+            if stats['memory_delta_bytes'] is not None:
+                text += f", +{stats['memory_delta_bytes'] / (1024 * 1024):.0f} MB"
+            text += ")"
+        elif stats['state'] == 'error':
+            text = f"Model: gagal dimuat ({stats['error']})"
+        else:
+            text = "Model: sedang dimuat..." if stats['state'] == 'loading' else "Model: belum dimuat"
+        self.model_status_label.configure(text=text)
+
+        # refresh_data memanggil fungsi ini setiap halaman dibuka; jangan menumpuk timer
+        if stats['state'] == 'loading' and self.model_status_after_id is None:
+            self.model_status_after_id = self.after(1000, self._model_status_tick)
+
+    def _model_status_tick(self):
+        self.model_status_after_id = None
+        self.refresh_model_status()
\ No newline at end of file
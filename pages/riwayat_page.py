@@ -1,16 +1,38 @@
 import customtkinter as ctk
 import os
+import calendar
 from tkinter import messagebox
-from PIL import Image
-from db_manager import get_history_data, fetch_history_by_id, update_history_data, delete_history
+from db_manager import count_history, get_history_page, get_history_version, search_history, count_search_history, history_date_facets, fetch_history_by_id, update_history_data, delete_history, fetch_minutiae_count, close_db_connections
+from thumbnail_cache import get_ctk_image
+from components.virtual_table import VirtualTable
+from extraction_worker import ExtractionJob
+
+# Jeda setelah ketikan terakhir sebelum pencarian dijalankan (ms)
+SEARCH_DEBOUNCE_MS = 300
+ALL_DATES = "Semua tanggal"
+# Interval polling hasil pencocokan dari worker thread (ms)
+POLL_INTERVAL_MS = 100
+
+
+def _run_match(history_id, top_k=10, stage_callback=None, cancel_event=None):
+    """Target ExtractionJob: pencocokan 1:N di worker thread (UI tetap responsif)."""
+    from matcher import match_history  # Impor NumPy ditunda sampai dibutuhkan
+    try:
+        return match_history(history_id, top_k=top_k)
+    finally:
+        close_db_connections() # Koneksi SQLite milik worker thread ini
 
 # --- HALAMAN 4A: RIWAYAT PENCARIAN (Tabel Daftar) ---
 class RiwayatPencarianPage(ctk.CTkFrame):
     def __init__(self, parent, controller):
         super().__init__(parent, fg_color="gray17")
         self.controller = controller
+        self.shown_state = None # (versi riwayat, mode, user_id, query, bulan) yang terakhir ditampilkan
+        self.facet_state = None # State saat facet tanggal terakhir dihitung
+        self.facet_ranges = {} # Label facet -> (date_from, date_to)
+        self.search_after_id = None # Timer debounce pencarian
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(2, weight=1) # Row 0: Judul, Row 1: Filter, Row 2: Tabel
+        self.grid_rowconfigure(2, weight=1) # Row 0: Judul + Filter, Row 1: Pencarian, Row 2: Tabel
         
         # Frame Judul dan Filter
         header_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -32,60 +54,108 @@ class RiwayatPencarianPage(ctk.CTkFrame):
                                 command=self.refresh_data, # Memanggil refresh_data setiap kali ganti mode
                                 font=controller.FONT_UTAMA).pack(side="left")
         
-        
-        self.table_frame = ctk.CTkScrollableFrame(self, fg_color="gray15", label_text="Daftar Kasus Tersimpan", label_font=controller.FONT_SUBJUDUL, label_text_color="#1f6aa5")
-        self.table_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        self.table_frame.grid_columnconfigure(0, weight=1) 
-        
-        self.data_rows = []
-        self._setup_table_headers()
+        # Pencarian (search-as-you-type) + facet bulan penyimpanan
+        search_frame = ctk.CTkFrame(self, fg_color="transparent")
+        search_frame.grid(row=1, column=0, padx=20, pady=(0, 5), sticky="ew")
+        search_frame.grid_columnconfigure(0, weight=1)
+        
+        self.search_entry = ctk.CTkEntry(search_frame, placeholder_text="Cari judul kasus, nomor LP, tanggal kejadian, atau user...", font=controller.FONT_UTAMA)
+        self.search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.search_entry.bind("<KeyRelease>", self._schedule_search)
+        
+        self.date_facet = ctk.StringVar(value=ALL_DATES)
+        self.facet_menu = ctk.CTkOptionMenu(search_frame, variable=self.date_facet, values=[ALL_DATES], command=self.refresh_data, font=controller.FONT_UTAMA, width=180)
+        self.facet_menu.grid(row=0, column=1, sticky="e")
+        
+        self.result_label = ctk.CTkLabel(search_frame, text="", font=controller.FONT_UTAMA, text_color="gray")
+        self.result_label.grid(row=0, column=2, sticky="e", padx=(10, 0))
+        
+        # Tabel virtual: hanya baris yang terlihat yang punya widget, data diambil per blok
+        self.table = VirtualTable(
+            self, controller,
+            columns=[
+                ("ID", lambda row: row['id']),
+                ("Judul Kasus", lambda row: row['judul_kasus']),
+                ("Nomor LP", lambda row: row['nomor_lp'] if row['nomor_lp'] else "-"),
+                ("Tanggal", lambda row: row['tanggal_kejadian'] if row['tanggal_kejadian'] else "-"),
+                ("Tipe", lambda row: row['username']),
+            ],
+            fetch_count=self._fetch_count,
+            fetch_rows=self._fetch_rows,
+            actions=[("Detail", lambda row: self.show_detail(row['id']))],
+        )
+        self.table.grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
         # Data akan di-load saat show_frame dipanggil (refresh_data)
 
-    def _setup_table_headers(self):
-        # Header Table
-        header_frame = ctk.CTkFrame(self.table_frame, fg_color="gray20")
-        header_frame.grid(row=0, column=0, sticky="ew")
-        header_frame.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
-        
-        headers = ["ID", "Judul Kasus", "Nomor LP", "Tanggal", "Tipe", "Aksi"]
-        for i, text in enumerate(headers):
-            ctk.CTkLabel(header_frame, text=text, font=self.controller.FONT_SUBJUDUL, padx=5, pady=10).grid(row=0, column=i, sticky="ew")
+    def _filter_user_id(self):
+        """Lokal: hanya kasus milik user yang login. Umum: semua kasus."""
+        return self.controller.logged_in_user_id if self.riwayat_mode.get() == "Lokal" else None
+
+    def _search_filters(self):
+        """Filter pencarian aktif: dict untuk search_history/count_search_history."""
+        date_from, date_to = self.facet_ranges.get(self.date_facet.get(), (None, None))
+        return {
+            'query': self.search_entry.get().strip() or None,
+            'user_id': self._filter_user_id(),
+            'date_from': date_from,
+            'date_to': date_to,
+        }
+
+    def _fetch_count(self):
+        filters = self._search_filters()
+        if filters['query'] is None and filters['date_from'] is None:
+            return count_history(user_id=filters['user_id']) # Dari agregat, tanpa COUNT
+        return count_search_history(**filters)
+
+    def _fetch_rows(self, offset, limit):
+        filters = self._search_filters()
+        if filters['query'] is None and filters['date_from'] is None:
+            return get_history_page(user_id=filters['user_id'], limit=limit, offset=offset)
+        return search_history(limit=limit, offset=offset, **filters)
+
+    def _schedule_search(self, _event=None):
+        """Debounce: pencarian baru dijalankan setelah pengguna berhenti mengetik."""
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self.search_after_id = None
+        self.refresh_data()
 
     def refresh_data(self, *args):
-        # Hapus baris data lama
-        for row in self.data_rows:
-            row.destroy()
-        self.data_rows = []
-
-        is_local = self.riwayat_mode.get() == "Lokal"
-        user_id = self.controller.logged_in_user_id
-        
-        # Fetch data berdasarkan mode yang dipilih
-        data = get_history_data(user_id=user_id)
-        
-        for i, row_data in enumerate(data):
-            # row_id, judul, nomor_lp, tanggal, tipe (dari DB)
-            row_id, judul, nomor_lp, tanggal, timestamp, username = row_data
-            
-            row_frame = ctk.CTkFrame(self.table_frame, fg_color="gray17" if i % 2 == 0 else "gray15")
-            row_frame.grid(row=i + 1, column=0, sticky="ew", pady=(1, 0))
-            row_frame.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
-            self.data_rows.append(row_frame)
-            
-            # Kolom Data
-            ctk.CTkLabel(row_frame, text=row_id, font=self.controller.FONT_UTAMA).grid(row=0, column=0, padx=5, pady=5)
-            ctk.CTkLabel(row_frame, text=judul, font=self.controller.FONT_UTAMA).grid(row=0, column=1, padx=5, pady=5, sticky="w")
-            ctk.CTkLabel(row_frame, text=nomor_lp if nomor_lp else "-", font=self.controller.FONT_UTAMA).grid(row=0, column=2, padx=5, pady=5)
-            ctk.CTkLabel(row_frame, text=tanggal if tanggal else "-", font=self.controller.FONT_UTAMA).grid(row=0, column=3, padx=5, pady=5)
-            ctk.CTkLabel(row_frame, text=username, font=self.controller.FONT_UTAMA).grid(row=0, column=4, padx=5, pady=5)
-            
-            # Kolom Aksi
-            action_frame = ctk.CTkFrame(row_frame, fg_color="transparent")
-            action_frame.grid(row=0, column=5, padx=5, pady=5)
-            
-            # Menggunakan lambda untuk menunda eksekusi show_detail dengan ID yang benar
-            detail_btn = ctk.CTkButton(action_frame, text="Detail", width=60, height=25, command=lambda rid=row_id: self.show_detail(rid))
-            detail_btn.pack(side="left", padx=2)
+        # Lewati jika data riwayat, mode, user dan filter sama dengan yang sedang ditampilkan
+        state = (get_history_version(), self.riwayat_mode.get(), self.controller.logged_in_user_id,
+                 self.search_entry.get().strip(), self.date_facet.get())
+        if state == self.shown_state:
+            return
+        # Filter sama: data berubah saja -> pertahankan posisi scroll
+        same_view = self.shown_state is not None and self.shown_state[1:] == state[1:]
+        self.table.reload(keep_position=same_view)
+        self.shown_state = state
+        self.result_label.configure(text=f"{self.table.total} kasus")
+        # Facet tanggal dihitung setelah tabel tampil (tidak menunda hasil)
+        self.after_idle(self._refresh_facets)
+
+    def _refresh_facets(self):
+        """Memperbarui pilihan facet bulan (dengan jumlah) untuk query/mode saat ini."""
+        filters = self._search_filters()
+        state = (self.shown_state[0], filters['query'], filters['user_id']) if self.shown_state else None
+        if state == self.facet_state:
+            return
+        self.facet_state = state
+
+        selected_month = self.date_facet.get().split(" ")[0]
+        self.facet_ranges = {ALL_DATES: (None, None)}
+        values = [ALL_DATES]
+        for month, jumlah in history_date_facets(filters['query'], filters['user_id']):
+            label = f"{month} ({jumlah})"
+            year, mon = (int(part) for part in month.split("-"))
+            self.facet_ranges[label] = (f"{month}-01", f"{month}-{calendar.monthrange(year, mon)[1]:02d}")
+            values.append(label)
+            if month == selected_month:
+                self.date_facet.set(label)
+        self.facet_menu.configure(values=values)
 
     def show_detail(self, row_id):
         self.controller.show_frame("DetailPage", data={'id': row_id})
@@ -98,6 +168,7 @@ class DetailPage(ctk.CTkFrame):
         self.controller = controller
         self.record_id = None
         self.record_paths = {} # Menyimpan path mentah dan ekstraksi
+        self.match_job = None # ExtractionJob pencocokan yang sedang berjalan
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -116,6 +187,8 @@ class DetailPage(ctk.CTkFrame):
         action_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
         action_frame.grid(row=0, column=1, sticky="e")
         
+        self.btn_match = ctk.CTkButton(action_frame, text="Cari Kecocokan", command=self.find_matches, fg_color="#1f6aa5", hover_color="#18537a", width=110)
+        self.btn_match.pack(side="left", padx=5)
         self.btn_edit = ctk.CTkButton(action_frame, text="Edit Data", command=self.go_to_edit, fg_color="gray40", hover_color="gray25", width=80)
         self.btn_edit.pack(side="left", padx=5)
         self.btn_delete = ctk.CTkButton(action_frame, text="Hapus", command=self.delete_record, fg_color="#cc3300", hover_color="#992600", width=80)
@@ -153,7 +226,12 @@ class DetailPage(ctk.CTkFrame):
         
         ctk.CTkLabel(info_panel, text="Tanggal Kejadian:", font=self.controller.FONT_UTAMA, anchor="w").pack(fill="x", pady=(5, 0))
         self.lbl_tanggal = ctk.CTkLabel(info_panel, text="", font=self.controller.FONT_UTAMA, anchor="w")
-        self.lbl_tanggal.pack(fill="x", pady=(0, 20))
+        self.lbl_tanggal.pack(fill="x", pady=(0, 10))
+        
+        # Jumlah minutiae dibaca dari template tersimpan (tanpa inferensi ulang)
+        ctk.CTkLabel(info_panel, text="Jumlah Minutiae:", font=self.controller.FONT_UTAMA, anchor="w").pack(fill="x", pady=(5, 0))
+        self.lbl_jumlah = ctk.CTkLabel(info_panel, text="", font=self.controller.FONT_UTAMA, anchor="w")
+        self.lbl_jumlah.pack(fill="x", pady=(0, 20))
         
         # Path File
         ctk.CTkLabel(info_panel, text="Path File Mentah:", font=self.controller.FONT_UTAMA, anchor="w").pack(fill="x", pady=(5, 0))
@@ -193,6 +271,8 @@ class DetailPage(ctk.CTkFrame):
             self.lbl_lp.configure(text=record['nomor_lp'] if record['nomor_lp'] else "-")
             self.lbl_tanggal.configure(text=record['tanggal_kejadian'] if record['tanggal_kejadian'] else "-")
             self.lbl_path_mentah.configure(text=record['path_mentah'])
+            jumlah = fetch_minutiae_count(self.record_id)
+            self.lbl_jumlah.configure(text=str(jumlah) if jumlah is not None else "- (belum ada template)")
             
             self.record_paths = {
                 "Mentah": record['path_mentah'],
@@ -215,17 +295,55 @@ class DetailPage(ctk.CTkFrame):
             return
 
         try:
-            original_image = Image.open(img_path)
-            # Resize gambar agar sesuai
-            original_image.thumbnail((450, 450))
-            
-            ctk_image = ctk.CTkImage(light_image=original_image, dark_image=original_image, size=original_image.size)
+            # Dari cache thumbnail: toggle Mentah/Ekstraksi tidak decode ulang
+            ctk_image = get_ctk_image(img_path, (450, 450))
             
             self.image_holder.configure(text="", image=ctk_image)
             self.image_holder.image = ctk_image
         except Exception as e:
             self.image_holder.configure(text=f"Gagal memuat gambar: {e}", image=None)
 
+    def find_matches(self):
+        """Mencocokkan template kasus ini (1:N) dengan seluruh kasus lain di database."""
+        if not self.record_id or self.match_job is not None:
+            return
+
+        self.btn_match.configure(state="disabled", text="Mencocokkan...")
+        self.match_job = ExtractionJob(_run_match, self.record_id, top_k=10).start()
+        self.match_job.record_id = self.record_id
+        self.after(POLL_INTERVAL_MS, self._poll_match)
+
+    def _poll_match(self):
+        """Membaca hasil pencocokan dari worker (dipanggil berkala lewat after() di main thread)."""
+        for message in self.match_job.poll():
+            kind = message[0]
+            if kind == 'done':
+                record_id = self.match_job.record_id
+                self._end_match()
+                self._show_matches(record_id, message[1])
+                return
+            elif kind in ('error', 'cancelled'):
+                self._end_match()
+                messagebox.showerror("Error Pencocokan", f"Gagal mencocokkan kasus! Cek konsol. Error: {message[1]}")
+                return
+        self.after(POLL_INTERVAL_MS, self._poll_match)
+
+    def _end_match(self):
+        self.match_job = None
+        self.btn_match.configure(state="normal", text="Cari Kecocokan")
+
+    def _show_matches(self, record_id, candidates):
+        if not candidates:
+            messagebox.showinfo("Hasil Pencocokan", "Tidak ada kandidat yang cocok (atau kasus ini belum memiliki template minutiae).")
+            return
+
+        lines = []
+        for rank, cand in enumerate(candidates, start=1):
+            record = fetch_history_by_id(cand['history_id'])
+            judul = record['judul_kasus'] if record else "?"
+            lines.append(f"{rank}. ID {cand['history_id']} - {judul} (skor {cand['score']:.3f}, {cand['matched']} minutiae cocok)")
+        messagebox.showinfo("Hasil Pencocokan", f"Kandidat teratas untuk kasus ID {record_id}:\n\n" + "\n".join(lines))
+
     def go_to_edit(self):
         if self.record_id:
             self.controller.show_frame("EditPage", data={'id': self.record_id})
@@ -240,10 +358,9 @@ class DetailPage(ctk.CTkFrame):
         )
 
         if confirm:
-            path_mentah = self.record_paths.get("Mentah")
-            path_ekstraksi = self.record_paths.get("Ekstraksi")
-            
-            if delete_history_data(self.record_id, path_mentah, path_ekstraksi):
+            # delete_history mengambil path dari database dan hanya menghapus gambar
+            # yang tidak dipakai kasus lain (file yatim lain dibereskan store_scanner.py)
+            if delete_history(self.record_id):
                 messagebox.showinfo("Sukses", "Data dan file kasus berhasil dihapus.")
                 self.controller.show_frame("RiwayatPencarian")
             else:
@@ -0,0 +1,118 @@
+import numpy as np
+import cv2
+
+# =========================================================================
+# --- PREPROCESSING SEBELUM INFERENSI: ROI & NORMALISASI DPI ---
+# =========================================================================
+# Scan/foto sidik jari sering berisi latar kosong yang luas di sekitar
+# cetakan. Sebelum inferensi, foreground dideteksi dengan mask variansi per
+# blok (ridge = variansi tinggi, latar = rata/noise rendah), lalu gambar
+# dipotong ke bounding box foreground (+ margin) sebagai VIEW tanpa salinan.
+# Opsional, potongan diskalakan ke DPI target model. Koordinat minutiae hasil
+# inferensi dipetakan kembali ke frame gambar asli (map_to_original), sehingga
+# overlay, penyimpanan dan pencocokan tetap memakai koordinat asli.
+#
+# Semua parameter diambil dari PREPROCESS_PARAMS (extraction.py) yang ikut
+# menjadi key cache hasil ekstraksi.
+
+DEFAULT_PARAMS = {
+    'roi': True,            # Potong ke foreground sebelum inferensi
+    'roi_block': 16,        # Ukuran blok mask variansi (piksel)
+    'roi_ratio': 0.25,      # Blok foreground: std >= ratio x std persentil 95 seluruh blok
+    'roi_min_std': 6.0,     # Batas bawah std foreground (gambar hampir rata)
+    'roi_margin': 32,       # Margin di sekitar bounding box (piksel, resolusi asli)
+    'target_dpi': None,     # Mis. 500: skala ke DPI ini jika DPI file diketahui
+}
+
+
+def _param(params, name):
+    return params.get(name, DEFAULT_PARAMS[name])
+
+
+def foreground_mask(gray, block=16, ratio=0.25, min_std=6.0):
+    """
+    Mask foreground per blok (array bool berukuran ceil(H/block) x ceil(W/block)).
+    Std per blok dihitung dari rata-rata x dan x^2 (cv2.resize INTER_AREA) tanpa
+    loop per blok; blok terisolasi dibuang dan celah kecil ditutup (morfologi).
+    """
+    h, w = gray.shape
+    size = (max(1, -(-w // block)), max(1, -(-h // block)))
+    # Statistik blok cukup dari setiap piksel kedua: salinan float32 hanya 1/4 frame
+    work = gray[::2, ::2].astype(np.float32)
+    mean = cv2.resize(work, size, interpolation=cv2.INTER_AREA)
+    mean_sq = cv2.resize(work * work, size, interpolation=cv2.INTER_AREA)
+    std = np.sqrt(np.maximum(mean_sq - mean * mean, 0))
+
+    threshold = max(min_std, ratio * float(np.percentile(std, 95)))
+    mask = (std >= threshold).astype(np.uint8)
+    kernel = np.ones((3, 3), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+    return mask.astype(bool)
+
+
+def detect_roi(gray, params=DEFAULT_PARAMS):
+    """
+    Bounding box foreground (x0, y0, x1, y1) di koordinat asli (x1/y1 eksklusif),
+    sudah termasuk margin. Seluruh frame jika ROI dimatikan atau foreground
+    tidak terdeteksi.
+    """
+    h, w = gray.shape
+    if not _param(params, 'roi'):
+        return 0, 0, w, h
+    block = _param(params, 'roi_block')
+    mask = foreground_mask(gray, block, _param(params, 'roi_ratio'), _param(params, 'roi_min_std'))
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return 0, 0, w, h
+
+    margin = _param(params, 'roi_margin')
+    x0 = max(0, cols[0] * block - margin)
+    y0 = max(0, rows[0] * block - margin)
+    x1 = min(w, (cols[-1] + 1) * block + margin)
+    y1 = min(h, (rows[-1] + 1) * block + margin)
+    return int(x0), int(y0), int(x1), int(y1)
+
+
+def prepare_model_gray(gray, params=DEFAULT_PARAMS, source_dpi=None):
+    """
+    Gambar grayscale untuk inferensi beserta transformasinya.
+    Mengembalikan (gray_model, transform) dengan transform = dict
+    roi (x0, y0, x1, y1) dan scale (ukuran gray_model / ukuran potongan).
+    Tanpa penskalaan, gray_model adalah view potongan gray (tanpa salinan).
+    """
+    x0, y0, x1, y1 = detect_roi(gray, params)
+    crop = gray[y0:y1, x0:x1]
+
+    scale = 1.0
+    target_dpi = _param(params, 'target_dpi')
+    if target_dpi and source_dpi and abs(source_dpi - target_dpi) > 1:
+        scale = float(target_dpi) / float(source_dpi)
+        size = (max(1, int(round(crop.shape[1] * scale))), max(1, int(round(crop.shape[0] * scale))))
+        crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+    return crop, {'roi': (x0, y0, x1, y1), 'scale': scale}
+
+
+def map_to_original(minutiae, transform):
+    """Memetakan koordinat minutiae (dict kolom) dari gambar model kembali ke frame asli (di tempat)."""
+    x0, y0 = transform['roi'][:2]
+    scale = transform['scale']
+    if x0 == 0 and y0 == 0 and scale == 1.0:
+        return minutiae
+    minutiae['x'] = (np.asarray(minutiae['x'], dtype=np.float32) / scale + x0).astype(np.float32)
+    minutiae['y'] = (np.asarray(minutiae['y'], dtype=np.float32) / scale + y0).astype(np.float32)
+    return minutiae
+
+
+def read_dpi(path):
+    """DPI horizontal dari metadata file (PNG pHYs / JPEG JFIF), atau None. Hanya membaca header."""
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            dpi = img.info.get('dpi')
+    except Exception:
+        return None
+    if not dpi or not dpi[0]:
+        return None
+    return float(dpi[0])
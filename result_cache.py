@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from db_manager import (DATA_DIR, fetch_extraction_cache, save_extraction_cache, get_extraction_cache_size,
+                        evict_extraction_cache, purge_extraction_cache)
+from model_manager import get_model_paths
+
+# =========================================================================
+# --- CACHE HASIL EKSTRAKSI (PERSISTEN) ---
+# =========================================================================
+# Menjalankan ulang gambar yang sama (misal setelah memperbaiki judul kasus)
+# tidak perlu inferensi CoarseNet/FineNet/ClassifyNet/CoreNet lagi. Key cache:
+#   sha256(hash konten gambar, versi model, parameter preprocessing)
+# Versi model = hash isi keempat file model; berubah otomatis jika salah satu
+# file di models/ diganti, dan entri versi lama dibuang (invalidasi).
+# Isi entri: template minutiae (BLOB kolumnar) di tabel extraction_cache +
+# overlay hasil render di CACHE_DIR. Total ukuran dibatasi MAX_CACHE_BYTES
+# (eviction LRU berdasarkan last_used).
+
+CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'extraction')
+MODEL_HASHES_FILE = os.path.join(CACHE_DIR, 'model_hashes.json')
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+_lock = threading.Lock()
+_model_state = {'fingerprint': None, 'version': None}
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_model_hashes():
+    try:
+        with open(MODEL_HASHES_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def model_version():
+    """
+    Hash gabungan isi file model. File model (ratusan MB) hanya di-hash ulang jika
+    ukuran/mtime-nya berubah; hash per file disimpan di MODEL_HASHES_FILE agar
+    proses berikutnya tidak membaca ulang model. Saat versi berubah, entri cache
+    versi lama dihapus.
+    """
+    paths = sorted(get_model_paths().items())
+    fingerprint = []
+    for arg, path in paths:
+        try:
+            st = os.stat(path)
+            fingerprint.append((arg, st.st_size, st.st_mtime_ns))
+        except OSError:
+            fingerprint.append((arg, None, None))
+    fingerprint = tuple(fingerprint)
+
+    with _lock:
+        if _model_state['fingerprint'] == fingerprint:
+            return _model_state['version']
+
+        memo = _load_model_hashes()
+        parts = []
+        for (arg, path), (_arg, size, mtime_ns) in zip(paths, fingerprint):
+            if size is None:
+                parts.append(f"{arg}:missing")
+                continue
+            entry = memo.get(path)
+            if not entry or entry[0] != size or entry[1] != mtime_ns:
+                entry = memo[path] = [size, mtime_ns, _file_sha256(path)]
+            parts.append(f"{arg}:{entry[2]}")
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(MODEL_HASHES_FILE, 'w') as f:
+            json.dump(memo, f)
+
+        version = hashlib.sha256(";".join(parts).encode('utf-8')).hexdigest()
+        _model_state['fingerprint'] = fingerprint
+        _model_state['version'] = version
+
+    # Invalidasi (pertama kali per proses atau setelah file model berubah):
+    # entri dari versi model lain tidak akan pernah cocok lagi
+    removed = purge_extraction_cache(keep_model_version=version)
+    if removed:
+        _remove_files(removed)
+        _stats['invalidations'] += len(removed)
+        print(f"DEBUG: File model berubah, {len(removed)} entri cache ekstraksi dihapus.")
+    return version
+
+
+def cache_key(image_hash, params):
+    """Key cache untuk (hash gambar, versi model saat ini, parameter preprocessing)."""
+    payload = json.dumps([image_hash, model_version(), params], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _remove_files(paths):
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def lookup(key):
+    """(minutiae, overlay_path) untuk key, atau None. overlay_path None jika file overlay hilang."""
+    from minutiae_store import unpack_minutiae
+
+    row = fetch_extraction_cache(key, touch_time=time.time())
+    if row is None:
+        _stats['misses'] += 1
+        return None
+    _stats['hits'] += 1
+    overlay_path = row['overlay_path'] if row['overlay_path'] and os.path.exists(row['overlay_path']) else None
+    return unpack_minutiae(row['jumlah'], bytes(row['data'])), overlay_path
+
+
+def store(key, image_hash, minutiae, overlay_source=None):
+    """
+    Menyimpan hasil ekstraksi ke cache. overlay_source (path PNG overlay yang sudah
+    ditulis) di-hardlink ke CACHE_DIR (fallback: salin) sehingga tidak perlu encode
+    ulang dan tetap ada walau kasusnya dihapus. Lalu eviction sampai <= MAX_CACHE_BYTES.
+    """
+    import shutil
+    from minutiae_store import pack_minutiae
+
+    jumlah, blob = pack_minutiae(minutiae)
+    overlay_path = None
+    size_bytes = len(blob)
+    if overlay_source and os.path.exists(overlay_source):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        overlay_path = os.path.join(CACHE_DIR, f"{key}.png")
+        try:
+            if os.path.exists(overlay_path):
+                os.remove(overlay_path)
+            os.link(overlay_source, overlay_path)
+        except OSError:
+            shutil.copyfile(overlay_source, overlay_path)
+        size_bytes += os.path.getsize(overlay_path)
+
+    if save_extraction_cache(key, image_hash, model_version(), jumlah, blob, overlay_path, size_bytes, time.time()):
+        _stats['stores'] += 1
+    evicted = evict_extraction_cache(MAX_CACHE_BYTES)
+    _remove_files(evicted)
+    _stats['evictions'] += len(evicted)
+
+
+def clear():
+    """Mengosongkan seluruh cache hasil ekstraksi."""
+    _remove_files(purge_extraction_cache())
+
+
+def get_cache_stats():
+    """Statistik cache: hits, misses, stores, evictions, invalidations, entries, bytes."""
+    stats = dict(_stats)
+    stats['entries'], stats['bytes'] = get_extraction_cache_size()
+    return stats
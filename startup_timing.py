@@ -0,0 +1,70 @@
+import threading
+import time
+
+# =========================================================================
+# --- PENGUKURAN WAKTU STARTUP & PREWARM STACK EKSTRAKSI ---
+# =========================================================================
+# Modul ini diimpor PALING AWAL oleh main.py sehingga _T0 ~ awal aplikasi.
+# Titik waktu yang dicatat (detik sejak _T0):
+#   - first_frame      : jendela (halaman login) pertama kali digambar
+#   - imports_ready    : NumPy/OpenCV/PIL + modul ekstraksi selesai diimpor
+#   - extraction_ready : model Fingerflow sudah dimuat (ekstraksi siap)
+# Stack ekstraksi diimpor/dimuat di background thread SETELAH first_frame
+# agar pengguna tidak menunggu TensorFlow hanya untuk melihat halaman login.
+
+_T0 = time.perf_counter()
+_marks = {}
+_lock = threading.Lock()
+_prewarm_thread = None
+
+
+def mark(name):
+    """Mencatat waktu (detik sejak startup) untuk sebuah titik; hanya kejadian pertama yang disimpan."""
+    with _lock:
+        if name not in _marks:
+            _marks[name] = time.perf_counter() - _T0
+        return _marks[name]
+
+
+def get_startup_report():
+    """Dict titik waktu startup (detik) yang sudah tercatat."""
+    with _lock:
+        return dict(_marks)
+
+
+def format_startup_report():
+    """Ringkasan satu baris, misal 'first_frame=0.41s, imports_ready=1.20s'."""
+    report = get_startup_report()
+    return ", ".join(f"{name}={seconds:.2f}s" for name, seconds in sorted(report.items(), key=lambda item: item[1]))
+
+
+def _prewarm():
+    # Impor modul berat: setelah ini membuka halaman/ekstraksi tidak lagi menunggu impor
+    import numpy  # noqa: F401
+    import cv2  # noqa: F401
+    from PIL import Image  # noqa: F401
+    import extraction  # noqa: F401
+    import batch_extraction  # noqa: F401
+    import matcher  # noqa: F401
+    mark('imports_ready')
+
+    from model_manager import get_extractor
+    try:
+        get_extractor()
+        mark('extraction_ready')
+    except Exception as e:
+        print(f"Peringatan: Prewarm model Fingerflow gagal: {e}")
+    print(f"STARTUP: {format_startup_report()}")
+
+
+def prewarm_async():
+    """
+    Memulai impor stack ekstraksi + loading model di background thread.
+    Dipanggil setelah jendela pertama tampil. Mengembalikan thread yang berjalan.
+    """
+    global _prewarm_thread
+    if _prewarm_thread is not None:
+        return _prewarm_thread
+    _prewarm_thread = threading.Thread(target=_prewarm, name="startup-prewarm", daemon=True)
+    _prewarm_thread.start()
+    return _prewarm_thread
@@ -0,0 +1,330 @@
+import json
+import os
+import threading
+import time
+
+from db_manager import (DATA_DIR, is_path_referenced, find_history_by_basenames, fetch_history_files, load_minutiae,
+                        get_scan_checkpoint, save_scan_checkpoint, close_db_connections)
+from image_store import STORE_DIR
+from extraction_worker import extraction_busy
+from metrics import measure
+
+# =========================================================================
+# --- PEMERIKSAAN INTEGRITAS & PEMBERSIHAN FILE YATIM ---
+# =========================================================================
+# Mencocokkan isi folder data dengan tabel history secara bertahap:
+#   1. 'files': setiap gambar kasus (file lama di DATA_DIR dan bucket
+#      STORE_DIR/<xx>) yang tidak dirujuk baris history mana pun dilaporkan
+#      (default), atau jika diminta dikarantina ke QUARANTINE_DIR / dihapus
+#      (lihat MODES). File lama dicocokkan juga berdasarkan nama file, karena
+#      database bisa berisi path dari lokasi aplikasi lain (misal C:\...).
+#      Sisa file .tmp dari penulisan atomik yang terputus dihapus (kecuali mode
+#      'report', yang hanya mencatat).
+#   2. 'rows': setiap baris history diperiksa; overlay ekstraksi yang hilang
+#      dirender ulang dari template minutiae + gambar mentah, thumbnail yang
+#      hilang dibuat ulang, gambar mentah yang hilang dilaporkan.
+# Posisi terakhir disimpan di tabel scan_checkpoint setiap CHUNK_SIZE item,
+# sehingga pemindaian berlanjut setelah aplikasi ditutup. Di GUI scanner
+# berjalan di thread background dengan throttle: berhenti selama ada job
+# ekstraksi (extraction_worker.extraction_busy) dan hanya memakai sebagian
+# kecil waktu (DUTY_CYCLE). File yang lebih baru dari MIN_AGE_SECONDS
+# dilewati: file write-behind (archive_writer.py) baru dirujuk database
+# setelah selesai ditulis.
+
+CHECKPOINT_NAME = 'store'
+QUARANTINE_DIR = os.path.join(DATA_DIR, 'quarantine')
+MODES = ('report', 'quarantine', 'delete')
+
+IMAGE_SUFFIXES = ('_mentah.png', '_ekstraksi.png')
+TEMP_SUFFIX = '.tmp'
+
+CHUNK_SIZE = 50                  # File/baris per langkah (satu checkpoint per langkah)
+DUTY_CYCLE = 0.1                 # Bagian waktu maksimal yang dipakai scanner background
+BUSY_POLL_SECONDS = 2.0          # Interval cek ulang saat ekstraksi sedang berjalan
+MIN_AGE_SECONDS = 6 * 3600       # File lebih baru dari ini tidak dianggap yatim
+RESCAN_INTERVAL_SECONDS = 24 * 3600
+MAX_REPORTED = 100               # Batas daftar path/ID yang disimpan di ringkasan
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def _new_stats():
+    return {
+        'files_checked': 0, 'orphans': 0, 'quarantined': 0, 'deleted': 0, 'temp_removed': 0,
+        'skipped_recent': 0, 'rows_checked': 0, 'overlays_rebuilt': 0, 'thumbnails_rebuilt': 0,
+        'overlays_missing': 0,
+        'missing_rows': 0, 'orphan_paths': [], 'missing_ids': [], 'started': time.time(), 'finished': None,
+    }
+
+
+def _scan_dirs():
+    """Folder relatif terhadap DATA_DIR yang berisi gambar kasus, urut: '' (file lama) lalu bucket store."""
+    dirs = ['']
+    if os.path.isdir(STORE_DIR):
+        for name in sorted(os.listdir(STORE_DIR)):
+            if os.path.isdir(os.path.join(STORE_DIR, name)):
+                dirs.append(os.path.relpath(os.path.join(STORE_DIR, name), DATA_DIR))
+    return dirs
+
+
+def _iter_files(position=None):
+    """(folder relatif, nama file) gambar/tmp urut, dimulai SETELAH position [folder, nama]."""
+    start_dir, start_name = position or ('', None)
+    for rel_dir in _scan_dirs():
+        if rel_dir < start_dir:
+            continue
+        folder = os.path.join(DATA_DIR, rel_dir)
+        try:
+            names = sorted(os.listdir(folder))
+        except OSError:
+            continue
+        for name in names:
+            if rel_dir == start_dir and start_name is not None and name <= start_name:
+                continue
+            if name.endswith(IMAGE_SUFFIXES) or name.endswith(TEMP_SUFFIX):
+                yield rel_dir, name
+
+
+class StoreScanner:
+    """
+    scanner = StoreScanner(mode='report')
+    summary = scanner.run()              # sampai selesai (dilanjutkan dari checkpoint)
+    summary = scanner.run(throttle=True, cancel_event=event)   # mode background
+
+    mode (penanganan file yatim dan sisa .tmp): 'report' (hanya dicatat),
+    'quarantine' (dipindah ke QUARANTINE_DIR, bisa dikembalikan) atau 'delete'.
+    Overlay/thumbnail yang hilang dibuat ulang di semua mode.
+    min_age: umur minimal (detik) file yatim.
+    """
+
+    def __init__(self, mode='report', min_age=MIN_AGE_SECONDS, chunk_size=CHUNK_SIZE,
+                 duty_cycle=DUTY_CYCLE, busy=extraction_busy, progress_callback=None):
+        if mode not in MODES:
+            raise ValueError(f"Mode tidak dikenal: {mode} (pilih {', '.join(MODES)})")
+        self.mode = mode
+        self.min_age = min_age
+        self.chunk_size = chunk_size
+        self.duty_cycle = duty_cycle
+        self.busy = busy
+        self.progress_callback = progress_callback
+        self.state = None
+        self._files = None
+
+    # --- Checkpoint ---
+    def _load_state(self, restart=False):
+        row = None if restart else get_scan_checkpoint(CHECKPOINT_NAME)
+        if row is None or row['phase'] == 'done':
+            return {'phase': 'files', 'position': None, 'stats': _new_stats()}
+        return {'phase': row['phase'], 'position': json.loads(row['position']) if row['position'] else None,
+                'stats': json.loads(row['stats']) if row['stats'] else _new_stats()}
+
+    def _save_state(self):
+        save_scan_checkpoint(CHECKPOINT_NAME, self.state['phase'], json.dumps(self.state['position']),
+                             json.dumps(self.state['stats']), time.time())
+
+    # --- Tahap 1: file -> baris history ---
+    def _scan_files_chunk(self):
+        if self._files is None:
+            self._files = _iter_files(self.state['position'])
+        stats = self.state['stats']
+        items = []
+        for _ in range(self.chunk_size):
+            item = next(self._files, None)
+            if item is None:
+                self._files = None
+                break
+            items.append(item)
+        # File lama (root DATA_DIR): baris yang merujuk nama file yang sama, sekali baca per langkah
+        legacy = find_history_by_basenames(name for rel_dir, name in items
+                                           if not rel_dir and not name.endswith(TEMP_SUFFIX))
+        for rel_dir, name in items:
+            self._check_file(rel_dir, name, legacy)
+            stats['files_checked'] += 1
+            self.state['position'] = [rel_dir, name]
+        if self._files is None:
+            self.state['phase'], self.state['position'] = 'rows', 0
+
+    def _check_file(self, rel_dir, name, legacy):
+        path = os.path.join(DATA_DIR, rel_dir, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        if time.time() - mtime < self.min_age:
+            self.state['stats']['skipped_recent'] += 1
+            return
+        if name.endswith(TEMP_SUFFIX):
+            # Sisa penulisan atomik yang terputus (crash sebelum rename): tidak pernah lengkap
+            if self.mode != 'report':
+                os.remove(path)
+            self.state['stats']['temp_removed'] += 1
+            return
+        # File content-addressed: nama diawali hash konten gambar (lihat image_store.stored_paths)
+        hash_hex = name.split('_', 1)[0] if rel_dir else None
+        if hash_hex is None and name in legacy:
+            return
+        if not is_path_referenced(path, hash_hex):
+            self._dispose(path, os.path.join(rel_dir, name))
+
+    def _dispose(self, path, rel_path):
+        from thumbnail_cache import remove_thumbnail
+
+        stats = self.state['stats']
+        stats['orphans'] += 1
+        if len(stats['orphan_paths']) < MAX_REPORTED:
+            stats['orphan_paths'].append(rel_path)
+        if self.mode == 'report':
+            print(f"DEBUG: File yatim (tidak dirujuk history): {rel_path}")
+            return
+        if self.mode == 'quarantine':
+            target = os.path.join(QUARANTINE_DIR, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+            stats['quarantined'] += 1
+        else:
+            os.remove(path)
+            stats['deleted'] += 1
+        remove_thumbnail(path)
+        print(f"DEBUG: File yatim {rel_path} {'dikarantina' if self.mode == 'quarantine' else 'dihapus'}.")
+
+    # --- Tahap 2: baris history -> file & derivatif ---
+    def _scan_rows_chunk(self):
+        rows = fetch_history_files(after_id=self.state['position'] or 0, limit=self.chunk_size)
+        if not rows:
+            self.state['phase'], self.state['position'] = 'done', None
+            self.state['stats']['finished'] = time.time()
+            return
+        for row in rows:
+            self._check_row(row)
+            self.state['stats']['rows_checked'] += 1
+            self.state['position'] = row['id']
+
+    def _check_row(self, row):
+        from thumbnail_cache import thumbnail_path, save_thumbnail
+
+        stats = self.state['stats']
+        path_mentah, path_ekstraksi = row['path_mentah'], row['path_ekstraksi']
+        if not path_mentah or not os.path.exists(path_mentah):
+            stats['missing_rows'] += 1
+            if len(stats['missing_ids']) < MAX_REPORTED:
+                stats['missing_ids'].append(row['id'])
+            print(f"Peringatan: Gambar mentah kasus ID {row['id']} tidak ditemukan: {path_mentah}")
+            return
+        # Derivatif dibuat ulang di semua mode (tidak ada yang dihapus); mode hanya berlaku untuk file yatim
+        if path_ekstraksi and not os.path.exists(path_ekstraksi):
+            if self._rebuild_overlay(row['id'], path_mentah, path_ekstraksi):
+                stats['overlays_rebuilt'] += 1
+            else:
+                # Checkpoint dari versi sebelumnya belum punya kunci ini
+                stats['overlays_missing'] = stats.get('overlays_missing', 0) + 1
+        for path in (path_mentah, path_ekstraksi):
+            if path and os.path.exists(path) and not os.path.exists(thumbnail_path(path)):
+                if save_thumbnail(path):
+                    stats['thumbnails_rebuilt'] += 1
+
+    @staticmethod
+    def _rebuild_overlay(history_id, path_mentah, path_ekstraksi):
+        """Merender ulang overlay dari template minutiae tersimpan (tanpa inferensi)."""
+        from extraction import decode_grayscale
+        from minutiae_render import render_minutiae
+        from image_store import save_array_atomic
+
+        minutiae = load_minutiae(history_id)
+        if minutiae is None:
+            print(f"Peringatan: Overlay kasus ID {history_id} hilang dan tidak ada template untuk merender ulang.")
+            return False
+        try:
+            gray = decode_grayscale(path_mentah)
+            save_array_atomic(render_minutiae(gray, minutiae, bgr=True), path_ekstraksi)
+        except Exception as e:
+            print(f"ERROR: Gagal merender ulang overlay kasus ID {history_id}: {e}")
+            return False
+        print(f"DEBUG: Overlay kasus ID {history_id} dirender ulang dari template.")
+        return True
+
+    # --- Loop ---
+    def _wait_idle(self, cancel_event):
+        """Menunggu selama ekstraksi interaktif berjalan. False jika dibatalkan."""
+        while self.busy is not None and self.busy():
+            if cancel_event.wait(BUSY_POLL_SECONDS):
+                return False
+        return not cancel_event.is_set()
+
+    def run(self, restart=False, throttle=False, cancel_event=None):
+        """
+        Menjalankan pemindaian dari checkpoint terakhir sampai selesai (restart=True:
+        mulai dari awal). throttle=True: jeda antar langkah agar beban rata-rata
+        <= duty_cycle dan menunggu selama ada ekstraksi. Mengembalikan ringkasan
+        (dict stats); 'finished' None jika dibatalkan sebelum selesai.
+        """
+        cancel_event = cancel_event or threading.Event()
+        self.state = self._load_state(restart)
+        self._files = None
+        while self.state['phase'] != 'done':
+            if throttle and not self._wait_idle(cancel_event):
+                break
+            if cancel_event.is_set():
+                break
+            start = time.perf_counter()
+            phase = self.state['phase']
+            with measure('integrity_scan.' + phase):
+                if phase == 'files':
+                    self._scan_files_chunk()
+                else:
+                    self._scan_rows_chunk()
+            self._save_state()
+            if self.progress_callback:
+                self.progress_callback(self.state['phase'], self.state['stats'])
+            if throttle:
+                worked = time.perf_counter() - start
+                cancel_event.wait(worked * (1.0 - self.duty_cycle) / self.duty_cycle)
+
+        stats = self.state['stats']
+        if stats['finished']:
+            print(f"DEBUG: Pemeriksaan integritas selesai: {stats['files_checked']} file, {stats['orphans']} yatim, "
+                  f"{stats['rows_checked']} kasus, {stats['overlays_rebuilt']} overlay dan "
+                  f"{stats['thumbnails_rebuilt']} thumbnail dibuat ulang, {stats.get('overlays_missing', 0)} overlay "
+                  f"tidak bisa dibuat ulang, {stats['missing_rows']} gambar hilang.")
+        return stats
+
+
+def get_scan_status():
+    """Ringkasan checkpoint terakhir: dict phase, updated dan stats, atau None jika belum pernah berjalan."""
+    row = get_scan_checkpoint(CHECKPOINT_NAME)
+    if row is None:
+        return None
+    return {'phase': row['phase'], 'updated': row['updated'], 'stats': json.loads(row['stats']) if row['stats'] else None}
+
+
+def _background_loop(scanner, cancel_event):
+    try:
+        while not cancel_event.is_set():
+            row = get_scan_checkpoint(CHECKPOINT_NAME)
+            # Putaran terakhir selesai belum lama ini: tunggu sampai interval berikutnya
+            if row is not None and row['phase'] == 'done':
+                remaining = row['updated'] + RESCAN_INTERVAL_SECONDS - time.time()
+                if remaining > 0:
+                    cancel_event.wait(remaining)
+                    continue
+            scanner.run(throttle=True, cancel_event=cancel_event)
+    except Exception as e:
+        print(f"ERROR: Pemeriksaan integritas berhenti: {e}")
+    finally:
+        close_db_connections()
+
+
+def start_background_scan(mode='report'):
+    """
+    Memulai scanner di thread background (sekali per proses). Mengembalikan
+    threading.Event; set() untuk menghentikan (posisi tetap tersimpan).
+    """
+    global _background
+    with _background_lock:
+        if _background is None:
+            cancel_event = threading.Event()
+            thread = threading.Thread(target=_background_loop, args=(StoreScanner(mode=mode), cancel_event),
+                                      name="integrity-scan", daemon=True)
+            thread.start()
+            _background = (thread, cancel_event)
+        return _background[1]
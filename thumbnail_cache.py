@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from db_manager import DATA_DIR
+
+# =========================================================================
+# --- CACHE THUMBNAIL (DISK + MEMORI) ---
+# =========================================================================
+# Dua lapis cache agar membuka detail kasus / toggle Mentah-Ekstraksi tidak
+# perlu decode PNG resolusi penuh:
+#   1. Derivatif di disk (DATA_DIR/thumbs) berukuran THUMB_SIZE, dibuat saat
+#      hasil ekstraksi disimpan (atau saat pertama dibuka untuk data lama).
+#   2. LRU di memori berisi CTkImage siap pakai, key (path, mtime, ukuran),
+#      dibatasi total byte piksel (MAX_MEMORY_BYTES).
+# mtime file sumber ikut jadi key sehingga file yang ditimpa tidak memakai
+# thumbnail basi.
+
+THUMB_DIR = os.path.join(DATA_DIR, 'thumbs')
+THUMB_SIZE = (450, 450)             # Ukuran tampilan terbesar (DetailPage)
+MAX_MEMORY_BYTES = 64 * 1024 * 1024  # Batas total piksel CTkImage di memori
+
+_memory = OrderedDict()   # key -> (ctk_image, bytes)
+_memory_bytes = 0
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def thumbnail_path(path):
+    """Lokasi derivatif thumbnail untuk sebuah file sumber (unik per path absolut)."""
+    abs_path = os.path.abspath(path)
+    stem = os.path.splitext(os.path.basename(abs_path))[0]
+    digest = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()[:10]
+    return os.path.join(THUMB_DIR, f"{stem}_{digest}.png")
+
+
+def save_thumbnail(path, image=None):
+    """
+    Membuat derivatif thumbnail untuk path. image (opsional) dipakai bila
+    gambar sudah ada di memori (misal saat ekstraksi) sehingga tidak perlu
+    membaca ulang file: PIL Image, atau array uint8 grayscale/BGR yang
+    diperkecil dan di-encode langsung dengan OpenCV (tanpa salinan PIL).
+    Mengembalikan path thumbnail, atau None jika gagal.
+    """
+    from PIL import Image
+
+    try:
+        target = thumbnail_path(path)
+        if image is not None and not isinstance(image, Image.Image):
+            from image_store import save_array_atomic
+            save_array_atomic(_shrink_array(image, THUMB_SIZE), target, sync=False)  # Derivatif: tanpa fsync
+            return target
+
+        if image is None:
+            image = Image.open(path)
+            image.draft(image.mode, THUMB_SIZE)  # JPEG: decode langsung di resolusi kecil
+        thumb = image.copy() if image.width > THUMB_SIZE[0] or image.height > THUMB_SIZE[1] else image
+        thumb.thumbnail(THUMB_SIZE)
+
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        thumb.save(target, 'PNG')
+        return target
+    except Exception as e:
+        print(f"Peringatan: Gagal membuat thumbnail untuk {path}: {e}")
+        return None
+
+
+def _shrink_array(array, max_size):
+    """Array diperkecil (INTER_AREA) agar muat di max_size dengan rasio tetap; tanpa salinan jika sudah muat."""
+    import cv2
+
+    h, w = array.shape[:2]
+    scale = min(1.0, max_size[0] / float(w), max_size[1] / float(h))
+    if scale >= 1.0:
+        return array
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(array, size, interpolation=cv2.INTER_AREA)
+
+
+def remove_thumbnail(path):
+    """Menghapus derivatif thumbnail (dipanggil saat file sumber dihapus)."""
+    target = thumbnail_path(path)
+    if os.path.exists(target):
+        os.remove(target)
+    with _lock:
+        for key in [key for key in _memory if key[0] == path]:
+            _evict(key)
+
+
+def load_thumbnail(path, max_size=THUMB_SIZE, persist=True):
+    """
+    PIL Image berukuran maksimal max_size. Memakai derivatif di disk jika masih
+    valid (tidak lebih lama dari file sumber), jika tidak dibuat ulang.
+    persist=False: tanpa derivatif di disk (misal file upload di luar DATA_DIR).
+    """
+    from PIL import Image
+
+    target = None
+    if persist:
+        target = thumbnail_path(path)
+        if not (os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path)):
+            target = save_thumbnail(path)
+    image = Image.open(target if target else path)
+    image.draft(image.mode, tuple(max_size))
+    image.thumbnail(max_size)
+    return image
+
+
+def _evict(key):
+    """Menghapus satu entri LRU. Hanya dipanggil saat memegang _lock."""
+    global _memory_bytes
+    _image, size = _memory.pop(key)
+    _memory_bytes -= size
+
+
+def get_ctk_image(path, max_size=THUMB_SIZE, persist=True):
+    """
+    CTkImage siap tampil untuk path (tanpa decode jika sudah ada di cache).
+    Melempar OSError jika file sumber tidak ada. persist: lihat load_thumbnail.
+    """
+    import customtkinter as ctk
+    global _memory_bytes
+
+    key = (path, os.path.getmtime(path), tuple(max_size))
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            _stats['hits'] += 1
+            return _memory[key][0]
+        _stats['misses'] += 1
+
+    image = load_thumbnail(path, max_size, persist)
+    ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+    size = image.width * image.height * len(image.getbands())
+
+    with _lock:
+        if key not in _memory:
+            _memory[key] = (ctk_image, size)
+            _memory_bytes += size
+        # Buang entri paling lama tidak dipakai sampai di bawah batas
+        while _memory_bytes > MAX_MEMORY_BYTES and len(_memory) > 1:
+            _evict(next(iter(_memory)))
+            _stats['evictions'] += 1
+    return ctk_image
+
+
+def get_cache_stats():
+    """Statistik cache memori (hits, misses, evictions, entri, byte)."""
+    with _lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_memory)
+        stats['bytes'] = _memory_bytes
+    return stats
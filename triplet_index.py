@@ -0,0 +1,112 @@
+import numpy as np
+
+# =========================================================================
+# --- HASH TRIPLET MINUTIAE (PRE-FILTER KANDIDAT) ---
+# =========================================================================
+# Setiap minutia dipasangkan dengan tetangga terdekatnya sehingga membentuk
+# segitiga (triplet). Fitur segitiga tidak berubah terhadap rotasi/translasi:
+#   - panjang tiga sisi (diurutkan, dikuantisasi),
+#   - orientasi (searah/berlawanan jarum jam),
+#   - arah ketiga minutia, relatif terhadap arah sisi terpanjang.
+# Fitur dikodekan menjadi satu integer (hash) dan disimpan di tabel
+# minutiae_triplet (lihat db_manager.py) sebagai inverted index.
+
+NEIGHBOURS = 4          # Tetangga terdekat per minutia (6 segitiga per minutia)
+SIDE_BIN = 12.0         # Lebar bin panjang sisi (piksel)
+SIDE_LEVELS = 64        # Jumlah bin panjang sisi (sisi lebih panjang di-clip)
+MIN_SIDE = 8.0          # Segitiga terlalu kecil/besar tidak stabil -> diabaikan
+MAX_SIDE = 200.0
+ANGLE_LEVELS = 8        # Bin arah relatif (45 derajat)
+
+
+def _triangles(x, y):
+    """Indeks segitiga unik (T, 3) dari tetangga terdekat tiap minutia."""
+    n = len(x)
+    if n < 3:
+        return np.zeros((0, 3), dtype=np.int64)
+    d = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    np.fill_diagonal(d, np.inf)
+    k = min(NEIGHBOURS, n - 1)
+    nn = np.argsort(d, axis=1)[:, :k]
+
+    tri = [np.stack([np.arange(n), nn[:, a], nn[:, b]], axis=1) for a in range(k) for b in range(a + 1, k)]
+    tri = np.sort(np.concatenate(tri), axis=1)
+    return np.unique(tri, axis=0)
+
+
+def _features(x, y, angle):
+    """
+    Fitur kontinu tiap segitiga: sisi (T, 3) terurut naik, orientasi (T,) 0/1,
+    dan arah relatif ketiga minutia (T, 3) dalam satuan bin (belum dibulatkan).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    angle = np.asarray(angle, dtype=np.float64)
+    tri = _triangles(x, y)
+    if len(tri) == 0:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int64), np.zeros((0, 3))
+
+    px, py = x[tri], y[tri]                                   # (T, 3)
+    # Sisi di depan setiap titik sudut
+    opp = np.stack([
+        np.hypot(px[:, 1] - px[:, 2], py[:, 1] - py[:, 2]),
+        np.hypot(px[:, 0] - px[:, 2], py[:, 0] - py[:, 2]),
+        np.hypot(px[:, 0] - px[:, 1], py[:, 0] - py[:, 1]),
+    ], axis=1)
+    # Urutkan titik sudut berdasarkan panjang sisi di depannya
+    order = np.argsort(opp, axis=1, kind='stable')
+    sides = np.take_along_axis(opp, order, axis=1)
+    vx = np.take_along_axis(px, order, axis=1)
+    vy = np.take_along_axis(py, order, axis=1)
+    va = np.take_along_axis(angle[tri], order, axis=1)
+
+    # Orientasi: tanda cross product (v0->v1) x (v0->v2)
+    cross = (vx[:, 1] - vx[:, 0]) * (vy[:, 2] - vy[:, 0]) - (vy[:, 1] - vy[:, 0]) * (vx[:, 2] - vx[:, 0])
+    hand = (cross > 0).astype(np.int64)
+
+    # Arah tiap minutia relatif terhadap arah sisi terpanjang (v0->v1, di depan v2)
+    side_dir = np.arctan2(vy[:, 1] - vy[:, 0], vx[:, 1] - vx[:, 0])
+    rel = np.mod(va - side_dir[:, None], 2 * np.pi) * (ANGLE_LEVELS / (2 * np.pi))
+
+    valid = (sides[:, 0] >= MIN_SIDE) & (sides[:, 2] <= MAX_SIDE)
+    return sides[valid] / SIDE_BIN, hand[valid], rel[valid]
+
+
+def _encode(qa, qb, qc, hand, qang):
+    """Gabungkan fitur terkuantisasi menjadi satu hash int64. qang: (T, 3)."""
+    qa, qb, qc = (np.clip(q, 0, SIDE_LEVELS - 1) for q in (qa, qb, qc))
+    key = ((qa * SIDE_LEVELS + qb) * SIDE_LEVELS + qc) * 2 + hand
+    for i in range(3):
+        key = key * ANGLE_LEVELS + (qang[:, i] % ANGLE_LEVELS)
+    return key
+
+
+def template_hashes(minutiae):
+    """Hash triplet (unik) sebuah template untuk disimpan di index."""
+    sides, hand, rel = _features(minutiae['x'], minutiae['y'], minutiae['angle'])
+    if len(hand) == 0:
+        return np.zeros(0, dtype=np.int64)
+    q = np.floor(sides).astype(np.int64)
+    keys = _encode(q[:, 0], q[:, 1], q[:, 2], hand, np.floor(rel).astype(np.int64))
+    return np.unique(keys)
+
+
+def probe_hashes(minutiae):
+    """
+    Hash triplet untuk query. Panjang sisi juga dicoba di bin tetangga terdekatnya
+    (multi-probe, 2^3 kombinasi) agar sisi di dekat batas bin tetap bertemu dengan
+    template yang sama meski ada noise. Bin arah cukup lebar sehingga tidak di-probe.
+    """
+    sides, hand, rel = _features(minutiae['x'], minutiae['y'], minutiae['angle'])
+    if len(hand) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    def _options(v):
+        base = np.floor(v).astype(np.int64)
+        nearest = np.where(v - base >= 0.5, base + 1, base - 1)
+        return (base, nearest)
+
+    opts_a, opts_b, opts_c = (_options(sides[:, i]) for i in range(3))
+    qr = np.floor(rel).astype(np.int64)
+    keys = [_encode(qa, qb, qc, hand, qr) for qa in opts_a for qb in opts_b for qc in opts_c]
+    return np.unique(np.concatenate(keys))